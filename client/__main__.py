@@ -16,12 +16,13 @@ def main():
 		help="Logging level (default: INFO)",
 	)
 	parser.add_argument("--trace-io", action="store_true", help="Trace sent/received messages (client-side)")
+	parser.add_argument("--no-negotiate", action="store_true", help="Skip the HELLO feature negotiation and use plain JSON frames (for servers that predate it)")
 	args = parser.parse_args()
 
 	logging.basicConfig(level=getattr(logging, args.log_level), format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
 	# Create controller first without GUI, then bind GUI to controller to avoid circular init
 	root = customtkinter.CTk()
-	controller = ClientController(addr=(args.host, args.port), gui=root, trace_io=args.trace_io)
+	controller = ClientController(addr=(args.host, args.port), gui=root, trace_io=args.trace_io, negotiate=not args.no_negotiate)
 	app = ClientGUI(root=root, client_controller=controller)
 	# controller.set_gui(app)
 
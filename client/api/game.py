@@ -1,6 +1,7 @@
 import hashlib
 import os
 import json
+from concurrent.futures import Future
 from typing import Callable, Optional
 
 from session.session import Session
@@ -11,6 +12,7 @@ from protocol.payloads.game import (
     UploadGameChunkPayload,
     UploadGameFinishPayload,
     FetchStorePayload,
+    SearchGamesPayload,
     FetchGameCoverPayload, 
     FetchGameDetailPayload, 
     DownloadGameInitPayload, DownloadGameInitResponsePayload, 
@@ -104,16 +106,26 @@ def fetch_my_works(session: Session) -> Message:
     req = Message.request(Action.FETCH_MY_WORKS, EmptyPayload())
     return session.request_response(req)
 
-def fetch_store(session: Session, page: int, page_size: int) -> Message:
-    payload = FetchStorePayload(page=page, page_size=page_size)
+def fetch_store(session: Session, page: int, page_size: int, cursor: Optional[str] = None) -> Message:
+    payload = FetchStorePayload(page=page, page_size=page_size, cursor=cursor)
     req = Message.request(Action.FETCH_STORE, payload)
     return session.request_response(req)
 
+def search_games(session: Session, query: str, page: int, page_size: int) -> Message:
+    payload = SearchGamesPayload(query=query, page=page, page_size=page_size)
+    req = Message.request(Action.SEARCH_GAMES, payload)
+    return session.request_response(req)
+
 def fetch_game_cover(session: Session, game_name: str) -> Message:
     payload = FetchGameCoverPayload(game_name=game_name)
     req = Message.request(Action.FETCH_GAME_COVER, payload)
     return session.request_response(req)
 
+def fetch_game_cover_async(session: Session, game_name: str, timeout: float | None = None) -> "Future[Message]":
+    payload = FetchGameCoverPayload(game_name=game_name)
+    req = Message.request(Action.FETCH_GAME_COVER, payload)
+    return session.request_async(req, timeout=timeout)
+
 def fetch_game_detail(session: Session, game_name: str) -> Message:
     payload = FetchGameDetailPayload(game_name=game_name)
     req = Message.request(Action.FETCH_GAME_DETAIL, payload)
@@ -148,6 +160,7 @@ def download_game(
     
     # 2. Receive Chunks
     dest_file_path = os.path.join(dest_file_root_path, f"{download_id}.zip")
+    sha256_hash = hashlib.sha256()  # fed as chunks are written, so verification needs no second read
     try:
         with open(dest_file_path, "wb") as f:
             bytes_received = 0
@@ -169,6 +182,7 @@ def download_game(
                     return Message.response(Action.DOWNLOAD_GAME_CHUNK, None, ok=False, error="Invalid server response payload")
                 
                 f.write(chunk_data_payload.data)
+                sha256_hash.update(chunk_data_payload.data)
                 bytes_received += len(chunk_data_payload.data)
                 chunk_index += 1
                 
@@ -182,16 +196,9 @@ def download_game(
     req = Message.request(Action.DOWNLOAD_GAME_FINISH, finish_payload)
 
     # 4. Verify SHA256
-    sha256_hash = hashlib.sha256()
-    try:
-        with open(dest_file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        file_hash = sha256_hash.hexdigest()
-        if file_hash != sha256_expected:
-            return Message.response(Action.DOWNLOAD_GAME_FINISH, None, ok=False, error="SHA256 mismatch")
-    except OSError as e:
-        return Message.response(Action.DOWNLOAD_GAME_FINISH, None, ok=False, error=f"File read error: {e}")
+    file_hash = sha256_hash.hexdigest()
+    if file_hash != sha256_expected:
+        return Message.response(Action.DOWNLOAD_GAME_FINISH, None, ok=False, error="SHA256 mismatch")
     
     # 5. unzip file into ...\<download_id> folder
     extract_folder = os.path.join(dest_file_root_path, download_id)
@@ -3,7 +3,7 @@ from protocol.message import Message
 from protocol.enums import Action
 
 from protocol.payloads.room import (
-    CreateRoomPayload
+    CreateRoomPayload, FetchRoomChangesPayload
 )
 
 from protocol.payloads.common import EmptyPayload
@@ -24,6 +24,11 @@ def fetch_room_list(session: Session) -> Message:
     resp = session.request_response(req)
     return resp
 
+def fetch_room_changes(session: Session, since_version: int) -> Message:
+    req = Message.request(Action.FETCH_ROOM_CHANGES, FetchRoomChangesPayload(since_version=since_version))
+    resp = session.request_response(req)
+    return resp
+
 def leave_room(session: Session) -> Message:
     req = Message.request(Action.LEAVE_ROOM, EmptyPayload())
     resp = session.request_response(req)
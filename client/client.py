@@ -2,25 +2,50 @@ import logging
 from client.infra.connector import Connector
 from client.infra.library_manager import LibraryManager
 from session.session import Session
+from session.errors import SessionError
 from client.api import auth, game, room
 from protocol.payloads import game as game_payloads
 from protocol.payloads import room as room_payloads
 from protocol.message import Message
-from typing import Callable
+from concurrent.futures import Future
+from typing import Callable, Iterable, Optional
 import os
+import threading
+
+logger = logging.getLogger(__name__)
 
 NORMAL_TIMEOUT = 3.0  # seconds
+HELLO_TIMEOUT = 3.0  # seconds a server gets to answer HELLO before it is treated as a legacy server
 
 class Client:
-    def __init__(self, addr: tuple[str, int], trace_io: bool = False) -> None:
+    def __init__(self, addr: tuple[str, int], trace_io: bool = False, negotiate: bool = True) -> None:
+        """negotiate: offer attachment/binary frames with HELLO on connect; False talks plain JSON from the start."""
         self._addr = addr
         self._connector = Connector(addr)
         self._session: Session | None = None
         self._trace_io = bool(trace_io)
+        self._negotiate = bool(negotiate)
         self._username: str | None = None
         self._library_manager: LibraryManager | None = None
+        self._lobby_version: int | None = None  # lobby version of the room list the UI shows
+        self._lobby_ahead: set[int] = set()  # versions above _lobby_version already applied through coalesced events
+        self._lobby_version_lock = threading.Lock()
 
     def connect(self, connect_timeout: float | None = None, on_event: Callable[[Message, str | None], None] | None = None, on_disconnect=None):
+        session = self._open_session(connect_timeout)
+        if self._negotiate:
+            # 與伺服器協商 attachment frame，chunk/封面的 bytes 不再經過 base64。
+            # 在接收迴圈啟動前進行：舊版伺服器因不認得 HELLO 而斷線時不會被當成一般斷線回報。
+            try:
+                session.negotiate_features(timeout=HELLO_TIMEOUT)
+            except SessionError as e:
+                logger.warning("Server did not accept HELLO (%s); reconnecting with plain JSON frames", e)
+                session.close()
+                self._negotiate = False  # later reconnects go straight to plain JSON
+                session = self._open_session(connect_timeout)
+        session.start_recv_loop(on_event=lambda msg, un=self._username: on_event(msg, un) if on_event else None, on_disconnect=on_disconnect)
+
+    def _open_session(self, connect_timeout: float | None) -> Session:
         session = self._connector.connect(connect_timeout=connect_timeout)
         self._session = session
         self.settimeout(NORMAL_TIMEOUT)
@@ -28,7 +53,7 @@ class Client:
             session.set_trace_io(self._trace_io)
         except Exception:
             pass
-        self._session.start_recv_loop(on_event=lambda msg, un=self._username: on_event(msg, un) if on_event else None, on_disconnect=on_disconnect)
+        return session
     
     def is_connected(self) -> bool:
         return self._session is not None
@@ -99,12 +124,23 @@ class Client:
         else:
             return False, resp.error
         
-    def fetch_store(self, page: int, page_size: int) -> tuple[bool, tuple[list[tuple[str, str, int, int]], int] | str | None]:
+    def fetch_store(self, page: int, page_size: int, cursor: Optional[str] = None) -> tuple[bool, tuple[list[tuple[str, str, int, int]], int, str] | str | None]:
+        """`cursor` None pages by number; "" or a returned next_cursor pages by key. Result: (games, total_count, next_cursor)."""
         if self._session is None:
             raise RuntimeError("Client is not connected")
-        resp = game.fetch_store(self._session, page, page_size)
+        resp = game.fetch_store(self._session, page, page_size, cursor)
         if resp.ok:
             assert isinstance(resp.payload, game_payloads.FetchStoreResponsePayload)
+            return True, (resp.payload.games, resp.payload.total_count, resp.payload.next_cursor)
+        else:
+            return False, resp.error
+
+    def search_games(self, query: str, page: int, page_size: int) -> tuple[bool, tuple[list[tuple[str, str, int, int]], int] | str | None]:
+        if self._session is None:
+            raise RuntimeError("Client is not connected")
+        resp = game.search_games(self._session, query, page, page_size)
+        if resp.ok:
+            assert isinstance(resp.payload, game_payloads.SearchGamesResponsePayload)
             return True, (resp.payload.games, resp.payload.total_count)
         else:
             return False, resp.error
@@ -113,9 +149,28 @@ class Client:
         if self._session is None:
             raise RuntimeError("Client is not connected")
         resp = game.fetch_game_cover(self._session, game_name)
+        return self._cover_result(resp)
+
+    def fetch_game_cover_async(self, game_name: str) -> "Future[tuple[bool, bytes | str | None]]":
+        """Like fetch_game_cover, but returns immediately; many covers can be in flight at once."""
+        if self._session is None:
+            raise RuntimeError("Client is not connected")
+        result: Future[tuple[bool, bytes | str | None]] = Future()
+
+        def _done(f: "Future[Message]"):
+            try:
+                result.set_result(self._cover_result(f.result()))
+            except BaseException as e:
+                result.set_exception(e)
+        game.fetch_game_cover_async(self._session, game_name, timeout=NORMAL_TIMEOUT).add_done_callback(_done)
+        return result
+
+    @staticmethod
+    def _cover_result(resp: Message) -> tuple[bool, bytes | str | None]:
         if resp.ok:
             assert isinstance(resp.payload, game_payloads.FetchGameCoverResponsePayload)
-            return True, resp.payload.cover_data
+            # attachment/binary frames hand out a memoryview into the received frame
+            return True, bytes(resp.payload.cover_data)
         else:
             return False, resp.error
         
@@ -152,6 +207,7 @@ class Client:
         resp = room.create_room(self._session, game_name)
         if resp.ok:
             assert isinstance(resp.payload, room_payloads.CreateRoomResponsePayload)
+            self.skip_lobby_version(resp.payload.version)
             return True, resp.payload.room_id
         else:
             return False, resp.error
@@ -161,6 +217,9 @@ class Client:
             raise RuntimeError("Client is not connected")
         resp = room.leave_room(self._session)
         assert resp.ok is not None
+        if resp.ok:
+            assert isinstance(resp.payload, room_payloads.LeaveRoomResponsePayload)
+            self.skip_lobby_version(resp.payload.version)
         return resp.ok, resp.error
         
     def check_my_room(self) -> tuple[bool, tuple[bool, str, str, str, list[str], int, str] | str | None]:
@@ -179,6 +238,67 @@ class Client:
         resp = room.fetch_room_list(self._session)
         if resp.ok:
             assert isinstance(resp.payload, room_payloads.FetchRoomListResponsePayload)
+            with self._lobby_version_lock:
+                self._set_lobby_version_locked(resp.payload.version)
             return True, resp.payload.rooms
         else:
-            return False, resp.error
\ No newline at end of file
+            return False, resp.error
+
+    def fetch_room_changes(self) -> tuple[bool, tuple[int, bool, list[tuple[str, str, str, int, int, str]], list[str]] | str | None]:
+        """Rooms changed since the last known lobby version as (version, full, rooms, removed); full=True replaces the list.
+
+        The lobby version is not moved here: events may be applied while the response is on its way,
+        so whoever applies the result calls adopt_lobby_version(version) first.
+        """
+        if self._session is None:
+            raise RuntimeError("Client is not connected")
+        with self._lobby_version_lock:
+            since = self._lobby_version if self._lobby_version is not None else -1
+        resp = room.fetch_room_changes(self._session, since)
+        if resp.ok:
+            assert isinstance(resp.payload, room_payloads.FetchRoomChangesResponsePayload)
+            return True, (resp.payload.version, resp.payload.full, resp.payload.rooms, resp.payload.removed)
+        else:
+            return False, resp.error
+
+    def advance_lobby_version(self, version: int, coalesced_versions: Iterable[int] = ()) -> bool | None:
+        """Check a lobby event's version (plus the versions it replaced when it was coalesced) against the room list.
+
+        True：接續目前的版本，套用事件；False：已包含在先前抓取的列表中，忽略；
+        None：中間有事件遺漏（或尚未抓過列表），應以 fetch_room_changes() 補齊。
+        合併過的事件可能先帶來較新的版本（例如 {3, 5}），其間的 4 由隨後的事件補上，這不算遺漏。
+        """
+        with self._lobby_version_lock:
+            if self._lobby_version is None:
+                return None
+            new = {v for v in (version, *coalesced_versions) if v > self._lobby_version and v not in self._lobby_ahead}
+            if not new:
+                return False
+            if min(new) != self._lobby_version + 1:
+                return None
+            self._lobby_ahead.update(new)
+            self._set_lobby_version_locked(self._lobby_version)
+            return True
+
+    def adopt_lobby_version(self, version: int) -> bool:
+        """Move to a fetched lobby version; False if the events applied meanwhile already reached it (drop the result)."""
+        with self._lobby_version_lock:
+            if self._lobby_version is not None and version <= self._lobby_version:
+                return False
+            self._set_lobby_version_locked(version)
+            return True
+
+    def skip_lobby_version(self, version: int) -> None:
+        """Count a lobby change this client is not sent as applied: its own room's, reported by a response or MY_ROOM_UPDATED."""
+        with self._lobby_version_lock:
+            if self._lobby_version is None or version <= self._lobby_version:
+                return
+            self._lobby_ahead.add(version)
+            self._set_lobby_version_locked(self._lobby_version)
+
+    def _set_lobby_version_locked(self, version: int) -> None:
+        self._lobby_version = version
+        self._lobby_ahead = {v for v in self._lobby_ahead if v > version}
+        while self._lobby_version + 1 in self._lobby_ahead:
+            self._lobby_version += 1
+            self._lobby_ahead.discard(self._lobby_version)
\ No newline at end of file
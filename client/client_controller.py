@@ -1,17 +1,19 @@
 from .client import Client
 from customtkinter import CTk
-from typing import Callable, Optional
+from typing import Callable, Iterable, Optional
 import threading
 import logging
 from protocol.enums import Role
 from protocol.message import Message
+from session.event_queue import EventQueue
 
 logger = logging.getLogger(__name__)
 
 class ClientController:
-    def __init__(self, addr: tuple[str, int], gui: Optional[CTk] = None, trace_io: bool = False):
-        self._client = Client(addr, trace_io=trace_io)
+    def __init__(self, addr: tuple[str, int], gui: Optional[CTk] = None, trace_io: bool = False, negotiate: bool = True):
+        self._client = Client(addr, trace_io=trace_io, negotiate=negotiate)
         self._gui = gui
+        self._events = EventQueue()
 
     def set_gui(self, gui: CTk):
         """Bind the GUI instance after construction to resolve init ordering."""
@@ -37,9 +39,17 @@ class ClientController:
             g = self._gui
             safe_on_disconnect = lambda: g.after(0, on_disconnect)
 
+        # Events reach the GUI thread in batches; room updates that pile up in between are coalesced
+        safe_on_event = on_event
+        if self._gui and on_event:
+            g = self._gui
+            def safe_on_event(msg: Message, _username: str | None):
+                if self._events.put(msg):
+                    g.after(0, self._deliver_events, on_event)
+
         def _work():
             try:
-                self._client.connect(on_event=on_event, on_disconnect=safe_on_disconnect)
+                self._client.connect(on_event=safe_on_event, on_disconnect=safe_on_disconnect)
                 cb_ok = on_result
                 if cb_ok:
                     if self._gui:
@@ -50,6 +60,18 @@ class ClientController:
                 self._on_exception(e, on_error)
         threading.Thread(target=_work, daemon=True).start()
 
+    def _deliver_events(self, on_event: Callable[[Message, str | None], None]):
+        coalesced, cancelled = self._events.coalesced, self._events.cancelled
+        batch = self._events.drain()
+        if coalesced or cancelled:
+            logger.debug(f"Event delivery: batch={len(batch)}, coalesced so far={coalesced}, cancelled so far={cancelled}")
+        username = self._client.get_username()
+        for msg in batch:
+            try:
+                on_event(msg, username)
+            except Exception:
+                logger.exception("on_event callback raised")
+
     def login(self, username: str, password: str, role: str,
               on_result: Optional[Callable[[], None]] = None,
               on_error: Optional[Callable[[Exception], None]] = None):
@@ -130,24 +152,25 @@ class ClientController:
         
         threading.Thread(target=_work, daemon=True).start()
 
-    def fetch_store(self, page: int, page_size: int, 
-                    on_result: Optional[Callable[[list[tuple[str, str, int, int]], int], None]] = None, 
+    def fetch_store(self, cursor: str, page_size: int, 
+                    on_result: Optional[Callable[[list[tuple[str, str, int, int]], int, str], None]] = None, 
                     on_error: Optional[Callable[[Exception], None]] = None):
+        """Fetch one store page after `cursor` ("" for the first page); on_result gets (games, total_count, next_cursor)."""
         def _work():
             try:
-                success, result = self._client.fetch_store(page, page_size)
+                success, result = self._client.fetch_store(1, page_size, cursor)
                 if not success:
                     raise Exception(result or "Fetch Store failed")
                 
                 assert isinstance(result, tuple)
-                games, total_count = result
+                games, total_count, next_cursor = result
                 
                 cb_ok = on_result
                 if cb_ok:
                     if self._gui:
-                        self._gui.after(0, lambda: cb_ok(games, total_count))
+                        self._gui.after(0, lambda: cb_ok(games, total_count, next_cursor))
                     else:
-                        cb_ok(games, total_count)
+                        cb_ok(games, total_count, next_cursor)
             except Exception as e:
                 self._on_exception(e, on_error)
         threading.Thread(target=_work, daemon=True).start()
@@ -171,12 +194,35 @@ class ClientController:
                 self._on_exception(e, on_error)
         threading.Thread(target=_work, daemon=True).start()
 
+    def search_games(self, query: str, page: int, page_size: int, 
+                     on_result: Optional[Callable[[list[tuple[str, str, int, int]], int], None]] = None, 
+                     on_error: Optional[Callable[[Exception], None]] = None):
+        def _work():
+            try:
+                success, result = self._client.search_games(query, page, page_size)
+                if not success:
+                    raise Exception(result or "Search failed")
+                
+                assert isinstance(result, tuple)
+                games, total_count = result
+                
+                cb_ok = on_result
+                if cb_ok:
+                    if self._gui:
+                        self._gui.after(0, lambda: cb_ok(games, total_count))
+                    else:
+                        cb_ok(games, total_count)
+            except Exception as e:
+                self._on_exception(e, on_error)
+        threading.Thread(target=_work, daemon=True).start()
+
     def fetch_game_cover(self, game_name: str, 
                          on_result: Optional[Callable[[bytes], None]] = None, 
                          on_error: Optional[Callable[[Exception], None]] = None):
-        def _work():
+        # 封面可能一次要好幾張，改用 request future，不再為每張封面開一條執行緒
+        def _done(fut):
             try:
-                success, result = self._client.fetch_game_cover(game_name)
+                success, result = fut.result()
                 if not success:
                     # It's okay if cover is missing, just return empty bytes or handle gracefully
                     # But here we treat failure as error if protocol failed
@@ -191,7 +237,10 @@ class ClientController:
                         cb_ok(result)
             except Exception as e:
                 self._on_exception(e, on_error)
-        threading.Thread(target=_work, daemon=True).start()
+        try:
+            self._client.fetch_game_cover_async(game_name).add_done_callback(_done)
+        except Exception as e:
+            self._on_exception(e, on_error)
 
     def fetch_game_detail(self, game_name: str, 
                           on_result: Optional[Callable[[str, str, int, int, str], None]] = None, 
@@ -327,6 +376,36 @@ class ClientController:
                 self._on_exception(e, on_error)
         threading.Thread(target=_work, daemon=True).start()
 
+    def fetch_room_changes(self,
+                           on_result: Optional[Callable[[bool, list[tuple[str, str, str, int, int, str]], list[str]], None]] = None,
+                           on_error: Optional[Callable[[Exception], None]] = None):
+        def _work():
+            try:
+                success, result = self._client.fetch_room_changes()
+                if not success:
+                    raise Exception(result or "Fetch Room Changes failed")
+
+                assert isinstance(result, tuple)
+                version, full, rooms, removed = result
+
+                def _apply():
+                    # checked where events are applied, so a result older than them is dropped
+                    if self._client.adopt_lobby_version(version) and on_result:
+                        on_result(full, rooms, removed)
+                if self._gui:
+                    self._gui.after(0, _apply)
+                else:
+                    _apply()
+            except Exception as e:
+                self._on_exception(e, on_error)
+        threading.Thread(target=_work, daemon=True).start()
+
+    def advance_lobby_version(self, version: int, coalesced_versions: Iterable[int] = ()) -> bool | None:
+        return self._client.advance_lobby_version(version, coalesced_versions)
+
+    def skip_lobby_version(self, version: int) -> None:
+        self._client.skip_lobby_version(version)
+
     def logout(self, on_result: Optional[Callable[[], None]] = None,
                on_error: Optional[Callable[[Exception], None]] = None):
         def _work():
@@ -26,6 +26,7 @@ class ClientGUI:
 
         self.lobby_view = LobbyView(self._root, logout_callback=self.logout, 
                                     fetch_store_callback=self._client_controller.fetch_store,
+                                    search_games_callback=self._client_controller.search_games,
                                     fetch_cover_callback=self._client_controller.fetch_game_cover, 
                                     fetch_game_detail_callback=self._client_controller.fetch_game_detail, 
                                     download_callback=self._client_controller.download_game, 
@@ -104,6 +105,14 @@ class ClientGUI:
 
     def _on_event(self, event: Message, username: str | None):
         if self._state == ClientState.IN_LOBBY:
+            if event.action in (Action.ROOM_CREATED, Action.ROOM_REMOVED, Action.ROOM_UPDATED):
+                in_order = self._client_controller.advance_lobby_version(
+                    event.payload.version, getattr(event.payload, "coalesced_versions", ()))
+                if in_order is None:
+                    # missed lobby events: fetch only what changed since our version
+                    self._client_controller.fetch_room_changes(on_result=self.lobby_view.this_lobby_page.apply_room_changes)
+                if not in_order:
+                    return
             match event.action:
                 case Action.ROOM_CREATED:
                     created_payload: RoomCreatedEventPayload = event.payload
@@ -116,9 +125,12 @@ class ClientGUI:
                     updated_payload: RoomUpdatedEventPayload = event.payload
                     self.lobby_view.this_lobby_page.update_room(updated_payload.room_id, updated_payload.host_username, updated_payload.game_name, updated_payload.current_players, updated_payload.max_players, updated_payload.status)
                 case Action.MY_ROOM_UPDATED:
+                    my_room_updated_payload: MyRoomUpdatedEventPayload = event.payload
+                    # members are not sent the matching ROOM_UPDATED; a coalesced event also stands for the ones it replaced
+                    for version in (my_room_updated_payload.lobby_version, *my_room_updated_payload.coalesced_versions):
+                        self._client_controller.skip_lobby_version(version)
                     if not username:
                         return
-                    my_room_updated_payload: MyRoomUpdatedEventPayload = event.payload
                     self.lobby_view.my_room_page.set_room_players(my_room_updated_payload.players, my_room_updated_payload.host_username, username)
     def _auto_connect(self):
         # self.status_label.configure(text="Connecting...")
@@ -5,7 +5,8 @@ from ..slides.game_detail_slide import GameDetailSlide
 
 class StorePage(customtkinter.CTkFrame):
     def __init__(self, master, 
-                 fetch_store_callback: Optional[Callable[[int, int, Callable[[list[tuple[str, str, int, int]], int], None], Callable[[Exception], None]], None]] = None,
+                 fetch_store_callback: Optional[Callable[[str, int, Callable[[list[tuple[str, str, int, int]], int, str], None], Callable[[Exception], None]], None]] = None,
+                 search_games_callback: Optional[Callable[[str, int, int, Callable[[list[tuple[str, str, int, int]], int], None], Callable[[Exception], None]], None]] = None,
                  fetch_cover_callback: Optional[Callable[[str, Callable[[bytes], None], Callable[[Exception], None]], None]] = None, 
                  fetch_game_detail_callback: Optional[Callable[[str, Callable[[str, str, int, int, str], None], Callable[[Exception], None]], None]] = None, 
                  download_callback: Optional[Callable[[str, Callable[[], None], Callable[[Exception], None], Callable[[int, int], None]], None]] = None):
@@ -16,6 +17,7 @@ class StorePage(customtkinter.CTkFrame):
 
         self.game_list_slide = GameListSlide(self, 
                                              fetch_store_callback=fetch_store_callback, 
+                                             search_games_callback=search_games_callback, 
                                              fetch_cover_callback=fetch_cover_callback,
                                              on_game_click_callback=self.show_game_details)
         self.game_detail_slide = GameDetailSlide(self, 
@@ -34,4 +34,7 @@ class ThisLobbyPage(customtkinter.CTkFrame):
         self.rooms_slide.remove_room(room_id)
 
     def update_room(self, room_id: str, host: str, game_name: str, players: int, max_players: int, status: str):
-        self.rooms_slide.update_room(room_id, host, game_name, players, max_players, status)
\ No newline at end of file
+        self.rooms_slide.update_room(room_id, host, game_name, players, max_players, status)
+
+    def apply_room_changes(self, full: bool, rooms: list[tuple[str, str, str, int, int, str]], removed: list[str]):
+        self.rooms_slide.apply_room_changes(full, rooms, removed)
\ No newline at end of file
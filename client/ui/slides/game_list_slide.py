@@ -5,29 +5,46 @@ from ..components.game_block_container import GameBlockContainer
 
 class GameListSlide(customtkinter.CTkFrame):
     def __init__(self, master, 
-                 fetch_store_callback: Optional[Callable[[int, int, Callable[[list[tuple[str, str, int, int]], int], None], Callable[[Exception], None]], None]] = None,
+                 fetch_store_callback: Optional[Callable[[str, int, Callable[[list[tuple[str, str, int, int]], int, str], None], Callable[[Exception], None]], None]] = None,
+                 search_games_callback: Optional[Callable[[str, int, int, Callable[[list[tuple[str, str, int, int]], int], None], Callable[[Exception], None]], None]] = None,
                  fetch_cover_callback: Optional[Callable[[str, Callable[[bytes], None], Callable[[Exception], None]], None]] = None,
                  on_game_click_callback: Optional[Callable[[str, str, int, int], None]] = None):
         super().__init__(master, fg_color="transparent")
         
         self.fetch_store_callback = fetch_store_callback
+        self.search_games_callback = search_games_callback
         self.fetch_cover_callback = fetch_cover_callback
         self.on_game_click_callback = on_game_click_callback
         
-        self.page = 1
+        self.cursor = ""  # "" = first page; otherwise the next_cursor of the last loaded page
+        self.next_cursor = ""
+        self.search_query = ""  # non-empty: showing search results instead of the store
+        self.search_page = 1
+        self.has_more = False
         self.page_size = 20
         self.total_count = 0
         self.is_loading = False
 
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_rowconfigure(1, weight=0)
+        self.grid_rowconfigure(0, weight=0)
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=0)
         self.grid_columnconfigure(0, weight=1)
 
+        self.search_frame = customtkinter.CTkFrame(self, fg_color="transparent")
+        self.search_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 0))
+        self.search_entry = customtkinter.CTkEntry(self.search_frame, placeholder_text="Search games by name, developer or description")
+        self.search_entry.pack(side="left", fill="x", expand=True)
+        self.search_entry.bind("<Return>", lambda _: self.search())
+        self.clear_search_button = customtkinter.CTkButton(self.search_frame, text="Clear", width=60, command=self.clear_search)
+        self.clear_search_button.pack(side="right", padx=(5, 0))
+        self.search_button = customtkinter.CTkButton(self.search_frame, text="Search", width=80, command=self.search)
+        self.search_button.pack(side="right", padx=(5, 0))
+
         self.game_block_container = GameBlockContainer(self)
-        self.game_block_container.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        self.game_block_container.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
 
         self.controls_frame = customtkinter.CTkFrame(self, fg_color="transparent")
-        self.controls_frame.grid(row=1, column=0, sticky="ew", padx=10, pady=10)
+        self.controls_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=10)
         
         self.bind_scroll_events()
         
@@ -62,10 +79,22 @@ class GameListSlide(customtkinter.CTkFrame):
         self.is_loading = True
         self.load_more_button.configure(state="disabled", text="Loading...")
 
-        if self.fetch_store_callback:
-            self.fetch_store_callback(self.page, self.page_size, self.on_games_loaded, self.on_error)
+        if self.search_query:
+            if self.search_games_callback:
+                self.search_games_callback(self.search_query, self.search_page, self.page_size, self.on_search_loaded, self.on_error)
+        elif self.fetch_store_callback:
+            self.fetch_store_callback(self.cursor, self.page_size, self.on_games_loaded, self.on_error)
+
+    def on_games_loaded(self, games: list[tuple[str, str, int, int]], total_count: int, next_cursor: str):
+        self.next_cursor = next_cursor
+        self.has_more = bool(next_cursor)
+        self.show_games(games, total_count, first_page=not self.cursor)
+
+    def on_search_loaded(self, games: list[tuple[str, str, int, int]], total_count: int):
+        self.has_more = self.search_page * self.page_size < total_count
+        self.show_games(games, total_count, first_page=self.search_page == 1)
 
-    def on_games_loaded(self, games: list[tuple[str, str, int, int]], total_count: int):
+    def show_games(self, games: list[tuple[str, str, int, int]], total_count: int, first_page: bool):
         self.is_loading = False
         self.total_count = total_count
         
@@ -75,7 +104,7 @@ class GameListSlide(customtkinter.CTkFrame):
             for (game_name, version, min_players, max_players) in games
         ]
 
-        if self.page == 1:
+        if first_page:
             self.game_block_container.set_blocks(game_data)
         else:
             self.game_block_container.add_blocks(game_data)
@@ -104,18 +133,42 @@ class GameListSlide(customtkinter.CTkFrame):
         messagebox.showerror("Error", f"Failed to load games: {error}")
 
     def update_controls(self):
-        if self.page * self.page_size < self.total_count:
+        if self.has_more:
             self.load_more_button.configure(state="normal", text="Load More")
         else:
             self.load_more_button.configure(state="disabled", text="No More Games")
 
     def next_page(self):
-        if self.page * self.page_size >= self.total_count:
+        if not self.has_more:
             # print("All games loaded.")
             return
-        self.page += 1
+        if self.search_query:
+            self.search_page += 1
+        else:
+            self.cursor = self.next_cursor
+        self.load_games()
+
+    def search(self):
+        if self.is_loading:
+            return
+        query = self.search_entry.get().strip()
+        if not query:
+            self.clear_search()
+            return
+        # 一次搜尋請求取代一頁一頁翻完整個商店
+        self.search_query = query
+        self.search_page = 1
         self.load_games()
 
+    def clear_search(self):
+        if self.is_loading:
+            return
+        self.search_entry.delete(0, "end")
+        self.search_query = ""
+        self.reset()
+
     def reset(self):
-        self.page = 1
+        self.cursor = ""
+        self.next_cursor = ""
+        self.search_page = 1
         self.load_games()
\ No newline at end of file
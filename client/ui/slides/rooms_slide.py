@@ -31,4 +31,16 @@ class RoomsSlide(customtkinter.CTkFrame):
         self.room_list_container.remove_room_row(room_id)
 
     def update_room(self, room_id: str, host: str, game_name: str, players: int, max_players: int, status: str):
-        self.room_list_container.update_room_row(room_id, host, game_name, players, max_players, status)
\ No newline at end of file
+        self.room_list_container.update_room_row(room_id, host, game_name, players, max_players, status)
+
+    def apply_room_changes(self, full: bool, rooms: list[tuple[str, str, str, int, int, str]], removed: list[str]):
+        if full:
+            self.room_list_container.set_room_rows(rooms)
+            return
+        for room in rooms:
+            if self.room_list_container.get_room_row(room[0]):
+                self.room_list_container.update_room_row(*room)
+            else:
+                self.room_list_container.add_room_row(*room)
+        for room_id in removed:
+            self.room_list_container.remove_room_row(room_id)
\ No newline at end of file
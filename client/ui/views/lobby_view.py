@@ -11,7 +11,8 @@ from tkinter import messagebox
 
 class LobbyView(ctk.CTkFrame):
     def __init__(self, master, logout_callback: Optional[Callable[[], None]] = None, 
-                 fetch_store_callback: Optional[Callable[[int, int, Callable[[list[tuple[str, str, int, int]], int], None], Callable[[Exception], None]], None]] = None,
+                 fetch_store_callback: Optional[Callable[[str, int, Callable[[list[tuple[str, str, int, int]], int, str], None], Callable[[Exception], None]], None]] = None,
+                 search_games_callback: Optional[Callable[[str, int, int, Callable[[list[tuple[str, str, int, int]], int], None], Callable[[Exception], None]], None]] = None,
                  fetch_cover_callback: Optional[Callable[[str, Callable[[bytes], None], Callable[[Exception], None]], None]] = None, 
                  fetch_game_detail_callback: Optional[Callable[[str, Callable[[str, str, int, int, str], None], Callable[[Exception], None]], None]] = None, 
                  download_callback: Optional[Callable[[str, Callable[[], None], Callable[[Exception], None], Callable[[int, int], None]], None]] = None, 
@@ -22,7 +23,7 @@ class LobbyView(ctk.CTkFrame):
                  library_manager: Optional[LibraryManager] = None):
         super().__init__(master)
         self._create_room_callback = create_room_callback
-        self.store_page = StorePage(self, fetch_store_callback=fetch_store_callback, fetch_cover_callback=fetch_cover_callback, 
+        self.store_page = StorePage(self, fetch_store_callback=fetch_store_callback, search_games_callback=search_games_callback, fetch_cover_callback=fetch_cover_callback, 
                                     fetch_game_detail_callback=fetch_game_detail_callback, download_callback=download_callback)
         self.my_game_page = MyGamePage(self, library_manager=library_manager, fetch_game_detail_callback=fetch_game_detail_callback, 
                                        download_callback=download_callback, on_create_room_click=self._on_create_room_click)
@@ -0,0 +1,230 @@
+"""Compact binary codec, negotiated per connection with Feature.BINARY.
+
+Frame body layout (all integers network byte order):
+
+    marker(0x02) | type code | action code | flags | msg_id len (H) | error len (H) | fields len (I)
+    | msg_id | error | fields | one !I length per bytes field | raw bytes fields ...
+
+- type/action 以整數代碼傳送（見 TYPE_CODES / ACTION_CODES，代碼一經發布不可更改）。
+- msg_id 若為 UUID 字串則以 16 bytes 傳送。
+- payload 依 dataclass 欄位順序編成「無欄位名稱」的 JSON 陣列（bytes 欄位位置填 null），
+  bytes 欄位本身以原始位元組接在最後，不做 base64。
+"""
+import json
+import struct
+import uuid
+from dataclasses import is_dataclass
+from .message import Message, LazyMessage
+from .enums import MessageType, Action
+from .errors import SchemaError
+from .json_codec import payload_codec, decoder_for
+
+BINARY_FRAME_MARKER = 0x02
+
+TYPE_CODES = {
+    MessageType.REQUEST: 1,
+    MessageType.RESPONSE: 2,
+    MessageType.EVENT: 3,
+}
+
+ACTION_CODES = {
+    Action.HELLO: 1,
+    Action.LOGIN: 2,
+    Action.REGISTER: 3,
+    Action.LOGOUT: 4,
+    Action.UPLOAD_GAME_INIT: 10,
+    Action.UPLOAD_GAME_CHUNK: 11,
+    Action.UPLOAD_GAME_FINISH: 12,
+    Action.DOWNLOAD_GAME_INIT: 13,
+    Action.DOWNLOAD_GAME_CHUNK: 14,
+    Action.DOWNLOAD_GAME_FINISH: 15,
+    Action.FETCH_MY_WORKS: 16,
+    Action.FETCH_STORE: 17,
+    Action.FETCH_GAME_COVER: 18,
+    Action.FETCH_GAME_DETAIL: 19,
+    Action.SEARCH_GAMES: 20,
+    Action.CREATE_ROOM: 30,
+    Action.LEAVE_ROOM: 31,
+    Action.CHECK_MY_ROOM: 32,
+    Action.FETCH_ROOM_LIST: 33,
+    Action.FETCH_ROOM_CHANGES: 34,
+    Action.ROOM_CREATED: 40,
+    Action.ROOM_REMOVED: 41,
+    Action.ROOM_UPDATED: 42,
+    Action.MY_ROOM_UPDATED: 43,
+    Action.ROOM_PLAYER_JOINED: 44,
+    Action.ROOM_PLAYER_LEFT: 45,
+}
+
+_TYPES_BY_CODE = {code: t for t, code in TYPE_CODES.items()}
+_ACTIONS_BY_CODE = {code: a for a, code in ACTION_CODES.items()}
+
+_HEADER = struct.Struct('!BBBBHHI')
+_LENGTH = struct.Struct('!I')
+
+_FLAG_MSG_ID = 0x01
+_FLAG_MSG_ID_UUID = 0x02
+_FLAG_OK_SET = 0x04
+_FLAG_OK = 0x08
+
+
+def is_binary_frame(data: bytes | bytearray | memoryview) -> bool:
+    return len(data) > 0 and data[0] == BINARY_FRAME_MARKER
+
+
+def encode(message: Message) -> bytes:
+    """Encode a Message object to one binary frame body."""
+    return b"".join(encode_parts(message))
+
+
+def encode_parts(message: Message) -> list[bytes | bytearray | memoryview]:
+    """Encode a Message into header buffer + raw bytes-field buffers (sent without joining)."""
+    try:
+        type_code = TYPE_CODES[message.type]
+        action_code = ACTION_CODES[message.action]
+    except KeyError as e:
+        raise SchemaError(f"No binary code for {e.args[0]}") from e
+    payload = message.payload
+    if not is_dataclass(payload) or isinstance(payload, type):
+        raise SchemaError(f"Binary codec needs a dataclass payload, got {type(payload).__name__}")
+    codec = payload_codec(type(payload))
+
+    flags = 0
+    msg_id = b""
+    if message.msg_id:
+        flags |= _FLAG_MSG_ID
+        msg_id = _pack_msg_id(message.msg_id)
+        if len(msg_id) == 16:
+            flags |= _FLAG_MSG_ID_UUID
+    if message.ok is not None:
+        flags |= _FLAG_OK_SET | (_FLAG_OK if message.ok else 0)
+    error = message.error.encode("utf-8") if message.error else b""
+
+    values = [getattr(payload, name) for name in codec.field_names]
+    blobs = []
+    for i, name in enumerate(codec.field_names):
+        if name in codec.bytes_fields:
+            blobs.append(values[i] if values[i] is not None else b"")
+            values[i] = None
+    fields = json.dumps(values, separators=(",", ":")).encode("utf-8") if values else b""
+
+    head = bytearray(_HEADER.pack(BINARY_FRAME_MARKER, type_code, action_code, flags, len(msg_id), len(error), len(fields)))
+    head += msg_id
+    head += error
+    head += fields
+    for blob in blobs:
+        head += _LENGTH.pack(len(blob))
+    return [head, *blobs]
+
+
+def decode(data: bytes | bytearray | memoryview) -> LazyMessage:
+    """Decode one binary frame body; bytes fields are read-only memoryviews into `data`.
+
+    只解析固定 header、msg_id 與 error；欄位陣列到第一次存取 `.payload` 才解析。
+    """
+    view = memoryview(data).cast('B')
+    try:
+        msg_type, action, flags, msg_id, error, fields_start, fields_len = _parse_header(view)
+        offset = fields_start + fields_len
+        codec = decoder_for(msg_type, action)
+        sizes = []
+        for _ in codec.bytes_fields:
+            (size,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            sizes.append(size)
+    except (struct.error, ValueError, KeyError) as e:
+        raise SchemaError(f"Malformed binary frame: {e}") from e
+    blobs_start = offset
+    offset += sum(sizes)
+    if offset != len(view):
+        raise SchemaError(f"Binary frame length mismatch: expected {offset} bytes, got {len(view)}")
+
+    def load_payload():
+        try:
+            values = _parse_fields(view, fields_start, fields_len)
+        except ValueError as e:
+            raise SchemaError(f"Malformed binary frame: {e}") from e
+        if len(values) != len(codec.field_names):
+            raise SchemaError(f"Invalid payload schema for action {action}: expected {len(codec.field_names)} fields, got {len(values)}")
+        payload_dict = dict(zip(codec.field_names, values))
+        pos = blobs_start
+        for name, size in zip(codec.bytes_fields, sizes):
+            payload_dict[name] = view[pos:pos + size].toreadonly()
+            pos += size
+        try:
+            return codec.from_obj(payload_dict)
+        except (TypeError, ValueError) as e:
+            raise SchemaError(f"Invalid payload schema for action {action}: {e}") from e
+
+    return LazyMessage(
+        type=msg_type,
+        action=action,
+        load_payload=load_payload,
+        msg_id=msg_id,
+        ok=bool(flags & _FLAG_OK) if flags & _FLAG_OK_SET else None,
+        error=error,
+    )
+
+
+def describe(data: bytes | bytearray | memoryview) -> str:
+    """JSON-like rendering of a binary frame for tracing; bytes fields are shown as their length.
+
+    只需要 header 部分（encode_parts 的第一個 buffer）即可。
+    """
+    view = memoryview(data).cast('B')
+    try:
+        msg_type, action, flags, msg_id, error, fields_start, fields_len = _parse_header(view)
+        codec = decoder_for(msg_type, action)
+        payload = dict(zip(codec.field_names, _parse_fields(view, fields_start, fields_len)))
+        offset = fields_start + fields_len
+        for name in codec.bytes_fields:
+            (size,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            payload[name] = f"<{size} bytes>"
+    except (struct.error, ValueError, KeyError) as e:
+        return f"<malformed binary frame: {e}>"
+    obj = {"type": msg_type.value, "action": action.value, "payload": payload}
+    if msg_id:
+        obj["msg_id"] = msg_id
+    if flags & _FLAG_OK_SET:
+        obj["ok"] = bool(flags & _FLAG_OK)
+    if error:
+        obj["error"] = error
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _pack_msg_id(msg_id: str) -> bytes:
+    try:
+        u = uuid.UUID(msg_id)
+        if str(u) == msg_id:
+            return u.bytes
+    except ValueError:
+        pass
+    return msg_id.encode("utf-8")
+
+
+def _parse_header(view: memoryview) -> tuple[MessageType, Action, int, str | None, str | None, int, int]:
+    """Fixed header + msg_id + error; returns where the payload field array starts and its length."""
+    marker, type_code, action_code, flags, id_len, error_len, fields_len = _HEADER.unpack_from(view)
+    if marker != BINARY_FRAME_MARKER:
+        raise ValueError(f"unexpected marker {marker:#x}")
+    msg_type = _TYPES_BY_CODE[type_code]
+    action = _ACTIONS_BY_CODE[action_code]
+    offset = _HEADER.size
+
+    msg_id = None
+    if flags & _FLAG_MSG_ID:
+        raw = view[offset:offset + id_len]
+        msg_id = str(uuid.UUID(bytes=bytes(raw))) if flags & _FLAG_MSG_ID_UUID else str(raw, "utf-8")
+    offset += id_len
+
+    error = str(view[offset:offset + error_len], "utf-8") if error_len else None
+    offset += error_len
+    return msg_type, action, flags, msg_id, error, offset, fields_len
+
+
+def _parse_fields(view: memoryview, start: int, length: int) -> list:
+    values = json.loads(str(view[start:start + length], "utf-8")) if length else []
+    if not isinstance(values, list):
+        raise ValueError("payload fields are not an array")
+    return values
@@ -0,0 +1,40 @@
+"""Frame codec selection: picks json_codec or binary_codec from the features negotiated on a session.
+
+解碼依 frame 第一個位元組自動判斷格式（'{' 為舊版 JSON、0x01 為 attachment frame、0x02 為 binary frame），
+因此協商完成前後收到的 frame 都能正確解析。
+"""
+from .message import Message
+from .enums import Feature
+from . import json_codec, binary_codec
+
+_BINARY = Feature.BINARY.value
+_ATTACHMENTS = Feature.ATTACHMENTS.value
+
+
+def encode_parts(message: Message, features: frozenset[str] = frozenset()) -> list[bytes | bytearray | memoryview]:
+    """Encode a message into frame-body buffers using the best negotiated format."""
+    if _BINARY in features:
+        return binary_codec.encode_parts(message)
+    return json_codec.encode_parts(message, attachments=_ATTACHMENTS in features)
+
+
+def wire_format(features: frozenset[str] = frozenset()) -> str:
+    """Name of the format encode_parts picks for `features`; same format means byte-identical frames."""
+    if _BINARY in features:
+        return _BINARY
+    if _ATTACHMENTS in features:
+        return _ATTACHMENTS
+    return "json"
+
+
+def decode(data: bytes | bytearray | memoryview) -> Message:
+    if binary_codec.is_binary_frame(data):
+        return binary_codec.decode(data)
+    return json_codec.decode(data)
+
+
+def describe(data: bytes | bytearray | memoryview) -> str:
+    """Readable text of a frame body (or the first buffer from encode_parts) for tracing."""
+    if binary_codec.is_binary_frame(data):
+        return binary_codec.describe(data)
+    return json_codec.describe(data)
@@ -6,6 +6,7 @@ class MessageType(Enum):
     EVENT = 'event'
 
 class Action(Enum):
+    HELLO = 'session.hello'
     LOGIN = 'auth.login'
     REGISTER = 'auth.register'
     LOGOUT = 'auth.logout'
@@ -19,10 +20,12 @@ class Action(Enum):
     FETCH_STORE = 'game.fetch_store'
     FETCH_GAME_COVER = 'game.fetch_cover'
     FETCH_GAME_DETAIL = 'game.fetch_detail'
+    SEARCH_GAMES = 'game.search'
     CREATE_ROOM = 'room.create'
     LEAVE_ROOM = 'room.leave'
     CHECK_MY_ROOM = 'room.check_my_room'
     FETCH_ROOM_LIST = 'room.fetch_list'
+    FETCH_ROOM_CHANGES = 'room.fetch_changes'
     # used in events
     ROOM_CREATED = 'room.created'
     ROOM_REMOVED = 'room.removed'
@@ -38,4 +41,9 @@ class RoomStatus(Enum):
 
 class Role(Enum):
     PLAYER = 'player'
-    DEVELOPER = 'developer'
\ No newline at end of file
+    DEVELOPER = 'developer'
+
+class Feature(Enum):
+    """Optional protocol capabilities negotiated with Action.HELLO."""
+    ATTACHMENTS = 'attachments'  # bytes fields travel as raw attachments after a JSON header
+    BINARY = 'binary'  # frames use protocol.binary_codec instead of JSON
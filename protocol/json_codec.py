@@ -1,8 +1,10 @@
 import json
 import base64
+import struct
 import typing
-from dataclasses import is_dataclass, asdict
-from .message import Message
+import threading
+from dataclasses import fields, is_dataclass
+from .message import Message, LazyMessage
 from .enums import MessageType, Action
 from .errors import SchemaError
 from .payloads.auth import Credential
@@ -21,8 +23,10 @@ from .payloads.game import *
 from .payloads.room import *
 
 from .payloads.events import *
+from .payloads.session import HelloPayload
 
 _PAYLOAD_MAP = {
+    Action.HELLO: HelloPayload,
     Action.LOGIN: Credential, 
     Action.REGISTER: Credential, 
     Action.LOGOUT: EmptyPayload,
@@ -33,6 +37,7 @@ _PAYLOAD_MAP = {
     Action.FETCH_STORE: FetchStorePayload,
     Action.FETCH_GAME_COVER: FetchGameCoverPayload,
     Action.FETCH_GAME_DETAIL: FetchGameDetailPayload,
+    Action.SEARCH_GAMES: SearchGamesPayload,
     Action.DOWNLOAD_GAME_INIT: DownloadGameInitPayload,
     Action.DOWNLOAD_GAME_CHUNK: DownloadGameChunkPayload,
     Action.DOWNLOAD_GAME_FINISH: DownloadGameFinishPayload,
@@ -40,6 +45,7 @@ _PAYLOAD_MAP = {
     Action.LEAVE_ROOM: EmptyPayload,
     Action.CHECK_MY_ROOM: EmptyPayload,
     Action.FETCH_ROOM_LIST: EmptyPayload,
+    Action.FETCH_ROOM_CHANGES: FetchRoomChangesPayload,
     Action.ROOM_CREATED: RoomCreatedEventPayload, 
     Action.ROOM_REMOVED: RoomRemovedEventPayload,
     Action.ROOM_UPDATED: RoomUpdatedEventPayload,
@@ -53,26 +59,121 @@ _RESPONSE_PAYLOAD_MAP = {
     Action.FETCH_STORE: FetchStoreResponsePayload,
     Action.FETCH_GAME_COVER: FetchGameCoverResponsePayload,
     Action.FETCH_GAME_DETAIL: FetchGameDetailResponsePayload,
+    Action.SEARCH_GAMES: SearchGamesResponsePayload,
     Action.DOWNLOAD_GAME_INIT: DownloadGameInitResponsePayload,
     Action.DOWNLOAD_GAME_CHUNK: DownloadGameChunkResponsePayload,
     Action.CREATE_ROOM: CreateRoomResponsePayload,
+    Action.LEAVE_ROOM: LeaveRoomResponsePayload,
     Action.CHECK_MY_ROOM: CheckMyRoomResponsePayload,
     Action.FETCH_ROOM_LIST: FetchRoomListResponsePayload,
+    Action.FETCH_ROOM_CHANGES: FetchRoomChangesResponsePayload,
 }
 
-def encode(message: Message) -> bytes:
-    """Encode a Message object to JSON bytes."""
+
+class PayloadCodec:
+    """Encoder/decoder specialized for one payload dataclass.
+
+    欄位名稱、bytes 欄位、list[tuple] 欄位與建構子在建立時就決定好，
+    編解碼時不再呼叫 get_type_hints，也不像 dataclasses.asdict 會深拷貝（1 MB 的 chunk 或房間列表）。
+    """
+    __slots__ = ("payload_cls", "field_names", "bytes_fields", "tuple_list_fields", "_zero_values")
+
+    def __init__(self, payload_cls: type):
+        self.payload_cls = payload_cls
+        hints = typing.get_type_hints(payload_cls)
+        self.field_names = tuple(f.name for f in fields(payload_cls))
+        self.bytes_fields = tuple(n for n in self.field_names if hints.get(n) is bytes)
+        self.tuple_list_fields = tuple(n for n in self.field_names if _is_tuple_list(hints.get(n)))
+        self._zero_values = tuple(_zero_value(hints.get(n)) for n in self.field_names)
+
+    def placeholder(self):
+        """Instance with every field zeroed ("", 0, b"", [] ...), for error responses built without a request payload."""
+        return self.payload_cls(*(v() if callable(v) else v for v in self._zero_values))
+
+    def to_obj(self, payload) -> dict:
+        """Shallow field dict; bytes values are left for the caller (base64 or attachment)."""
+        return {name: getattr(payload, name) for name in self.field_names}
+
+    def from_obj(self, payload_dict: dict, blobs: list[memoryview] | None = None):
+        if not self.field_names:
+            return self.payload_cls()
+        for name in self.bytes_fields:
+            val = payload_dict.get(name)
+            if isinstance(val, str):
+                payload_dict[name] = base64.b64decode(val)
+            elif isinstance(val, dict) and blobs is not None and _ATTACHMENT_REF in val:
+                payload_dict[name] = blobs[val[_ATTACHMENT_REF]]
+        for name in self.tuple_list_fields:
+            val = payload_dict.get(name)
+            if val:
+                payload_dict[name] = [tuple(row) for row in val]
+        return self.payload_cls(**payload_dict)
+
+
+def _is_tuple_list(hint) -> bool:
+    if typing.get_origin(hint) is not list:
+        return False
+    args = typing.get_args(hint)
+    return bool(args) and typing.get_origin(args[0]) is tuple
+
+
+def _zero_value(hint):
+    origin = typing.get_origin(hint) or hint
+    if origin in (list, dict, set):
+        return origin  # called per placeholder so instances never share a mutable default
+    return {str: "", int: 0, float: 0.0, bool: False, bytes: b""}.get(origin)
+
+
+_CODECS: dict[type, PayloadCodec] = {}
+_CODECS_LOCK = threading.Lock()
+
+
+def payload_codec(payload_cls: type) -> PayloadCodec:
+    """Return the cached PayloadCodec for a payload dataclass, building it on first use."""
+    codec = _CODECS.get(payload_cls)
+    if codec is None:
+        with _CODECS_LOCK:
+            codec = _CODECS.get(payload_cls)
+            if codec is None:
+                codec = PayloadCodec(payload_cls)
+                _CODECS[payload_cls] = codec
+    return codec
+
+
+# Every payload the protocol knows is compiled at import; decode looks codecs up by action directly.
+_DECODERS = {action: payload_codec(cls) for action, cls in _PAYLOAD_MAP.items()}
+_RESPONSE_DECODERS = {action: payload_codec(cls) for action, cls in _RESPONSE_PAYLOAD_MAP.items()}
+_EMPTY_CODEC = payload_codec(EmptyPayload)
+
+
+def decoder_for(msg_type: MessageType, action: Action) -> PayloadCodec:
+    """PayloadCodec used to decode the payload of a `msg_type` message for `action`."""
+    codec = None
+    if msg_type == MessageType.RESPONSE:
+        codec = _RESPONSE_DECODERS.get(action)
+    if codec is None:
+        codec = _DECODERS.get(action, _EMPTY_CODEC)
+    return codec
+
+
+def response_placeholder(action: Action):
+    """Zero-valued payload of the type a client decodes for a response to `action`."""
+    return decoder_for(MessageType.RESPONSE, action).placeholder()
+
+
+ATTACHMENT_FRAME_MARKER = 0x01  # first byte of an attachment frame; legacy JSON frames start with '{'
+_ATTACHMENT_REF = "$att"
+_HEADER_PREFIX = struct.Struct('!BI')  # marker, header length
+
+
+def _message_to_obj(message: Message, codec: PayloadCodec | None) -> dict:
     # Serialize enums to their value and dataclass payloads to dicts.
     msg_type_str = message.type.value if isinstance(message.type, MessageType) else message.type
     action_str = (
         message.action.value if (message.action is not None and isinstance(message.action, Action)) else message.action
     )
 
-    # Only serialize dataclass instances (not dataclass classes)
-    if is_dataclass(message.payload) and not isinstance(message.payload, type):
-        payload_obj = asdict(message.payload)
-    else:
-        payload_obj = message.payload
+    payload_obj = codec.to_obj(message.payload) if codec is not None else message.payload
 
     obj = {
         "type": msg_type_str,
@@ -86,49 +187,114 @@ def encode(message: Message) -> bytes:
         obj["ok"] = message.ok
     if message.error:
         obj["error"] = message.error
+    return obj
+
+
+def _json_default(o):
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        return base64.b64encode(o).decode('ascii')
+    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
+
+
+def _codec_for(payload) -> PayloadCodec | None:
+    # Only serialize dataclass instances (not dataclass classes)
+    payload_cls = type(payload)
+    codec = _CODECS.get(payload_cls)
+    if codec is None and is_dataclass(payload) and not isinstance(payload, type):
+        codec = payload_codec(payload_cls)
+    return codec
+
+
+def encode(message: Message) -> bytes:
+    """Encode a Message object to JSON bytes."""
+    obj = _message_to_obj(message, _codec_for(message.payload))
+    return json.dumps(obj, default=_json_default).encode("utf-8")
 
-    def json_default(o):
-        if isinstance(o, bytes):
-            return base64.b64encode(o).decode('ascii')
-        raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
 
-    return json.dumps(obj, default=json_default).encode("utf-8")
+def encode_parts(message: Message, *, attachments: bool = False) -> list[bytes | bytearray | memoryview]:
+    """Encode a Message into the buffers of one frame body.
 
+    attachments=False 時等同 [encode(message)]。
+    attachments=True 時輸出 attachment frame：marker + header 長度 + JSON header，之後接原始 bytes；
+    payload 中的 bytes 欄位在 header 內以 {"$att": index} 參照，不做 base64，也不合併成單一 buffer。
+    只能送給已透過 Feature.ATTACHMENTS 協商過的對端。
+    """
+    if not attachments:
+        return [encode(message)]
+    codec = _codec_for(message.payload)
+    obj = _message_to_obj(message, codec)
+    blobs: list[bytes | bytearray | memoryview] = []
+    if codec is not None:
+        payload_obj = obj["payload"]
+        for name in codec.bytes_fields:
+            val = payload_obj[name]
+            if isinstance(val, (bytes, bytearray, memoryview)):
+                payload_obj[name] = {_ATTACHMENT_REF: len(blobs)}
+                blobs.append(val)
+    obj["attachments"] = [len(b) for b in blobs]
+    header = json.dumps(obj, default=_json_default).encode("utf-8")
+    return [_HEADER_PREFIX.pack(ATTACHMENT_FRAME_MARKER, len(header)) + header, *blobs]
 
-def decode(data: bytes) -> Message:
-    """Decode JSON bytes to a Message object."""
-    obj = json.loads(data.decode("utf-8"))
-    msg_type = MessageType(obj["type"])
-    action = Action(obj["action"])
-    
-    if msg_type == MessageType.RESPONSE and action in _RESPONSE_PAYLOAD_MAP:
-        payload_cls = _RESPONSE_PAYLOAD_MAP[action]
-    else:
-        payload_cls = _PAYLOAD_MAP.get(action, EmptyPayload)
 
+def is_attachment_frame(data: bytes | bytearray | memoryview) -> bool:
+    return len(data) > 0 and data[0] == ATTACHMENT_FRAME_MARKER
+
+
+def decode(data: bytes | bytearray | memoryview) -> LazyMessage:
+    """Decode one frame body (legacy JSON or attachment frame) to a Message object.
+
+    envelope 欄位立即解析；payload dataclass（含 base64 解碼）延後到第一次存取 `.payload` 才建立。
+
+    attachment frame 的 bytes 欄位會是指向 `data` 的唯讀 memoryview，不另外複製；
+    呼叫端不可在 payload 使用完之前重複利用 `data` 的緩衝區。
+    """
+    if is_attachment_frame(data):
+        view = memoryview(data).cast('B')
+        try:
+            _, header_len = _HEADER_PREFIX.unpack_from(view)
+            offset = _HEADER_PREFIX.size + header_len
+            obj = json.loads(str(view[_HEADER_PREFIX.size:offset], "utf-8"))
+            blobs = []
+            for size in obj.get("attachments", []):
+                blobs.append(view[offset:offset + size].toreadonly())
+                offset += size
+        except (struct.error, ValueError, TypeError) as e:
+            raise SchemaError(f"Malformed attachment frame: {e}") from e
+        if offset != len(view):
+            raise SchemaError(f"Attachment frame length mismatch: expected {offset} bytes, got {len(view)}")
+        return _obj_to_message(obj, blobs)
+    obj = json.loads(str(data, "utf-8"))
+    return _obj_to_message(obj, None)
+
+
+def _obj_to_message(obj: dict, blobs: list[memoryview] | None) -> LazyMessage:
     try:
-        # Handle EmptyPayload special case (it has no fields)
-        if payload_cls is EmptyPayload:
-            payload = EmptyPayload()
-        else:
-            payload_dict = obj["payload"]
-            # Convert base64 strings back to bytes based on type hints
-            type_hints = typing.get_type_hints(payload_cls)
-            for field_name, field_type in type_hints.items():
-                if field_type == bytes and field_name in payload_dict:
-                    val = payload_dict[field_name]
-                    if isinstance(val, str):
-                        payload_dict[field_name] = base64.b64decode(val)
-            
-            payload = payload_cls(**payload_dict)
-    except TypeError as e:
-        raise SchemaError(f"Invalid payload schema for action {action}: {e}") from e
-    
-    return Message(
+        msg_type = MessageType(obj["type"])
+        action = Action(obj["action"])
+    except (KeyError, ValueError) as e:
+        raise SchemaError(f"Invalid message envelope: {e}") from e
+    codec = decoder_for(msg_type, action)
+
+    def load_payload():
+        try:
+            return codec.from_obj(obj["payload"], blobs)
+        except (KeyError, TypeError, IndexError, AttributeError, ValueError) as e:
+            raise SchemaError(f"Invalid payload schema for action {action}: {e}") from e
+
+    return LazyMessage(
         type=msg_type,
         action=action,
-        payload=payload,
+        load_payload=load_payload,
         msg_id=obj.get("msg_id"),
         ok=obj.get("ok"),
         error=obj.get("error"),
-    )
\ No newline at end of file
+    )
+
+
+def describe(data: bytes | bytearray | memoryview) -> str:
+    """Human-readable form of a frame body (or of the first buffer from encode_parts) for tracing."""
+    if is_attachment_frame(data):
+        view = memoryview(data).cast('B')
+        _, header_len = _HEADER_PREFIX.unpack_from(view)
+        return str(view[_HEADER_PREFIX.size:_HEADER_PREFIX.size + header_len], "utf-8")
+    return str(data, "utf-8")
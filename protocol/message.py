@@ -2,7 +2,7 @@ import json
 import uuid
 from dataclasses import dataclass, asdict
 from .enums import MessageType, Action
-from typing import Optional
+from typing import Any, Callable, Optional
 
 class Message:
     def __init__(self, *, type: MessageType, payload, action: Action, msg_id: Optional[str]=None, ok: Optional[bool]=None, error: Optional[str]=None):
@@ -65,4 +65,34 @@ class Message:
     #     if self.ok is not None:
     #         obj["ok"] = self.ok
 
-    #     return json.dumps(obj).encode("utf-8")
\ No newline at end of file
+    #     return json.dumps(obj).encode("utf-8")
+
+
+class LazyMessage(Message):
+    """Message decoded header-first: type/action/msg_id/ok/error are set up front,
+    the payload dataclass is only built on the first `.payload` access.
+
+    路由（response 對應 msg_id、事件丟棄、未登入拒絕）只看 header，不會為了沒人讀的 payload 付出解碼成本。
+    payload 格式錯誤時，SchemaError 會在第一次存取 `.payload` 時拋出。
+    """
+    def __init__(self, *, type: MessageType, action: Action, load_payload: Callable[[], Any],
+                 msg_id: Optional[str]=None, ok: Optional[bool]=None, error: Optional[str]=None):
+        super().__init__(type=type, action=action, payload=None, msg_id=msg_id, ok=ok, error=error)
+        self._load_payload: Optional[Callable[[], Any]] = load_payload
+
+    @property
+    def payload(self):
+        load = self._load_payload
+        if load is not None:
+            self._payload = load()
+            self._load_payload = None
+        return self._payload
+
+    @payload.setter
+    def payload(self, value):
+        self._load_payload = None
+        self._payload = value
+
+    @property
+    def payload_loaded(self) -> bool:
+        return self._load_payload is None
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class RoomCreatedEventPayload:
@@ -8,10 +8,13 @@ class RoomCreatedEventPayload:
     current_players: int
     max_players: int
     status: str
+    version: int = 0  # lobby version after this change; a skipped number means events were missed
 
 @dataclass
 class RoomRemovedEventPayload:
     room_id: str
+    version: int = 0
+    coalesced_versions: list[int] = field(default_factory=list)  # older lobby versions this event replaced in a queue
 
 @dataclass
 class RoomUpdatedEventPayload:
@@ -21,6 +24,8 @@ class RoomUpdatedEventPayload:
     current_players: int
     max_players: int
     status: str
+    version: int = 0
+    coalesced_versions: list[int] = field(default_factory=list)
 
 @dataclass
 class MyRoomUpdatedEventPayload:
@@ -28,4 +33,6 @@ class MyRoomUpdatedEventPayload:
     game_name: str
     players: list[str]
     max_players: int
-    status: str
\ No newline at end of file
+    status: str
+    lobby_version: int = 0  # version of the matching ROOM_UPDATED, which room members are not sent
+    coalesced_versions: list[int] = field(default_factory=list)  # lobby_version of the older MY_ROOM_UPDATED this one replaced
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class UploadGameInitPayload:
@@ -32,11 +33,24 @@ class FetchMyWorksResponsePayload:
 class FetchStorePayload:
     page: int
     page_size: int
+    cursor: Optional[str] = None # None: page by number; "" or a next_cursor: keyset page (page is ignored)
 
 @dataclass
 class FetchStoreResponsePayload:
     games: list[tuple[str, str, int, int]] # (game_name, version, min_players, max_players)
     total_count: int
+    next_cursor: str = "" # opaque; "" when there are no more games
+
+@dataclass
+class SearchGamesPayload:
+    query: str
+    page: int
+    page_size: int
+
+@dataclass
+class SearchGamesResponsePayload:
+    games: list[tuple[str, str, int, int]] # (game_name, version, min_players, max_players), best match first
+    total_count: int # number of matches over all pages
 
 @dataclass
 class FetchGameCoverPayload:
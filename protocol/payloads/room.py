@@ -7,6 +7,11 @@ class CreateRoomPayload:
 @dataclass
 class CreateRoomResponsePayload:
     room_id: str
+    version: int = 0  # lobby version of the ROOM_CREATED the creator is not sent
+
+@dataclass
+class LeaveRoomResponsePayload:
+    version: int = 0  # lobby version of the ROOM_UPDATED / ROOM_REMOVED the leaver is not sent
 
 @dataclass
 class CheckMyRoomResponsePayload:
@@ -19,4 +24,16 @@ class CheckMyRoomResponsePayload:
 
 @dataclass
 class FetchRoomListResponsePayload:
-    rooms: list[tuple[str, str, str, int, int, str]]  # (room_id, host, game_name, player_count, max_players, status)
\ No newline at end of file
+    rooms: list[tuple[str, str, str, int, int, str]]  # (room_id, host, game_name, player_count, max_players, status)
+    version: int = 0  # lobby version this snapshot reflects
+
+@dataclass
+class FetchRoomChangesPayload:
+    since_version: int
+
+@dataclass
+class FetchRoomChangesResponsePayload:
+    version: int
+    full: bool  # True: `rooms` is a full snapshot (since_version fell out of the change log)
+    rooms: list[tuple[str, str, str, int, int, str]]  # rooms added or changed since since_version
+    removed: list[str]  # room ids gone since since_version
\ No newline at end of file
@@ -0,0 +1,5 @@
+from dataclasses import dataclass
+
+@dataclass
+class HelloPayload:
+    features: list[str]  # Feature values offered (request) or accepted (response)
@@ -1,6 +1,13 @@
 import argparse
 import logging
 from .server_cli import ServerCLI
+from .server import DEFAULT_DISPATCH_WORKERS
+from .reactor import DEFAULT_WORKERS
+from .async_server import DEFAULT_EXECUTOR_WORKERS
+from .infra.admission import (AdmissionLimits, DEFAULT_MAX_CONNECTIONS, DEFAULT_MAX_INFLIGHT_PER_SESSION,
+	DEFAULT_MAX_QUEUED_REQUESTS)
+from .infra.db_writer import WriteOptions, DEFAULT_BATCH_WINDOW, SYNCHRONOUS_LEVELS
+from session.outbound import SlowConsumerPolicy, DEFAULT_MAX_QUEUED_FRAMES
 
 
 def main():
@@ -18,14 +25,90 @@ def main():
 		action="store_true",
 		help="Trace sent/received messages (server-side)",
 	)
+	parser.add_argument(
+		"--engine",
+		default="thread",
+		choices=["thread", "reactor", "asyncio"],
+		help="Connection engine: one thread per connection, a selectors/epoll reactor, or asyncio (default: thread)",
+	)
+	parser.add_argument(
+		"--workers",
+		type=int,
+		default=None,
+		help=f"Dispatch worker threads of the engine (default: thread {DEFAULT_DISPATCH_WORKERS}, "
+			f"reactor {DEFAULT_WORKERS}, asyncio {DEFAULT_EXECUTOR_WORKERS})",
+	)
+	parser.add_argument(
+		"--outbound-queue",
+		type=int,
+		default=DEFAULT_MAX_QUEUED_FRAMES,
+		help=f"Frames queued per connection before the slow-consumer policy applies (default: {DEFAULT_MAX_QUEUED_FRAMES})",
+	)
+	parser.add_argument(
+		"--slow-consumer",
+		default=SlowConsumerPolicy.COALESCE.value,
+		choices=[p.value for p in SlowConsumerPolicy],
+		help="What to do with events that queue up for a slow client (default: coalesce)",
+	)
+	parser.add_argument(
+		"--max-connections",
+		type=int,
+		default=DEFAULT_MAX_CONNECTIONS,
+		help=f"Connections accepted at once; more are closed right away (default: {DEFAULT_MAX_CONNECTIONS})",
+	)
+	parser.add_argument(
+		"--max-inflight-per-session",
+		type=int,
+		default=DEFAULT_MAX_INFLIGHT_PER_SESSION,
+		help=f"Queued or running requests per connection before 'Server busy' (thread engine only, default: {DEFAULT_MAX_INFLIGHT_PER_SESSION})",
+	)
+	parser.add_argument(
+		"--max-queued-requests",
+		type=int,
+		default=DEFAULT_MAX_QUEUED_REQUESTS,
+		help=f"Queued or running requests server-wide before 'Server busy' (thread engine only, default: {DEFAULT_MAX_QUEUED_REQUESTS})",
+	)
+	parser.add_argument(
+		"--concurrent-dispatch",
+		action="store_true",
+		help="Handle requests of one connection concurrently and answer them as they finish (thread engine)",
+	)
+	parser.add_argument(
+		"--rate-limit",
+		type=float,
+		default=0.0,
+		help="Requests per second allowed per connection, bursts up to twice that; 0 disables (default: 0)",
+	)
+	parser.add_argument(
+		"--db-batch-ms",
+		type=float,
+		default=DEFAULT_BATCH_WINDOW * 1000,
+		help=f"How long the database writer gathers writes into one transaction (default: {DEFAULT_BATCH_WINDOW * 1000:g})",
+	)
+	parser.add_argument(
+		"--db-synchronous",
+		default="normal",
+		choices=[level.lower() for level in SYNCHRONOUS_LEVELS],
+		help="Durability of committed writes: full fsyncs every batch, normal only at checkpoints, off never (default: normal)",
+	)
 	args = parser.parse_args()
+	if args.concurrent_dispatch and args.engine != "thread":
+		parser.error(f"--concurrent-dispatch is only supported by the thread engine, not --engine {args.engine}")
+	for flag, value, default in (("--max-inflight-per-session", args.max_inflight_per_session, DEFAULT_MAX_INFLIGHT_PER_SESSION),
+								 ("--max-queued-requests", args.max_queued_requests, DEFAULT_MAX_QUEUED_REQUESTS)):
+		if value != default and args.engine != "thread":
+			parser.error(f"{flag} is only enforced by the thread engine, not --engine {args.engine}")
 
 	logging.basicConfig(
 		level=getattr(logging, args.log_level),
 		format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
 	)
 
-	server = ServerCLI((args.host, args.port), trace_io=args.trace_io)
+	server = ServerCLI((args.host, args.port), trace_io=args.trace_io, engine=args.engine, workers=args.workers,
+		outbound_queue_size=args.outbound_queue, slow_consumer_policy=SlowConsumerPolicy(args.slow_consumer),
+		admission_limits=AdmissionLimits(args.max_connections, args.max_inflight_per_session, args.max_queued_requests),
+		concurrent_dispatch=args.concurrent_dispatch, rate_limit=args.rate_limit,
+		write_options=WriteOptions(batch_window=args.db_batch_ms / 1000, synchronous=args.db_synchronous.upper()))
 	try:
 		server.run()
 	finally:
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from protocol.enums import Action
+from session.async_session import AsyncSession
+from session.errors import SessionDisconnectedError
+from session.outbound import SlowConsumerPolicy, DEFAULT_MAX_QUEUED_FRAMES
+from .server import Server
+from .infra.admission import AdmissionLimits
+from .infra.db_writer import WriteOptions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXECUTOR_WORKERS = 16
+
+# Handlers that never block (no Database, no file I/O, no lock shared with executor threads) run directly
+# on the event loop; everything else goes to the executor. Room handlers take RoomManager / EventBus locks
+# and LOGOUT / DOWNLOAD_GAME_FINISH touch files and the room state, so only HELLO qualifies.
+INLINE_ACTIONS = frozenset({
+    Action.HELLO,
+})
+
+
+class AsyncServer(Server):
+    """asyncio engine: one event loop serves every connection with AsyncSession.
+
+    既有的 Dispatcher handler 原封不動地執行；會阻塞的 handler（Database 查詢、上傳收尾、讀檔）
+    透過 run_in_executor 交給 thread pool，連線本身不再佔用作業系統執行緒。
+    """
+    LISTEN_BACKLOG = 1024
+
+    def __init__(self, addr: tuple[str, int], trace_io: bool = False, workers: int = DEFAULT_EXECUTOR_WORKERS,
+                 outbound_queue_size: int = DEFAULT_MAX_QUEUED_FRAMES,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+                 admission_limits: AdmissionLimits | None = None, rate_limit: float = 0.0,
+                 write_options: WriteOptions | None = None):
+        super().__init__(addr, trace_io=trace_io, outbound_queue_size=outbound_queue_size,
+                         slow_consumer_policy=slow_consumer_policy, workers=workers,
+                         admission_limits=admission_limits, rate_limit=rate_limit, write_options=write_options)
+        self._workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AsyncServerWorker")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def serve(self):
+        """Run the event loop on the calling thread until stop() is called."""
+        asyncio.run(self._serve_async())
+
+    def stop(self):
+        self._stop_event.set()
+        loop, stopped = self._loop, self._stopped
+        if loop is not None and stopped is not None:
+            try:
+                loop.call_soon_threadsafe(stopped.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    async def _serve_async(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop.set_default_executor(self._executor)
+        self._stopped = asyncio.Event()
+        if self._stop_event.is_set():
+            return
+        server = await self._loop.create_server(self._make_protocol, sock=self._acceptor.get_socket())
+        logger.info("Server (asyncio engine, %d executor workers) listening on %s:%d", self._workers, self._addr[0], self._addr[1])
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            for session in self._session_user_map.get_all_sessions():
+                session.close()
+            if self._tasks:
+                await asyncio.wait(list(self._tasks), timeout=1.0)
+            self._session_user_map.clear_all()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._db.close()
+
+    def _make_protocol(self):
+        session = AsyncSession(serve_requests=True, on_connected=self._on_connected,
+                               outbound=self._new_outbound_queue())
+        session.set_trace_io(self._trace_io)
+        return session.protocol
+
+    def _on_connected(self, session: AsyncSession):
+        addr = session.peer_address
+        if not self._admit_connection(addr):
+            session.close()
+            return
+        if addr:
+            logger.info("Accepted connection from %s:%d", addr[0], addr[1])
+        self._session_user_map.add_session(session)
+        task = asyncio.get_running_loop().create_task(self._serve_session(session))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _serve_session(self, session: AsyncSession):
+        """Per-connection coroutine: requests are handled in order, like Server._client_loop."""
+        loop = asyncio.get_running_loop()
+        addr = session.peer_address
+        try:
+            async for req in session.requests():
+                try:
+                    if req.action in INLINE_ACTIONS:
+                        resp = self._dispatcher.dispatch(req, session)
+                    else:
+                        resp = await loop.run_in_executor(self._executor, self._dispatcher.dispatch, req, session)
+                    await session.send(resp)
+                except Exception as e:
+                    if isinstance(e, SessionDisconnectedError):
+                        break
+                    if addr:
+                        logger.exception(f"Client {addr[0]}:{addr[1]} handler error: {e}")
+                    else:
+                        logger.exception(f"Client handler error: {e}")
+                    break
+        finally:
+            if addr:
+                logger.info(f"Client {addr[0]}:{addr[1]} disconnected")
+            else:
+                logger.info("Client disconnected")
+            # same room / event bus work as LOGOUT, so it stays off the loop too
+            try:
+                await loop.run_in_executor(self._executor, self._cleanup_session, session)
+            except RuntimeError:  # executor already shut down
+                self._cleanup_session(session)
@@ -0,0 +1,58 @@
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from protocol.enums import Role
+from protocol.message import Message
+from session.session import Session
+
+# What every handler returns: (response payload, ok, error)
+HandlerResult = tuple[Any, bool, Optional[str]]
+
+PUBLIC: Optional[frozenset[Role]] = None  # Route.roles of actions allowed before login
+ANY_ROLE = frozenset(Role)
+PLAYER_ONLY = frozenset({Role.PLAYER})
+DEVELOPER_ONLY = frozenset({Role.DEVELOPER})
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    """One entry of the Dispatcher's handler registry: the handler and the roles allowed to call it."""
+    handler: Callable[["RequestContext"], HandlerResult]
+    roles: Optional[frozenset[Role]] = PUBLIC
+
+
+@dataclass(slots=True)
+class RequestContext:
+    """Per-request state built once by Dispatcher.dispatch and handed to the middleware and the handler.
+
+    身分（role/username）在 dispatch 開始時只查一次 SessionUserMap；handler 不必再自行查詢與檢查角色。
+    """
+    message: Message
+    session: Session
+    route: Route
+    role: Optional[Role] = None
+    username: Optional[str] = None
+    trace_id: str = ""
+    started: float = field(default_factory=time.perf_counter)
+
+    def __post_init__(self):
+        if not self.trace_id:
+            self.trace_id = self.message.msg_id or uuid.uuid4().hex[:12]
+
+    @property
+    def payload(self) -> Any:
+        """The request payload; decoded here on first access (see LazyMessage)."""
+        return self.message.payload
+
+    @property
+    def authenticated(self) -> bool:
+        return self.username is not None
+
+    @property
+    def addr(self) -> Optional[tuple[str, int]]:
+        return self.session.peer_address
+
+    def elapsed(self) -> float:
+        """Seconds since the request entered the dispatcher."""
+        return time.perf_counter() - self.started
@@ -1,73 +1,102 @@
+from typing import Hashable, Optional, Sequence
 from protocol.enums import Action, MessageType
 from protocol.message import Message
+from protocol.errors import SchemaError
+from protocol.json_codec import response_placeholder
 from server.handlers import auth as auth_handlers
 from server.handlers import game as game_handlers
 from server.handlers import room as room_handlers
+from server.handlers import session as session_handlers
 from server.infra.database import Database
 from server.infra.session_user_map import SessionUserMap
 from server.infra.upload_manager import UploadManager
 from server.infra.download_manager import DownloadManager
 from server.infra.room_manager import RoomManager
+from server.infra.game_catalog import GameCatalog
 from session.session import Session
+from server.context import RequestContext, Route, PUBLIC, ANY_ROLE, PLAYER_ONLY, DEVELOPER_ONLY
+from server.middleware import Middleware, Pipeline, Timing, auth, error_mapping
+
+
+# Actions that change how the session is served; with concurrent dispatch they still run one at a time, in order.
+SESSION_ACTIONS = frozenset({
+	Action.HELLO,
+	Action.LOGIN,
+	Action.REGISTER,
+	Action.LOGOUT,
+})
+
+UPLOAD_ACTIONS = frozenset({Action.UPLOAD_GAME_CHUNK, Action.UPLOAD_GAME_FINISH})
+DOWNLOAD_ACTIONS = frozenset({Action.DOWNLOAD_GAME_CHUNK, Action.DOWNLOAD_GAME_FINISH})
+
+
+def ordering_key(message: Message) -> Optional[Hashable]:
+	"""Requests of one session with the same key must be handled in arrival order; None means no ordering needed.
+
+	上傳的 chunk/finish 依 upload_id、下載依 download_id 排序，登入/登出/HELLO 彼此排序；
+	其他 request 可以同時處理，回應依完成順序送出（客戶端以 msg_id 對應）。
+	"""
+	action = message.action
+	if action in SESSION_ACTIONS:
+		return "session"
+	try:
+		if action in UPLOAD_ACTIONS:
+			return ("upload", message.payload.upload_id)
+		if action in DOWNLOAD_ACTIONS:
+			return ("download", message.payload.download_id)
+	except (SchemaError, AttributeError):
+		return None  # dispatch() answers the malformed payload
+	return None
 
 
 class Dispatcher:
-	def __init__(self, db: Database, session_user_map: SessionUserMap, room_manager: RoomManager):
+	"""Routes requests through the middleware Pipeline to the handler registered for their action.
+
+	每個 request 只建立一次 RequestContext（身分、角色、開始時間、trace id）；
+	handler 在 registry 中宣告允許的角色，由 auth middleware 統一檢查。
+	"""
+	def __init__(self, db: Database, session_user_map: SessionUserMap, room_manager: RoomManager,
+				 middlewares: Optional[Sequence[Middleware]] = None):
 		self._db = db
 		self._session_user_map = session_user_map
 		self._upload_manager = UploadManager()
 		self._download_manager = DownloadManager()
 		self._room_manager = room_manager
+		self._catalog = GameCatalog(db)
+		self.timing = Timing()
+		self._pipeline = Pipeline(middlewares if middlewares is not None else (error_mapping, self.timing, auth))
+		self._routes = self._build_routes()
+
+	@property
+	def catalog(self) -> GameCatalog:
+		return self._catalog
+
+	@property
+	def pipeline(self) -> Pipeline:
+		return self._pipeline
+
+	def use(self, middleware: Middleware) -> None:
+		"""Plug in another middleware (e.g. RateLimit); it runs after auth, right before the handler."""
+		self._pipeline.use(middleware)
 
 	def dispatch(self, message: Message, session: Session) -> Message:
-		# Only handle requests; for non-request, echo payload and mark failed
+		# Only handle requests; non-requests, unknown actions and requests the session may not
+		# make are answered from the header alone, without decoding (or echoing) their payload.
 		assert message.action is not None
 		if message.type != MessageType.REQUEST:
-			return Message.response(
-				message.action,
-				message.payload,
-				msg_id=message.msg_id,
-				ok=False,
-			)
-		
-		match message.action:
-			case Action.LOGIN:
-				payload, ok, error = auth_handlers.handle_login(message.payload, self._db, self._session_user_map, session)
-			case Action.REGISTER:
-				payload, ok, error = auth_handlers.handle_register(message.payload, self._db, session)
-			case Action.LOGOUT:
-				payload, ok, error = auth_handlers.handle_logout(message.payload, self._room_manager, self._session_user_map, session)
-			case Action.UPLOAD_GAME_INIT:
-				payload, ok, error = game_handlers.handle_upload_init(message.payload, self._db, self._upload_manager, self._session_user_map, session)
-			case Action.UPLOAD_GAME_CHUNK:
-				payload, ok, error = game_handlers.handle_upload_chunk(message.payload, self._upload_manager, session)
-			case Action.UPLOAD_GAME_FINISH:
-				payload, ok, error = game_handlers.handle_upload_finish(message.payload, self._db, self._upload_manager, session)
-			case Action.FETCH_MY_WORKS:
-				payload, ok, error = game_handlers.handle_fetch_my_works(message.payload, self._db, self._session_user_map, session)
-			case Action.FETCH_STORE:
-				payload, ok, error = game_handlers.handle_fetch_store(message.payload, self._db, self._session_user_map, session)
-			case Action.FETCH_GAME_COVER:
-				payload, ok, error = game_handlers.handle_fetch_game_cover(message.payload, self._db, self._session_user_map, session)
-			case Action.FETCH_GAME_DETAIL:
-				payload, ok, error = game_handlers.handle_fetch_game_detail(message.payload, self._db, self._session_user_map, session)
-			case Action.DOWNLOAD_GAME_INIT:
-				payload, ok, error = game_handlers.handle_download_game_init(message.payload, self._db, self._download_manager, self._session_user_map, session)
-			case Action.DOWNLOAD_GAME_CHUNK:
-				payload, ok, error = game_handlers.handle_download_game_chunk(message.payload, self._download_manager, self._session_user_map, session)
-			case Action.DOWNLOAD_GAME_FINISH:
-				payload, ok, error = game_handlers.handle_download_game_finish(message.payload, self._download_manager, self._session_user_map, session)
-			case Action.CREATE_ROOM:
-				payload, ok, error = room_handlers.handle_create_room(message.payload, self._db, self._room_manager, self._session_user_map, session)
-			case Action.LEAVE_ROOM:
-				payload, ok, error = room_handlers.handle_leave_room(self._room_manager, self._session_user_map, session)
-			case Action.CHECK_MY_ROOM:
-				payload, ok, error = room_handlers.handle_check_my_room(self._room_manager, self._session_user_map, session)
-			case Action.FETCH_ROOM_LIST:
-				payload, ok, error = room_handlers.handle_fetch_room_list(self._room_manager, self._session_user_map, session)
-			case _:
-				# Unknown action: echo payload, mark failed
-				payload, ok, error = message.payload, False, "Unknown action"
+			return self.reject(message, "Not a request")
+		if getattr(session, "closed", False):
+			# the connection is being cleaned up; a late LOGIN must not register it again
+			return self.reject(message, "Session closed")
+		route = self._routes.get(message.action)
+		if route is None:
+			return self.reject(message, "Unknown action")
+
+		ctx = RequestContext(message, session, route)
+		user_info = self._session_user_map.get_user_by_session(session)
+		if user_info is not None:
+			ctx.role, ctx.username = user_info
+		payload, ok, error = self._pipeline(ctx)
 
 		return Message.response(
 			message.action,
@@ -76,3 +105,38 @@ class Dispatcher:
 			ok=ok,
 			error=error,
 		)
+
+	def reject(self, message: Message, error: str) -> Message:
+		"""Failed response answered from the header alone (payload is never decoded)."""
+		assert message.action is not None
+		return Message.response(
+			message.action,
+			response_placeholder(message.action),
+			msg_id=message.msg_id,
+			ok=False,
+			error=error,
+		)
+
+	def _build_routes(self) -> dict[Action, Route]:
+		return {
+			Action.HELLO: Route(lambda ctx: session_handlers.handle_hello(ctx.payload, ctx.session), PUBLIC),
+			Action.LOGIN: Route(lambda ctx: auth_handlers.handle_login(ctx.payload, self._db, self._session_user_map, self._room_manager.event_bus, ctx.session), PUBLIC),
+			Action.REGISTER: Route(lambda ctx: auth_handlers.handle_register(ctx.payload, self._db, ctx.session), PUBLIC),
+			Action.LOGOUT: Route(lambda ctx: auth_handlers.handle_logout(ctx.payload, self._room_manager, self._session_user_map, ctx), PUBLIC),
+			Action.UPLOAD_GAME_INIT: Route(lambda ctx: game_handlers.handle_upload_init(ctx.payload, self._catalog, self._upload_manager, ctx), DEVELOPER_ONLY),
+			Action.UPLOAD_GAME_CHUNK: Route(lambda ctx: game_handlers.handle_upload_chunk(ctx.payload, self._upload_manager, ctx), ANY_ROLE),
+			Action.UPLOAD_GAME_FINISH: Route(lambda ctx: game_handlers.handle_upload_finish(ctx.payload, self._catalog, self._upload_manager, ctx), ANY_ROLE),
+			Action.FETCH_MY_WORKS: Route(lambda ctx: game_handlers.handle_fetch_my_works(ctx.payload, self._catalog, ctx), DEVELOPER_ONLY),
+			Action.FETCH_STORE: Route(lambda ctx: game_handlers.handle_fetch_store(ctx.payload, self._catalog, ctx), PLAYER_ONLY),
+			Action.SEARCH_GAMES: Route(lambda ctx: game_handlers.handle_search_games(ctx.payload, self._catalog, ctx), PLAYER_ONLY),
+			Action.FETCH_GAME_COVER: Route(lambda ctx: game_handlers.handle_fetch_game_cover(ctx.payload, self._catalog, ctx), PLAYER_ONLY),
+			Action.FETCH_GAME_DETAIL: Route(lambda ctx: game_handlers.handle_fetch_game_detail(ctx.payload, self._catalog, ctx), PLAYER_ONLY),
+			Action.DOWNLOAD_GAME_INIT: Route(lambda ctx: game_handlers.handle_download_game_init(ctx.payload, self._catalog, self._download_manager, ctx), PLAYER_ONLY),
+			Action.DOWNLOAD_GAME_CHUNK: Route(lambda ctx: game_handlers.handle_download_game_chunk(ctx.payload, self._download_manager, ctx), PLAYER_ONLY),
+			Action.DOWNLOAD_GAME_FINISH: Route(lambda ctx: game_handlers.handle_download_game_finish(ctx.payload, self._download_manager, ctx), PLAYER_ONLY),
+			Action.CREATE_ROOM: Route(lambda ctx: room_handlers.handle_create_room(ctx.payload, self._catalog, self._room_manager, ctx), PLAYER_ONLY),
+			Action.LEAVE_ROOM: Route(lambda ctx: room_handlers.handle_leave_room(self._room_manager, ctx), PLAYER_ONLY),
+			Action.CHECK_MY_ROOM: Route(lambda ctx: room_handlers.handle_check_my_room(self._room_manager, ctx), PLAYER_ONLY),
+			Action.FETCH_ROOM_LIST: Route(lambda ctx: room_handlers.handle_fetch_room_list(self._room_manager, ctx), PLAYER_ONLY),
+			Action.FETCH_ROOM_CHANGES: Route(lambda ctx: room_handlers.handle_fetch_room_changes(ctx.payload, self._room_manager, ctx), PLAYER_ONLY),
+		}
@@ -4,13 +4,16 @@ from protocol.payloads.common import EmptyPayload
 from server.infra.database import Database
 from server.infra.session_user_map import SessionUserMap
 from server.infra.room_manager import RoomManager
+from server.infra.event_bus import EventBus
 from session.session import Session
+from server.context import RequestContext
 from protocol.enums import Role
 
 logger = logging.getLogger(__name__)
 
 
-def handle_login(payload: Credential, db: Database, session_user_map: SessionUserMap, session: Session) -> tuple[Credential, bool, str | None]:
+
+def handle_login(payload: Credential, db: Database, session_user_map: SessionUserMap, event_bus: EventBus, session: Session) -> tuple[Credential, bool, str | None]:
 	addr = session.peer_address
 	logger.info(f"Login attempt: user={payload.username}, role={payload.role}, addr={addr}")
 
@@ -40,7 +43,15 @@ def handle_login(payload: Credential, db: Database, session_user_map: SessionUse
 		return payload, False, "User already logged in"
 	
 	# Login success: update session map
-	session_user_map.move_session_to_user(session, role, payload.username)
+	try:
+		session_user_map.move_session_to_user(session, role, payload.username)
+	except KeyError as e:
+		# lost a race with another login of the same user, or this session is already logged in
+		logger.warning(f"Login failed: {e.args[0]} - {payload.username}")
+		return payload, False, "User already logged in"
+	if role == Role.PLAYER:
+		# players receive lobby events from now on
+		event_bus.attach(payload.username, session)
 
 	logger.info(f"Login success: {payload.username} as {payload.role}")
 	return payload, True, None
@@ -50,10 +61,13 @@ def handle_register(payload: Credential, db: Database, session: Session) -> tupl
 	addr = session.peer_address
 	logger.info(f"Register attempt: user={payload.username}, role={payload.role}, addr={addr}")
 
+	# the insert is queued to the database writer and committed with other registrations; no connection is held here.
+	# the writer resolves every future (committed, rolled back or closed), so the answer always matches what was stored
 	if payload.role == Role.DEVELOPER.value:
-		success = db.create_developer(payload.username, payload.password)
+		pending = db.create_developer_async(payload.username, payload.password)
 	else:
-		success = db.create_player(payload.username, payload.password)
+		pending = db.create_player_async(payload.username, payload.password)
+	success = pending.result()
 
 	if not success:
 		logger.warning(f"Register failed: Username already exists - {payload.username}")
@@ -63,20 +77,20 @@ def handle_register(payload: Credential, db: Database, session: Session) -> tupl
 	return payload, True, None
 
 
-def handle_logout(payload: EmptyPayload, room_manager: RoomManager, session_user_map: SessionUserMap, session: Session) -> tuple[EmptyPayload, bool, str | None]:
-	addr = session.peer_address
+def handle_logout(payload: EmptyPayload, room_manager: RoomManager, session_user_map: SessionUserMap, ctx: RequestContext) -> tuple[EmptyPayload, bool, str | None]:
+	addr = ctx.addr
 	logger.info(f"Logout attempt: addr={addr}")
 
-	user_info = session_user_map.get_user_by_session(session)
-	if user_info:
-		role, username = user_info
+	if ctx.authenticated:
+		role, username = ctx.role, ctx.username
 		if role == Role.PLAYER:
 			room_id = room_manager.get_room_id_by_player(username)
 			if room_id:
 				room_manager.remove_player_from_room(room_id, username)
 				logger.info(f"User {username} removed from room {room_id} on logout")
+			room_manager.event_bus.detach(username)
 
-		session_user_map.move_session_back(session)
+		session_user_map.move_session_back(ctx.session)
 		logger.info(f"Logout success: {username} ({role.value}) session moved back")
 	else:
 		logger.info(f"Logout: Session was not logged in or already logged out")
@@ -1,9 +1,11 @@
 import logging
 import os
+import base64
+import binascii
 import hashlib
 import zipfile
 import shutil
-from typing import Tuple, Any
+from typing import Tuple, Any, Optional
 
 from protocol.payloads.game import (
     UploadGameInitPayload, UploadGameInitResponsePayload, 
@@ -11,17 +13,16 @@ from protocol.payloads.game import (
     UploadGameFinishPayload, 
     FetchMyWorksResponsePayload,
     FetchStorePayload, FetchStoreResponsePayload, 
+    SearchGamesPayload, SearchGamesResponsePayload, 
     FetchGameCoverPayload, FetchGameCoverResponsePayload,
     FetchGameDetailPayload, FetchGameDetailResponsePayload, 
     DownloadGameInitPayload, DownloadGameChunkPayload, DownloadGameFinishPayload, DownloadGameInitResponsePayload, DownloadGameChunkResponsePayload
 )
-from protocol.enums import Role
 from protocol.payloads.common import EmptyPayload
-from server.infra.database import Database
-from server.infra.session_user_map import SessionUserMap
+from server.infra.game_catalog import GameCatalog
 from server.infra.upload_manager import UploadManager
 from server.infra.download_manager import DownloadManager
-from session.session import Session
+from server.context import RequestContext
 from common.game_version import GameVersion
 from pathlib import Path
 
@@ -29,23 +30,16 @@ logger = logging.getLogger(__name__)
 
 GAMES_DIR = "server\\games"
 CHUNK_SIZE = 1024 * 1024  # 1MB
+MAX_SEARCH_QUERY_LENGTH = 200
+MAX_SEARCH_PAGE_SIZE = 100
 
 def handle_upload_init(
     payload: UploadGameInitPayload, 
-    db: Database, 
+    catalog: GameCatalog, 
     upload_manager: UploadManager, 
-    session_user_map: SessionUserMap, 
-    session: Session
+    ctx: RequestContext
 ) -> Tuple[UploadGameInitResponsePayload, bool, str]:
-    
-    addr = session.peer_address
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return UploadGameInitResponsePayload(upload_id="", chunk_size=CHUNK_SIZE), False, "Unauthenticated session"
-
-    role, username = user_info
-    if role != Role.DEVELOPER:
-        return UploadGameInitResponsePayload(upload_id="", chunk_size=CHUNK_SIZE), False, "Unauthorized action"
+    username = ctx.username
     # Validate payload
     if not payload.name or not payload.version:
         return UploadGameInitResponsePayload(upload_id="", chunk_size=CHUNK_SIZE), False, "Missing required fields"
@@ -55,7 +49,7 @@ def handle_upload_init(
     
     # check if game name already exists
     is_update_text = ""
-    existing_game = db.get_game(payload.name)
+    existing_game = catalog.get_game(payload.name)
     if existing_game:
         # treat as update, check developer matches, version greater than existing
         _, existing_developer, existing_version, _, _, _, _, _ = existing_game
@@ -84,9 +78,8 @@ def handle_upload_init(
 def handle_upload_chunk(
     payload: UploadGameChunkPayload, 
     upload_manager: UploadManager, 
-    session: Session
+    ctx: RequestContext
 ) -> Tuple[EmptyPayload, bool, str]:
-    
     # Note: We don't strictly check auth here for performance, relying on upload_id validity
     # But in a real secure system, we should check if session owns the upload_id
     
@@ -98,9 +91,9 @@ def handle_upload_chunk(
 
 def handle_upload_finish(
     payload: UploadGameFinishPayload, 
-    db: Database, 
+    catalog: GameCatalog, 
     upload_manager: UploadManager, 
-    session: Session
+    ctx: RequestContext
 ) -> Tuple[UploadGameFinishPayload, bool, str]:
     
     state = upload_manager.finish_upload(payload.upload_id)
@@ -109,17 +102,13 @@ def handle_upload_finish(
 
     # Verify size
     if state.current_size != state.total_size:
-        upload_manager.cancel_upload(payload.upload_id) # Cleanup
+        if os.path.exists(state.temp_file_path): # Cleanup (the upload is no longer registered)
+            os.remove(state.temp_file_path)
         return payload, False, f"Size mismatch: expected {state.total_size}, got {state.current_size}"
 
-    # Verify hash
-    sha256_hash = hashlib.sha256()
+    # Verify hash: fed chunk by chunk in append_chunk, no second pass over the file
     try:
-        with open(state.temp_file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        
-        calculated_hash = sha256_hash.hexdigest()
+        calculated_hash = state.hasher.hexdigest()
         if calculated_hash != state.sha256:
             os.remove(state.temp_file_path)
             return payload, False, "Hash mismatch"
@@ -192,59 +181,39 @@ def handle_upload_finish(
                     raise ValueError("description.txt is too large. Max size is 1MB.")
                 shutil.move(str(desc_src), desc_path)
 
-            # Calculate SHA256 of the generated client folder (contains client/ and common/) for the database
-            client_folder_hash = hashlib.sha256()
-            for root, _, files in os.walk(client_folder):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    with open(file_path, "rb") as f:
-                        for byte_block in iter(lambda: f.read(4096), b""):
-                            client_folder_hash.update(byte_block)
-
-            if common_folder.exists():
-                for root, _, files in os.walk(common_folder):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        with open(file_path, "rb") as f:
-                            for byte_block in iter(lambda: f.read(4096), b""):
-                                client_folder_hash.update(byte_block)
-            final_db_client_folder_sha256 = client_folder_hash.hexdigest()
-
-            # Helper function to create the target zips
-            def create_target_zip(target_path: str, source_folder: Path, common_folder: Path):
-                with zipfile.ZipFile(target_path, 'w', zipfile.ZIP_DEFLATED) as z:
-                    # A. Add source folder contents to the ROOT of the zip
-                    #    e.g. client/main.py -> client/main.py (Structure Preserved)
-                    for root, _, files in os.walk(source_folder):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, extract_folder) # preserve structure under source_folder to make sure game works
-                            z.write(file_path, arcname)
-                    
-                    # B. Add common folder to 'common/' in the zip
-                    #    e.g. common/consts.py -> common/consts.py
-                    if common_folder.exists():
-                        for root, _, files in os.walk(common_folder):
+            # Helper function to create the target zips; returns the SHA256 of the zip file.
+            # Files are read once: the bytes going into the zip also feed `folder_hash`, and the zip
+            # bytes are hashed as they are written, so neither the folder nor the zip is read again.
+            def create_target_zip(target_path: str, source_folder: Path, common_folder: Path, folder_hash: Any = None) -> str:
+                with open(target_path, "wb") as raw:
+                    out = _HashingWriter(raw)
+                    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as z:
+                        # A. Add source folder contents to the ROOT of the zip
+                        #    e.g. client/main.py -> client/main.py (Structure Preserved)
+                        for root, _, files in os.walk(source_folder):
                             for file in files:
                                 file_path = os.path.join(root, file)
-                                # We want the arcname to start with 'common/'
-                                # os.path.relpath(..., extract_dir) gives 'common/...'
-                                arcname = os.path.relpath(file_path, extract_folder)
-                                z.write(file_path, arcname)
-            # 4. Create client zip
-            create_target_zip(client_zip_path, client_folder, common_folder)
+                                arcname = os.path.relpath(file_path, extract_folder) # preserve structure under source_folder to make sure game works
+                                _zip_file(z, file_path, arcname, folder_hash)
+                        
+                        # B. Add common folder to 'common/' in the zip
+                        #    e.g. common/consts.py -> common/consts.py
+                        if common_folder.exists():
+                            for root, _, files in os.walk(common_folder):
+                                for file in files:
+                                    file_path = os.path.join(root, file)
+                                    # We want the arcname to start with 'common/'
+                                    # os.path.relpath(..., extract_dir) gives 'common/...'
+                                    arcname = os.path.relpath(file_path, extract_folder)
+                                    _zip_file(z, file_path, arcname, folder_hash)
+                return out.hasher.hexdigest()
+            # 4. Create client zip, hashing the client folder (contains client/ and common/) and the zip for the database
+            client_folder_hash = hashlib.sha256()
+            final_db_client_zip_sha256 = create_target_zip(client_zip_path, client_folder, common_folder, client_folder_hash)
+            final_db_client_folder_sha256 = client_folder_hash.hexdigest()
             # 5. Create server zip
             create_target_zip(server_zip_path, server_folder, common_folder)
 
-            # --- NEW CODE START ---
-            # Calculate SHA256 of the generated client.zip for the database
-            client_hash = hashlib.sha256()
-            with open(client_zip_path, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    client_hash.update(byte_block)
-            final_db_client_zip_sha256 = client_hash.hexdigest()
-            # --- NEW CODE END ---
-
         except Exception as e:
             logger.error(f"Error processing uploaded zip for {state.game_name}: {e}")
             # Cleanup created directory on error
@@ -267,7 +236,7 @@ def handle_upload_finish(
         # Update DB
         # get game first, if exists, update; else create new
 
-        existing_game = db.get_game(state.game_name)
+        existing_game = catalog.get_game(state.game_name)
         if existing_game:
             # existing_game: (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path)
             existing_developer = existing_game[1]
@@ -293,7 +262,7 @@ def handle_upload_finish(
                 if os.path.isdir(old_file_path):
                     shutil.rmtree(old_file_path, ignore_errors=True)
 
-            success = db.set_game(
+            success = catalog.set_game(
                 name=state.game_name,
                 version=state.version,
                 min_players=state.min_players,
@@ -303,7 +272,7 @@ def handle_upload_finish(
                 file_path=db_file_path
             )
         else:
-            success = db.create_game(
+            success = catalog.create_game(
                 name=state.game_name,
                 developer=state.username,
                 version=state.version,
@@ -333,85 +302,110 @@ def handle_upload_finish(
             
         return payload, False, "Internal server error"
 
+class _HashingWriter:
+    """Write-only file wrapper that hashes what passes through.
+
+    不提供 seek/tell，ZipFile 會改用 data descriptor 串流寫入而不回頭改寫 header，
+    因此雜湊值就是最終檔案內容的雜湊。
+    """
+    def __init__(self, raw):
+        self._raw = raw
+        self.hasher = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.hasher.update(data)
+        return self._raw.write(data)
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+def _zip_file(z: zipfile.ZipFile, file_path: str, arcname: str, content_hash: Any = None) -> None:
+    """z.write(file_path, arcname), also feeding the file content to `content_hash`."""
+    info = zipfile.ZipInfo.from_file(file_path, arcname)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with open(file_path, "rb") as src, z.open(info, "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as dst:
+        for block in iter(lambda: src.read(CHUNK_SIZE), b""):
+            if content_hash is not None:
+                content_hash.update(block)
+            dst.write(block)
+
 def handle_fetch_my_works(
     payload: EmptyPayload, 
-    db: Database,
-    session_user_map: SessionUserMap, 
-    session: Session
+    catalog: GameCatalog,
+    ctx: RequestContext
 ) -> Tuple[FetchMyWorksResponsePayload, bool, str]:
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return FetchMyWorksResponsePayload(works=[]), False, "Unauthenticated session"
-    
-    role, username = user_info
-    if not username or role != Role.DEVELOPER:
-        return FetchMyWorksResponsePayload(works=[]), False, "Unauthorized"
-    games = db.get_games_by_developer(username)
+    username = ctx.username
+    games = catalog.get_games_by_developer(username)
     # reduce to (name, version, min_players, max_players)
     games = [(name, version, min_players, max_players) for (name, _, version, min_players, max_players, _, _, _) in games]
     return FetchMyWorksResponsePayload(works=games), True, ""
 
 def handle_fetch_store(
     payload: FetchStorePayload,
-    db: Database,
-    session_user_map: SessionUserMap,
-    session: Session
+    catalog: GameCatalog,
+    ctx: RequestContext
 ) -> Tuple[FetchStoreResponsePayload, bool, str]:
-    # Any logged in user can fetch store
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return FetchStoreResponsePayload(games=[], total_count=0), False, "Unauthenticated session"
-    
-    role, username = user_info
-    if not username:
-        return FetchStoreResponsePayload(games=[], total_count=0), False, "Unauthorized"
-    
-    if role != Role.PLAYER:
-        return FetchStoreResponsePayload(games=[], total_count=0), False, "Role not permitted"
-    
-    games = db.get_all_games_paginated(payload.page, payload.page_size)
-    total_count = db.get_total_games_count()
+    next_cursor = ""
+    if payload.cursor is None:
+        rows = catalog.get_all_games_paginated(payload.page, payload.page_size)
+    else:
+        # Keyset mode: continue after the last game of the previous page; one extra row tells whether more follow
+        try:
+            after = _decode_store_cursor(payload.cursor)
+        except ValueError:
+            return FetchStoreResponsePayload(games=[], total_count=0), False, "Invalid cursor"
+        rows = catalog.get_games_after(after, payload.page_size + 1)
+        if len(rows) > payload.page_size:
+            rows = rows[:payload.page_size]
+            next_cursor = _encode_store_cursor(rows[-1][0]) if rows else ""
+    total_count = catalog.get_total_games_count()
     # reduce to (name, version, min_players, max_players)
-    games = [(name, version, min_players, max_players) for (name, _, version, min_players, max_players, _, _, _) in games]
-    return FetchStoreResponsePayload(games=games, total_count=total_count), True, ""
+    games = [(name, version, min_players, max_players) for (name, _, version, min_players, max_players, _, _, _) in rows]
+    return FetchStoreResponsePayload(games=games, total_count=total_count, next_cursor=next_cursor), True, ""
+
+def handle_search_games(
+    payload: SearchGamesPayload,
+    catalog: GameCatalog,
+    ctx: RequestContext
+) -> Tuple[SearchGamesResponsePayload, bool, str]:
+    if len(payload.query) > MAX_SEARCH_QUERY_LENGTH:
+        return SearchGamesResponsePayload(games=[], total_count=0), False, f"Query is too long (max {MAX_SEARCH_QUERY_LENGTH} characters)"
+    if payload.page < 1 or not 1 <= payload.page_size <= MAX_SEARCH_PAGE_SIZE:
+        return SearchGamesResponsePayload(games=[], total_count=0), False, f"Invalid page or page size (max {MAX_SEARCH_PAGE_SIZE})"
+    rows, total_count = catalog.search(payload.query, payload.page, payload.page_size)
+    # reduce to (name, version, min_players, max_players)
+    games = [(name, version, min_players, max_players) for (name, _, version, min_players, max_players, _, _, _) in rows]
+    return SearchGamesResponsePayload(games=games, total_count=total_count), True, ""
+
+def _encode_store_cursor(last_name: str) -> str:
+    # 以頁面最後一款遊戲的名稱（排序鍵）作為游標；客戶端只把它原樣傳回
+    return base64.urlsafe_b64encode(last_name.encode("utf-8")).decode("ascii")
+
+def _decode_store_cursor(cursor: str) -> Optional[str]:
+    """Name to continue after; None for "" (first page). Raises ValueError for a malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        return base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"invalid store cursor: {e}") from e
 
 def handle_fetch_game_cover(
     payload: FetchGameCoverPayload,
-    db: Database,
-    session_user_map: SessionUserMap,
-    session: Session
+    catalog: GameCatalog,
+    ctx: RequestContext
 ) -> Tuple[FetchGameCoverResponsePayload, bool, str]:
-    
-    # 0. Auth check (any logged in user can fetch covers)
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return FetchGameCoverResponsePayload(game_name=payload.game_name, cover_data=b""), False, "Unauthenticated session"
-    
-    role, username = user_info
-    if not username:
-        return FetchGameCoverResponsePayload(game_name=payload.game_name, cover_data=b""), False, "Unauthorized"
-    if role != Role.PLAYER:
-        return FetchGameCoverResponsePayload(game_name=payload.game_name, cover_data=b""), False, "Role not permitted"
-    
     # 1. Find the game to get its path
-    game = db.get_game(payload.game_name)
+    game = catalog.get_game(payload.game_name)
     if not game:
         return FetchGameCoverResponsePayload(game_name=payload.game_name, cover_data=b""), False, "Game not found"
     
-    # game structure: (name, developer, version, min, max, client_zip_sha256, client_folder_sha256, file_path)
-    # file_path points to "server/games/{uuid}"
-    game_dir = game[7]
-    cover_path = os.path.join(game_dir, "cover.png")
-    
-    # 2. Check if cover exists
-    if not os.path.exists(cover_path):
-        # Return empty bytes (client should show default icon)
-        return FetchGameCoverResponsePayload(game_name=payload.game_name, cover_data=b""), True, ""
-    
-    # 3. Read and return image data
+    # 2. Read cover.png from the game directory (cached by the catalog until the game is updated)
     try:
-        with open(cover_path, "rb") as f:
-            data = f.read()
+        data = catalog.get_asset(payload.game_name, "cover.png")
+        if data is None:
+            # Return empty bytes (client should show default icon)
+            return FetchGameCoverResponsePayload(game_name=payload.game_name, cover_data=b""), True, ""
         return FetchGameCoverResponsePayload(game_name=payload.game_name, cover_data=data), True, ""
     except Exception as e:
         logger.error(f"Error reading cover for {payload.game_name}: {e}")
@@ -419,39 +413,23 @@ def handle_fetch_game_cover(
     
 def handle_fetch_game_detail(
     payload: FetchGameDetailPayload,
-    db: Database,
-    session_user_map: SessionUserMap,
-    session: Session
+    catalog: GameCatalog,
+    ctx: RequestContext
 ) -> Tuple[FetchGameDetailResponsePayload, bool, str]:
-    # Any logged in user can fetch game details
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return FetchGameDetailResponsePayload(payload.game_name, "", "", 0, 0, ""), False, "Unauthenticated session"
-    
-    role, username = user_info
-    if not username:
-        return FetchGameDetailResponsePayload(payload.game_name, "", "", 0, 0, ""), False, "Unauthorized"
-    
-    if role != Role.PLAYER:
-        return FetchGameDetailResponsePayload(payload.game_name, "", "", 0, 0, ""), False, "Role not permitted"
-    
-    # Fetch game from DB
-    game = db.get_game(payload.game_name)
+    # Fetch game from the catalog
+    game = catalog.get_game(payload.game_name)
     if not game:
         return FetchGameDetailResponsePayload(payload.game_name, "", "", 0, 0, ""), False, "Game not found"
     
-    # game structure: (name, developer, version, min, max, client_zip_sha256, client_folder_sha256, file_path)
-    # use file_path to find description.txt
-    game_dir = game[7]
-    desc_path = os.path.join(game_dir, "description.txt")
+    # description.txt in the game directory (cached by the catalog until the game is updated)
     description = ""
-    if os.path.exists(desc_path):
-        try:
-            with open(desc_path, "r", encoding="utf-8") as f:
-                description = f.read()
-        except Exception as e:
-            logger.error(f"Error reading description for {payload.game_name}: {e}")
-            return FetchGameDetailResponsePayload(payload.game_name, "", "", 0, 0, ""), False, "Read error"
+    try:
+        data = catalog.get_asset(payload.game_name, "description.txt")
+        if data is not None:
+            description = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    except Exception as e:
+        logger.error(f"Error reading description for {payload.game_name}: {e}")
+        return FetchGameDetailResponsePayload(payload.game_name, "", "", 0, 0, ""), False, "Read error"
     
     name, developer, version, min_players, max_players, _, _, _ = game
     
@@ -459,23 +437,14 @@ def handle_fetch_game_detail(
 
 def handle_download_game_init(
     payload: DownloadGameInitPayload,
-    db: Database,
+    catalog: GameCatalog,
     download_manager: DownloadManager,
-    session_user_map: SessionUserMap,
-    session: Session
+    ctx: RequestContext
 ) -> Tuple[DownloadGameInitResponsePayload, bool, str]:
-    # Any logged in user can download games
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return DownloadGameInitResponsePayload("", "", 0, 0, 0, 0, 0, ""), False, "Unauthenticated session"
-    role, username = user_info
-    if not username:
-        return DownloadGameInitResponsePayload("", "", 0, 0, 0, 0, 0, ""), False, "Unauthorized"
-    if role != Role.PLAYER:
-        return DownloadGameInitResponsePayload("", "", 0, 0, 0, 0, 0, ""), False, "Role not permitted"
+    username = ctx.username
     
-    # Fetch game from DB
-    game = db.get_game(payload.game_name)
+    # Fetch game from the catalog
+    game = catalog.get_game(payload.game_name)
     if not game:
         return DownloadGameInitResponsePayload("", "", 0, 0, 0, 0, 0, ""), False, "Game name not found"
     # game structure: (name, developer, version, min, max, client_zip_sha256, client_folder_sha256, file_path)
@@ -505,19 +474,8 @@ def handle_download_game_init(
 def handle_download_game_chunk(
     payload: DownloadGameChunkPayload,
     download_manager: DownloadManager,
-    session_user_map: SessionUserMap,
-    session: Session
+    ctx: RequestContext
 ) -> Tuple[DownloadGameChunkResponsePayload, bool, str]:
-    # Any logged in player can download games
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return DownloadGameChunkResponsePayload(payload.download_id, payload.chunk_index, b""), False, "Unauthenticated session"
-    role, username = user_info
-    if not username:
-        return DownloadGameChunkResponsePayload(payload.download_id, payload.chunk_index, b""), False, "Unauthorized"
-    if role != Role.PLAYER:
-        return DownloadGameChunkResponsePayload(payload.download_id, payload.chunk_index, b""), False, "Role not permitted"
-    
     chunk_data = download_manager.get_chunk(payload.download_id, payload.chunk_index)
     if chunk_data is None:
         return DownloadGameChunkResponsePayload(payload.download_id, payload.chunk_index, b""), False, "Invalid download ID or offset"
@@ -527,18 +485,9 @@ def handle_download_game_chunk(
 def handle_download_game_finish(
     payload: DownloadGameFinishPayload,
     download_manager: DownloadManager,
-    session_user_map: SessionUserMap,
-    session: Session
+    ctx: RequestContext
 ) -> Tuple[DownloadGameFinishPayload, bool, str]:
-    # Any logged in player can finish downloads
-    user_info = session_user_map.get_user_by_session(session)
-    if not user_info:
-        return DownloadGameFinishPayload(payload.download_id), False, "Unauthenticated session"
-    role, username = user_info
-    if not username:
-        return DownloadGameFinishPayload(payload.download_id), False, "Unauthorized"
-    if role != Role.PLAYER:
-        return DownloadGameFinishPayload(payload.download_id), False, "Role not permitted"
+    username = ctx.username
     
     success = download_manager.finish_download(payload.download_id)
     if not success:
@@ -0,0 +1,12 @@
+import logging
+from protocol.payloads.session import HelloPayload
+from session.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+def handle_hello(payload: HelloPayload, session: Session) -> tuple[HelloPayload, bool, str | None]:
+	"""Enable the offered wire features this server also supports; the response lists the accepted ones."""
+	accepted = session.enable_features(payload.features)
+	logger.info(f"Hello: features={sorted(accepted)}, addr={session.peer_address}")
+	return HelloPayload(features=sorted(accepted)), True, None
@@ -4,16 +4,30 @@ from session.session import Session
 
 
 class Acceptor:
-    def __init__(self, addr):
+    def __init__(self, addr, backlog: int = 5):
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self._sock.bind(addr)
-        self._sock.listen(5)
+        self._sock.listen(backlog)
 
     def accept(self) -> tuple[Session, tuple[str, int]]:
-        client_sock, addr = self._sock.accept()
+        client_sock, addr = self.accept_socket()
         connector = FramedSocket(client_sock)
         return Session(connector), addr
 
+    def accept_socket(self) -> tuple[socket.socket, tuple[str, int]]:
+        """Accept a raw client socket (used by engines that wrap it themselves)."""
+        return self._sock.accept()
+
+    def get_socket(self) -> socket.socket:
+        """The listening socket (e.g. to hand to asyncio's create_server)."""
+        return self._sock
+
+    def setblocking(self, flag: bool):
+        self._sock.setblocking(flag)
+
+    def fileno(self) -> int:
+        return self._sock.fileno()
+
     def close(self):
         self._sock.close()
\ No newline at end of file
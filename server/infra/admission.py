@@ -0,0 +1,77 @@
+import threading
+from dataclasses import dataclass
+from typing import Hashable
+
+DEFAULT_MAX_CONNECTIONS = 1024
+DEFAULT_MAX_INFLIGHT_PER_SESSION = 8
+DEFAULT_MAX_QUEUED_REQUESTS = 1024
+
+SERVER_BUSY_ERROR = "Server busy"
+
+
+@dataclass
+class AdmissionLimits:
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    max_inflight_per_session: int = DEFAULT_MAX_INFLIGHT_PER_SESSION  # queued + running requests of one session
+    max_queued_requests: int = DEFAULT_MAX_QUEUED_REQUESTS  # queued + running requests of the whole server
+
+
+class AdmissionController:
+    """Counts connections and admitted requests against AdmissionLimits.
+
+    超過上限時不排隊：連線直接關閉、request 立即以 SERVER_BUSY_ERROR 回應，
+    讓登入潮或下載尖峰時的記憶體與執行緒用量維持在上限內。
+    """
+    def __init__(self, limits: AdmissionLimits | None = None):
+        self._limits = limits if limits is not None else AdmissionLimits()
+        self._lock = threading.Lock()
+        self._connections = 0
+        self._queued = 0
+        self._inflight: dict[Hashable, int] = {}
+        self._rejected_connections = 0
+        self._rejected_requests = 0
+
+    @property
+    def limits(self) -> AdmissionLimits:
+        return self._limits
+
+    def open_connection(self) -> bool:
+        with self._lock:
+            if self._connections >= self._limits.max_connections:
+                self._rejected_connections += 1
+                return False
+            self._connections += 1
+            return True
+
+    def close_connection(self) -> None:
+        with self._lock:
+            self._connections = max(0, self._connections - 1)
+
+    def admit(self, owner: Hashable) -> bool:
+        """Reserve a slot for one request of `owner` (a session); release() it when the response is sent."""
+        with self._lock:
+            inflight = self._inflight.get(owner, 0)
+            if inflight >= self._limits.max_inflight_per_session or self._queued >= self._limits.max_queued_requests:
+                self._rejected_requests += 1
+                return False
+            self._inflight[owner] = inflight + 1
+            self._queued += 1
+            return True
+
+    def release(self, owner: Hashable, count: int = 1) -> None:
+        with self._lock:
+            inflight = self._inflight.get(owner, 0) - count
+            if inflight > 0:
+                self._inflight[owner] = inflight
+            else:
+                self._inflight.pop(owner, None)
+            self._queued = max(0, self._queued - count)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "connections": self._connections,
+                "queued_requests": self._queued,
+                "rejected_connections": self._rejected_connections,
+                "rejected_requests": self._rejected_requests,
+            }
@@ -1,19 +1,73 @@
+import re
 import sqlite3
+import time
 import logging
 from typing import Optional
 from protocol.enums import Role
+from concurrent.futures import Future
+from .db_pool import ConnectionPool, QueryStats, DEFAULT_POOL_SIZE
+from .db_writer import DatabaseWriter, WriteOptions
 
 logger = logging.getLogger(__name__)
 
+# Search ranking weights for the (name, developer, description) columns
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
 class Database:
-    def __init__(self, db_path: str = "sweat.db"):
+    """SQLite access for the server.
+
+    Reads run on pooled connections (see ConnectionPool); mutations are queued to one DatabaseWriter,
+    which commits them in batches. The `*_async` methods return a Future instead of waiting for the commit.
+    """
+    def __init__(self, db_path: str = "sweat.db", pool_size: int = DEFAULT_POOL_SIZE, write_options: Optional[WriteOptions] = None):
         self._db_path = db_path
+        self._pool = ConnectionPool(db_path, pool_size)
+        self._stats = QueryStats()
+        self.search_backend = "fts5"  # or "like", decided by _init_db
         self._init_db()
+        self._writer = DatabaseWriter(db_path, write_options)
+
+    def query_stats(self) -> dict[str, tuple[int, float, float]]:
+        """Per-method (count, total seconds, max seconds), including the wait for a pooled connection."""
+        return self._stats.snapshot()
+
+    def pool_stats(self) -> dict[str, int | str]:
+        return {**self._pool.stats(), "journal_mode": self._pool.journal_mode}
+
+    def writer_stats(self) -> dict[str, float]:
+        return self._writer.stats()
+
+    def close(self):
+        self._writer.close()  # queued writes are committed first
+        self._pool.close()
+
+    def _execute(self, name: str, sql: str, params: tuple) -> "Future[bool]":
+        """Queue one statement on the writer; resolves to whether it changed a row."""
+        return self._write(name, lambda cursor: cursor.execute(sql, params).rowcount > 0)
+
+    def _write(self, name: str, mutation) -> "Future[bool]":
+        """Queue a mutation on the writer. Resolves to its result once committed, or False on any error
+        (IntegrityError, e.g. a taken name, is expected and not logged)."""
+        result: Future = Future()
+        start = time.perf_counter()
+
+        def done(write: Future):
+            self._stats.record(name, time.perf_counter() - start)
+            try:
+                result.set_result(write.result())
+            except sqlite3.IntegrityError:
+                result.set_result(False)
+            except Exception as e:
+                logger.error("Error in %s: %s", name, e)
+                result.set_result(False)
+
+        self._writer.submit(name, mutation).add_done_callback(done)
+        return result
 
     def _init_db(self):
         """Initialize the database schema."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 # Create players table
                 cursor.execute("""
@@ -43,6 +97,46 @@ class Database:
                         FOREIGN KEY(developer) REFERENCES developers(username)
                     )
                 """)
+                # Store pages are ordered by name (the primary key index); developer pages by (developer, name)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_developer ON games (developer, name)")
+                # Row counts maintained by triggers, so the store does not run COUNT(*) per request
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS counters (
+                        name TEXT PRIMARY KEY,
+                        value INTEGER NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS games_count_insert AFTER INSERT ON games
+                    BEGIN UPDATE counters SET value = value + 1 WHERE name = 'games'; END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS games_count_delete AFTER DELETE ON games
+                    BEGIN UPDATE counters SET value = value - 1 WHERE name = 'games'; END
+                """)
+                # Re-count once at startup (also fills the counter for databases created before it existed)
+                cursor.execute("INSERT OR REPLACE INTO counters (name, value) VALUES ('games', (SELECT COUNT(*) FROM games))")
+                # Search index over name, developer and description.txt; plain table + LIKE if SQLite lacks FTS5
+                try:
+                    cursor.execute("""
+                        CREATE VIRTUAL TABLE IF NOT EXISTS games_search
+                        USING fts5(name, developer, description, tokenize = 'unicode61 remove_diacritics 2')
+                    """)
+                    self.search_backend = "fts5"
+                except sqlite3.OperationalError:
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS games_search (
+                            name TEXT PRIMARY KEY,
+                            developer TEXT NOT NULL,
+                            description TEXT NOT NULL
+                        )
+                    """)
+                    self.search_backend = "like"
+                    logger.warning("SQLite has no FTS5; game search falls back to LIKE")
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS games_search_delete AFTER DELETE ON games
+                    BEGIN DELETE FROM games_search WHERE name = old.name; END
+                """)
                 conn.commit()
         except Exception as e:
             logger.exception("Failed to initialize database: %s", e)
@@ -51,7 +145,7 @@ class Database:
     def get_player(self, username: str) -> Optional[tuple[str, str]]:
         """Retrieve a player by username. Returns (username, password) or None."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._stats.measure("get_player"), self._pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT username, password FROM players WHERE username = ?", (username,))
                 return cursor.fetchone()
@@ -61,22 +155,15 @@ class Database:
         
     def create_player(self, username: str, password: str) -> bool:
         """Create a new player. Returns True if successful, False if username exists."""
-        try:
-            with sqlite3.connect(self._db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("INSERT INTO players (username, password) VALUES (?, ?)", (username, password))
-                conn.commit()
-                return True
-        except sqlite3.IntegrityError:
-            return False
-        except Exception as e:
-            logger.error("Error creating player %s: %s", username, e)
-            return False
+        return self.create_player_async(username, password).result()
+
+    def create_player_async(self, username: str, password: str) -> "Future[bool]":
+        return self._execute("create_player", "INSERT INTO players (username, password) VALUES (?, ?)", (username, password))
         
     def get_developer(self, username: str) -> Optional[tuple[str, str]]:
         """Retrieve a developer by username. Returns (username, password) or None."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._stats.measure("get_developer"), self._pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT username, password FROM developers WHERE username = ?", (username,))
                 return cursor.fetchone()
@@ -86,39 +173,22 @@ class Database:
         
     def create_developer(self, username: str, password: str) -> bool:
         """Create a new developer. Returns True if successful, False if username exists."""
-        try:
-            with sqlite3.connect(self._db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("INSERT INTO developers (username, password) VALUES (?, ?)", (username, password))
-                conn.commit()
-                return True
-        except sqlite3.IntegrityError:
-            return False
-        except Exception as e:
-            logger.error("Error creating developer %s: %s", username, e)
-            return False
+        return self.create_developer_async(username, password).result()
+
+    def create_developer_async(self, username: str, password: str) -> "Future[bool]":
+        return self._execute("create_developer", "INSERT INTO developers (username, password) VALUES (?, ?)", (username, password))
         
     def create_game(self, name: str, developer: str, version: str, min_players: int, max_players: int, client_zip_sha256: str, client_folder_sha256: str, file_path: str) -> bool:
         """Create a new game. Returns True if successful, False if game name exists."""
-        try:
-            with sqlite3.connect(self._db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO games (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path))
-                conn.commit()
-                return True
-        except sqlite3.IntegrityError:
-            return False
-        except Exception as e:
-            logger.error("Error creating game %s: %s", name, e)
-            return False
+        return self._execute("create_game", """
+            INSERT INTO games (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path)).result()
         
     def get_game(self, name: str) -> Optional[tuple[str, str, str, int, int, str, str, str]]:
         """Retrieve a game by name. Returns (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path) or None."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._stats.measure("get_game"), self._pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games WHERE name = ?", (name,))
                 row = cursor.fetchone()
@@ -132,32 +202,56 @@ class Database:
     def get_all_games(self) -> list[tuple[str, str, str, int, int, str, str, str]]:
         """Retrieve all games. Returns a list of (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path)."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games")
-                return cursor.fetchall()
+            return self.load_all_games()
         except Exception as e:
             logger.error("Error getting all games: %s", e)
             return []
 
+    def load_all_games(self) -> list[tuple[str, str, str, int, int, str, str, str]]:
+        """Like get_all_games, but errors propagate (a cache must not mistake a failed query for an empty table)."""
+        with self._stats.measure("get_all_games"), self._pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games ORDER BY name")
+            return cursor.fetchall()
+
     def get_all_games_paginated(self, page: int, page_size: int) -> list[tuple[str, str, str, int, int, str, str, str]]:
-        """Retrieve games for a specific page. Returns a list of (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path)."""
+        """Retrieve games for a specific page, ordered by name. Returns a list of (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path).
+
+        OFFSET still steps over every earlier row; deep pages should use get_games_after.
+        """
         try:
             offset = (page - 1) * page_size
-            with sqlite3.connect(self._db_path) as conn:
+            with self._stats.measure("get_all_games_paginated"), self._pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games LIMIT ? OFFSET ?", (page_size, offset))
+                cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games ORDER BY name LIMIT ? OFFSET ?", (page_size, offset))
                 return cursor.fetchall()
         except Exception as e:
             logger.error("Error getting paginated games: %s", e)
             return []
 
+    def get_games_after(self, after: Optional[str], limit: int) -> list[tuple[str, str, str, int, int, str, str, str]]:
+        """Keyset page: up to `limit` games whose name sorts after `after` (None for the first page), ordered by name.
+
+        直接從主鍵索引的 `after` 位置開始讀，任何深度的頁面成本都一樣。
+        """
+        try:
+            with self._stats.measure("get_games_after"), self._pool.connection() as conn:
+                cursor = conn.cursor()
+                if after is None:
+                    cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games ORDER BY name LIMIT ?", (limit,))
+                else:
+                    cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games WHERE name > ? ORDER BY name LIMIT ?", (after, limit))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error("Error getting games after %r: %s", after, e)
+            return []
+
     def get_total_games_count(self) -> int:
-        """Retrieve the total number of games."""
+        """Retrieve the total number of games (from the trigger-maintained counter)."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._stats.measure("get_total_games_count"), self._pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM games")
+                cursor.execute("SELECT value FROM counters WHERE name = 'games'")
                 return cursor.fetchone()[0]
         except Exception as e:
             logger.error("Error getting total games count: %s", e)
@@ -166,9 +260,9 @@ class Database:
     def get_games_by_developer(self, developer: str) -> list[tuple[str, str, str, int, int, str, str, str]]:
         """Retrieve all games by a specific developer."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._stats.measure("get_games_by_developer"), self._pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games WHERE developer = ?", (developer,))
+                cursor.execute("SELECT name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path FROM games WHERE developer = ? ORDER BY name", (developer,))
                 return cursor.fetchall()
         except Exception as e:
             logger.error("Error getting games for developer %s: %s", developer, e)
@@ -176,16 +270,65 @@ class Database:
         
     def set_game(self, name: str, version: str, min_players: int, max_players: int, client_zip_sha256: str, client_folder_sha256: str, file_path: str) -> bool:
         """Update an existing game's details. Returns True if successful, False otherwise."""
+        return self._execute("set_game", """
+            UPDATE games 
+            SET version = ?, min_players = ?, max_players = ?, client_zip_sha256 = ?, client_folder_sha256 = ?, file_path = ? 
+            WHERE name = ?
+        """, (version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path, name)).result()
+
+    def index_game_search(self, name: str, developer: str, description: str) -> bool:
+        """Insert or replace the search entry of a game. Returns True if successful."""
+        def mutation(cursor: sqlite3.Cursor) -> bool:
+            cursor.execute("DELETE FROM games_search WHERE name = ?", (name,))
+            cursor.execute("INSERT INTO games_search (name, developer, description) VALUES (?, ?, ?)", (name, developer, description))
+            return True
+        return self._write("index_game_search", mutation).result()
+
+    def get_search_indexed_names(self) -> set[str]:
+        """Names of the games that have a search entry."""
         try:
-            with sqlite3.connect(self._db_path) as conn:
+            with self._stats.measure("get_search_indexed_names"), self._pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE games 
-                    SET version = ?, min_players = ?, max_players = ?, client_zip_sha256 = ?, client_folder_sha256 = ?, file_path = ? 
-                    WHERE name = ?
-                """, (version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path, name))
-                conn.commit()
-                return cursor.rowcount > 0
+                cursor.execute("SELECT name FROM games_search")
+                return {row[0] for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error("Error listing search index: %s", e)
+            return set()
+
+    def search_games(self, query: str, limit: int, offset: int = 0) -> tuple[list[tuple[str, str, str, int, int, str, str, str]], int]:
+        """Games matching every word of `query` (prefix match), best first. Returns (one page of game rows, total matches).
+
+        FTS5 以 bm25 排序（名稱權重最高，其次開發者、描述）；沒有 FTS5 時以 LIKE 比對，名稱命中者優先。
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return [], 0
+        try:
+            with self._stats.measure("search_games"), self._pool.connection() as conn:
+                cursor = conn.cursor()
+                if self.search_backend == "fts5":
+                    match = " ".join('"' + term + '"*' for term in terms)
+                    cursor.execute("SELECT COUNT(*) FROM games_search WHERE games_search MATCH ?", (match,))
+                    total = cursor.fetchone()[0]
+                    cursor.execute("""
+                        SELECT g.name, g.developer, g.version, g.min_players, g.max_players, g.client_zip_sha256, g.client_folder_sha256, g.file_path
+                        FROM games_search JOIN games g ON g.name = games_search.name
+                        WHERE games_search MATCH ?
+                        ORDER BY bm25(games_search, ?, ?, ?), g.name LIMIT ? OFFSET ?
+                    """, (match, *SEARCH_WEIGHTS, limit, offset))
+                else:
+                    patterns = ["%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for term in terms]
+                    where = " AND ".join(["(s.name || ' ' || s.developer || ' ' || s.description) LIKE ? ESCAPE '\\'"] * len(patterns))
+                    cursor.execute(f"SELECT COUNT(*) FROM games_search s WHERE {where}", patterns)
+                    total = cursor.fetchone()[0]
+                    name_hits = " + ".join(["(s.name LIKE ? ESCAPE '\\')"] * len(patterns))
+                    cursor.execute(f"""
+                        SELECT g.name, g.developer, g.version, g.min_players, g.max_players, g.client_zip_sha256, g.client_folder_sha256, g.file_path
+                        FROM games_search s JOIN games g ON g.name = s.name
+                        WHERE {where}
+                        ORDER BY {name_hits} DESC, g.name LIMIT ? OFFSET ?
+                    """, (*patterns, *patterns, limit, offset))
+                return cursor.fetchall(), total
         except Exception as e:
-            logger.error("Error updating game %s: %s", name, e)
-            return False
+            logger.error("Error searching games for %r: %s", query, e)
+            return [], 0
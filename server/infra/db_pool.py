@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CACHED_STATEMENTS = 128  # prepared statements kept per connection by sqlite3
+
+# Applied to every pooled connection; journal_mode=WAL is persistent and set once by ConnectionPool.__init__.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",  # safe with WAL: a crash may lose the last commits, never corrupt the file
+    "PRAGMA cache_size = -8192",    # 8 MiB page cache per connection
+    "PRAGMA mmap_size = 67108864",  # read pages through a 64 MiB memory map
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived SQLite connections, checked out per query with connection().
+
+    連線只建立一次（開檔、解析 schema、套用 pragma），之後重複使用；sqlite3 內建的 statement cache
+    讓同一條 SQL 不必每次重新 prepare。WAL 模式下讀取與寫入互不阻塞。
+    """
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE, cached_statements: int = DEFAULT_CACHED_STATEMENTS):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self._db_path = db_path
+        self._size = size
+        self._cached_statements = cached_statements
+        self._idle: list[sqlite3.Connection] = []
+        self._cond = threading.Condition()
+        self._created = 0
+        self._closed = False
+        self.waits = 0  # checkouts that had to wait for a connection
+        with self.connection() as conn:
+            self.journal_mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection; an open transaction left by the caller is rolled back on return."""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._checkin(conn)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {"size": self._size, "open": self._created, "idle": len(self._idle), "waits": self.waits}
+
+    def close(self) -> None:
+        """Close idle connections now and checked-out ones when they come back."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def _checkout(self) -> sqlite3.Connection:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()  # most recently used: warmest page cache
+                if self._created < self._size:
+                    self._created += 1
+                    break
+                self.waits += 1
+                self._cond.wait()
+        try:
+            return self._open()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        with self._cond:
+            if not self._closed:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+            self._created -= 1
+        conn.close()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, check_same_thread=False, cached_statements=self._cached_statements)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+
+class QueryStats:
+    """Per-query count and latency (seconds) collected by Database."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, list] = {}  # name -> [count, total, max]
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, elapsed: float) -> None:
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    def snapshot(self) -> dict[str, tuple[int, float, float]]:
+        """name -> (count, total seconds, max seconds)"""
+        with self._lock:
+            return {name: (count, total, peak) for name, (count, total, peak) in self._stats.items()}
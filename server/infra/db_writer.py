@@ -0,0 +1,172 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from .db_pool import CONNECTION_PRAGMAS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WINDOW = 0.002  # seconds the writer waits for more mutations after the first one of a batch
+DEFAULT_MAX_BATCH = 256
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL")
+
+Mutation = Callable[[sqlite3.Cursor], Any]
+
+
+@dataclass(frozen=True)
+class WriteOptions:
+    """How DatabaseWriter trades latency and durability for throughput.
+
+    synchronous: SQLite `PRAGMA synchronous` of the writer connection (WAL mode):
+        FULL   - fsync on every commit; a committed batch survives a power loss.
+        NORMAL - (default) fsync at checkpoints only; a crash never corrupts the file, an OS crash may lose the last batches.
+        OFF    - no fsync at all.
+    Futures resolve only after the batch has committed, whatever the level.
+    """
+    batch_window: float = DEFAULT_BATCH_WINDOW
+    max_batch: int = DEFAULT_MAX_BATCH
+    synchronous: str = "NORMAL"
+
+
+class DatabaseWriter:
+    """Single writer thread applying queued mutations, many per transaction.
+
+    每個 mutation 在自己的 SAVEPOINT 內執行：失敗（例如 IntegrityError）只回滾它自己，同批其他寫入照常提交；
+    整批 COMMIT 成功後才把結果（或例外）交給對應的 Future。WAL 下一次 commit 一次 fsync，
+    所以註冊尖峰時吞吐量取決於批次數而不是寫入數。
+    """
+    def __init__(self, db_path: str, options: Optional[WriteOptions] = None):
+        self._options = options or WriteOptions()
+        if self._options.synchronous.upper() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {SYNCHRONOUS_LEVELS}")
+        if self._options.max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self._db_path = db_path
+        self._queue: queue.SimpleQueue[Optional[tuple[str, Mutation, Future]]] = queue.SimpleQueue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+        self.failed = 0  # mutations that raised (rolled back to their savepoint)
+        self.largest_batch = 0
+        self.commit_time = 0.0  # seconds spent in COMMIT
+        conn = self._open()  # fail here, not in the thread, if the file cannot be opened
+        self._thread = threading.Thread(target=self._run, args=(conn,), name="DatabaseWriter", daemon=True)
+        self._thread.start()
+
+    @property
+    def options(self) -> WriteOptions:
+        return self._options
+
+    def submit(self, name: str, mutation: Mutation) -> "Future[Any]":
+        """Queue `mutation(cursor)`; the Future gets its return value or exception once its batch has committed."""
+        future: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                future.set_exception(sqlite3.ProgrammingError("database writer is closed"))
+                return future
+            self._queue.put((name, mutation, future))
+        return future
+
+    def stats(self) -> dict[str, float]:
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "writes": self.writes,
+                "failed": self.failed,
+                "largest_batch": self.largest_batch,
+                "avg_batch": self.writes / self.batches if self.batches else 0.0,
+                "avg_commit_ms": self.commit_time / self.batches * 1000 if self.batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+    def close(self) -> None:
+        """Apply everything already queued, then stop the writer thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, check_same_thread=False, isolation_level=None)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(f"PRAGMA synchronous = {self._options.synchronous.upper()}")
+        return conn
+
+    def _run(self, conn: sqlite3.Connection) -> None:
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._apply(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _next_batch(self) -> tuple[list[tuple[str, Mutation, Future]], bool]:
+        """Block for one mutation, then collect more until the batch window ends or the batch is full."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self._options.batch_window
+        while len(batch) < self._options.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _apply(self, conn: sqlite3.Connection, batch: list[tuple[str, Mutation, Future]]) -> None:
+        outcomes: list[tuple[Future, bool, Any]] = []
+        failed = 0
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for name, mutation, future in batch:
+                cursor.execute("SAVEPOINT mutation")
+                try:
+                    outcomes.append((future, True, mutation(cursor)))
+                    cursor.execute("RELEASE mutation")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO mutation")
+                    cursor.execute("RELEASE mutation")
+                    if not isinstance(e, sqlite3.IntegrityError):
+                        logger.error("Write %s failed: %s", name, e)
+                    outcomes.append((future, False, e))
+                    failed += 1
+            start = time.perf_counter()
+            cursor.execute("COMMIT")
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            # BEGIN/COMMIT itself failed: nothing of this batch was written
+            logger.exception("Write batch of %d failed: %s", len(batch), e)
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        with self._stats_lock:
+            self.batches += 1
+            self.writes += len(batch)
+            self.failed += failed
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.commit_time += elapsed
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
@@ -0,0 +1,95 @@
+import logging
+import threading
+from typing import Iterable
+from protocol.message import Message
+from session.session import Session
+from session.broadcast import broadcast
+
+LOBBY_TOPIC = "lobby"
+
+logger = logging.getLogger(__name__)
+
+
+def room_topic(room_id: str) -> str:
+    return f"room:{room_id}"
+
+
+class EventBus:
+    """Server-side pub/sub: topics map to the sessions of the players subscribed to them.
+
+    - `lobby`：所有已登入的玩家（登入時 attach，登出/斷線時 detach）。
+    - `room:<id>`：房間內的玩家，由 RoomManager 在建立/加入/離開房間時維護。
+
+    訂閱者集合以 frozenset 整個替換（copy-on-write），publish() 取快照後不持有鎖就能送出，
+    事件只送給該 topic 的訂閱者，不再掃描所有 session。
+    """
+    def __init__(self):
+        self._topics: dict[str, frozenset[Session]] = {}
+        self._sessions: dict[str, Session] = {}  # username -> session of attached players
+        self._memberships: dict[str, set[str]] = {}  # username -> topics
+        self._lock = threading.Lock()
+
+    def attach(self, username: str, session: Session) -> None:
+        """Register a logged-in player's session and subscribe it to the lobby."""
+        with self._lock:
+            self._sessions[username] = session
+            self._memberships.setdefault(username, set())
+        self.subscribe(LOBBY_TOPIC, username)
+
+    def detach(self, username: str) -> None:
+        """Drop a player from every topic (logout / disconnect)."""
+        with self._lock:
+            session = self._sessions.pop(username, None)
+            topics = self._memberships.pop(username, set())
+            if session is None:
+                return
+            for topic in topics:
+                self._remove_locked(topic, session)
+
+    def subscribe(self, topic: str, username: str) -> None:
+        with self._lock:
+            session = self._sessions.get(username)
+            if session is None:
+                logger.debug(f"Subscribe ignored: user={username} has no attached session, topic={topic}")
+                return
+            self._topics[topic] = self._topics.get(topic, frozenset()) | {session}
+            self._memberships[username].add(topic)
+
+    def unsubscribe(self, topic: str, username: str) -> None:
+        with self._lock:
+            session = self._sessions.get(username)
+            if session is None:
+                return
+            self._memberships[username].discard(topic)
+            self._remove_locked(topic, session)
+
+    def drop_topic(self, topic: str) -> None:
+        """Forget a topic and all of its subscriptions (e.g. a deleted room)."""
+        with self._lock:
+            sessions = self._topics.pop(topic, frozenset())
+            for username, session in self._sessions.items():
+                if session in sessions:
+                    self._memberships[username].discard(topic)
+
+    def subscribers(self, topic: str) -> frozenset[Session]:
+        return self._topics.get(topic, frozenset())
+
+    def publish(self, topic: str, message: Message, *, exclude: Iterable[str] = ()) -> int:
+        """Send `message` to the topic's subscribers except the players in `exclude`; returns how many got it."""
+        targets = self._topics.get(topic, frozenset())
+        if exclude:
+            sessions = self._sessions
+            targets = targets.difference(sessions.get(username) for username in exclude)
+        if not targets:
+            return 0
+        return broadcast(message, targets)
+
+    def _remove_locked(self, topic: str, session: Session) -> None:
+        subscribers = self._topics.get(topic)
+        if subscribers is None or session not in subscribers:
+            return
+        subscribers = subscribers - {session}
+        if subscribers:
+            self._topics[topic] = subscribers
+        else:
+            del self._topics[topic]
@@ -0,0 +1,236 @@
+import logging
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, Optional
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+GameRow = tuple[str, str, str, int, int, str, str, str]  # same columns as Database.get_game
+
+DEFAULT_ASSET_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class _Snapshot:
+    """Immutable view of the whole catalog; replaced as a unit on every write."""
+    __slots__ = ("by_name", "order", "names", "by_developer")
+
+    def __init__(self, rows: list[GameRow]):
+        self.order: tuple[GameRow, ...] = tuple(sorted(rows, key=lambda row: row[0]))  # store order: by name
+        self.names: tuple[str, ...] = tuple(row[0] for row in self.order)  # for keyset lookups
+        self.by_name: dict[str, GameRow] = {row[0]: row for row in rows}
+        self.by_developer: dict[str, tuple[GameRow, ...]] = {}
+        for row in self.order:
+            self.by_developer[row[1]] = self.by_developer.get(row[1], ()) + (row,)
+
+
+class GameCatalog:
+    """Read-through, write-through cache of the games table in front of Database.
+
+    第一次查詢時把整個 games 表載入記憶體（依名稱、開發者、商店順序建立索引），之後的查詢都不碰 SQLite；
+    create_game / set_game 先寫入資料庫，成功後再更新快取；等待寫入時不持有 `_lock`，查詢不會被上傳卡住。
+    遊戲目錄下的 cover.png、description.txt 也以 LRU（總大小上限 `asset_cache_bytes`）快取，遊戲更新時一併失效。
+    """
+    def __init__(self, db: Database, asset_cache_bytes: int = DEFAULT_ASSET_CACHE_BYTES):
+        self._db = db
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()  # loads and snapshot swaps; never held while waiting on the database writer
+        self._write_lock = threading.Lock()  # keeps catalog writes in commit order
+        self._assets: OrderedDict[tuple[str, str], Optional[bytes]] = OrderedDict()
+        self._assets_lock = threading.Lock()
+        self._asset_bytes = 0
+        self._asset_cache_bytes = asset_cache_bytes
+        self.hits = 0
+        self.misses = 0
+        self.asset_hits = 0
+        self.asset_misses = 0
+        self.invalidations = 0
+        self._search_synced = False
+        self._search_sync_lock = threading.Lock()
+
+    # --- games table ---
+    def get_game(self, name: str) -> Optional[GameRow]:
+        return self._view().by_name.get(name)
+
+    def get_all_games(self) -> list[GameRow]:
+        return list(self._view().order)
+
+    def get_all_games_paginated(self, page: int, page_size: int) -> list[GameRow]:
+        offset = (page - 1) * page_size
+        if offset < 0 or page_size < 0:
+            return []
+        return list(self._view().order[offset:offset + page_size])
+
+    def get_games_after(self, after: Optional[str], limit: int) -> list[GameRow]:
+        """Keyset page, same contract as Database.get_games_after."""
+        view = self._view()
+        start = 0 if after is None else bisect_right(view.names, after)
+        return list(view.order[start:start + max(limit, 0)])
+
+    def get_total_games_count(self) -> int:
+        return len(self._view().order)
+
+    def get_games_by_developer(self, developer: str) -> list[GameRow]:
+        return list(self._view().by_developer.get(developer, ()))
+
+    def create_game(self, name: str, developer: str, version: str, min_players: int, max_players: int,
+                    client_zip_sha256: str, client_folder_sha256: str, file_path: str) -> bool:
+        with self._write_lock:
+            ok = self._db.create_game(name, developer, version, min_players, max_players,
+                                      client_zip_sha256, client_folder_sha256, file_path)
+            if ok:
+                row = (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path)
+                self._replace_row(name, lambda _: row)
+        if ok:
+            self.invalidate_assets(name)
+            self._index_search(name, developer)
+        return ok
+
+    def set_game(self, name: str, version: str, min_players: int, max_players: int,
+                 client_zip_sha256: str, client_folder_sha256: str, file_path: str) -> bool:
+        with self._write_lock:
+            ok = self._db.set_game(name, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path)
+            if ok:
+                self._replace_row(name, lambda row: row and (row[0], row[1], version, min_players, max_players,
+                                                             client_zip_sha256, client_folder_sha256, file_path))
+        if ok:
+            self.invalidate_assets(name)
+            game = self.get_game(name)
+            if game is not None:
+                self._index_search(name, game[1])
+        return ok
+
+    def invalidate(self) -> None:
+        """Forget everything; the next query reloads the games table."""
+        with self._lock:
+            self._snapshot = None
+        with self._assets_lock:
+            self._assets.clear()
+            self._asset_bytes = 0
+            self.invalidations += 1
+
+    # --- search ---
+    def search(self, query: str, page: int, page_size: int) -> tuple[list[GameRow], int]:
+        """One page of games matching `query`, best match first, and the total number of matches.
+
+        搜尋直接查資料庫的索引（不經過快照）；第一次搜尋時補上索引中缺少的遊戲（例如索引建立前就上傳的遊戲）。
+        """
+        offset = (page - 1) * page_size
+        if offset < 0 or page_size <= 0:
+            return [], 0
+        if not self._search_synced:
+            self._sync_search_index()
+        return self._db.search_games(query, page_size, offset)
+
+    def _sync_search_index(self) -> None:
+        with self._search_sync_lock:
+            if self._search_synced:
+                return
+            indexed = self._db.get_search_indexed_names()
+            missing = [row for row in self._db.load_all_games() if row[0] not in indexed]
+            added = sum(self._index_search(row[0], row[1]) for row in missing)
+            if added:
+                logger.info("Search index: added %d games", added)
+            # a game that could not be indexed is retried on the next search
+            self._search_synced = added == len(missing)
+
+    def _index_search(self, name: str, developer: str) -> bool:
+        try:
+            data = self.get_asset(name, "description.txt")
+        except OSError as e:
+            logger.warning("Cannot read description of %s for the search index: %s", name, e)
+            data = None
+        description = data.decode("utf-8", errors="replace") if data else ""
+        return self._db.index_game_search(name, developer, description)
+
+    # --- files in the game directory ---
+    def get_asset(self, name: str, filename: str) -> Optional[bytes]:
+        """Contents of `filename` in the game's directory, or None if the game or the file does not exist.
+
+        Raises OSError when the file exists but cannot be read.
+        """
+        key = (name, filename)
+        with self._assets_lock:
+            if key in self._assets:
+                self._assets.move_to_end(key)
+                self.asset_hits += 1
+                return self._assets[key]
+        generation = self.invalidations  # before the lookup, so a concurrent update cannot leave a stale file cached
+        game = self.get_game(name)
+        if game is None:
+            return None
+        path = os.path.join(game[7], filename)
+        self.asset_misses += 1
+        try:
+            with open(path, "rb") as f:
+                data: Optional[bytes] = f.read()
+        except FileNotFoundError:
+            data = None
+        self._store_asset(key, data, generation)
+        return data
+
+    def invalidate_assets(self, name: str) -> None:
+        with self._assets_lock:
+            for key in [key for key in self._assets if key[0] == name]:
+                data = self._assets.pop(key)
+                self._asset_bytes -= len(data) if data else 0
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, int]:
+        snapshot = self._snapshot
+        with self._assets_lock:
+            return {
+                "games": len(snapshot.order) if snapshot is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "asset_entries": len(self._assets),
+                "asset_bytes": self._asset_bytes,
+                "asset_hits": self.asset_hits,
+                "asset_misses": self.asset_misses,
+                "invalidations": self.invalidations,
+            }
+
+    def _view(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self.misses += 1
+                self._snapshot = _Snapshot(self._db.load_all_games())
+                logger.info("Game catalog loaded: %d games", len(self._snapshot.order))
+            else:
+                self.hits += 1
+            return self._snapshot
+
+    def _replace_row(self, name: str, update: Callable[[Optional[GameRow]], Optional[GameRow]]) -> None:
+        """Swap in a snapshot where `name` is `update(current row)`.
+
+        A load running while the write was committing may already contain the new row, so this replaces
+        by name instead of appending.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                return
+            row = update(self._snapshot.by_name.get(name))
+            if row is None:
+                return
+            self._snapshot = _Snapshot([*(r for r in self._snapshot.order if r[0] != name), row])
+
+    def _store_asset(self, key: tuple[str, str], data: Optional[bytes], generation: int) -> None:
+        size = len(data) if data else 0
+        if size > self._asset_cache_bytes:
+            return
+        with self._assets_lock:
+            if generation != self.invalidations:
+                return  # the game changed while the file was being read
+            old = self._assets.pop(key, None)
+            self._asset_bytes -= len(old) if old else 0
+            self._assets[key] = data
+            self._asset_bytes += size
+            while self._asset_bytes > self._asset_cache_bytes:
+                _, evicted = self._assets.popitem(last=False)
+                self._asset_bytes -= len(evicted) if evicted else 0
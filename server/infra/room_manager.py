@@ -2,12 +2,17 @@ import logging
 import threading
 import random
 import string
+from collections import deque
 from dataclasses import dataclass
 from .errors import *
-from protocol.enums import RoomStatus
+from .event_bus import EventBus, LOBBY_TOPIC, room_topic
+from protocol.enums import Action, RoomStatus
+from protocol.message import Message
+from protocol.payloads.events import RoomCreatedEventPayload, RoomRemovedEventPayload, RoomUpdatedEventPayload, MyRoomUpdatedEventPayload
 
 ROOM_ID_GENERATION_MAX_ATTEMPTS = 36 ** 5 # 60,466,176
 ROOM_ID_LENGTH = 5
+LOBBY_CHANGE_LOG_SIZE = 1024  # changes kept for FETCH_ROOM_CHANGES; older versions get a full snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +25,31 @@ class Room:
     status: RoomStatus = RoomStatus.WAITING
 
 class RoomManager:
-    def __init__(self):
+    """Rooms and their players; every membership change is published on the EventBus.
+
+    房間建立/加入/離開時同步維護 `room:<id>` 的訂閱，並發佈 ROOM_CREATED / ROOM_REMOVED / ROOM_UPDATED
+    （給 lobby 中不在該房間的玩家）與 MY_ROOM_UPDATED（給房間內的玩家）。
+    事件內容在鎖內取快照，送出則在鎖外進行。
+
+    lobby 中可見的每次變動（建立、人數/房主變更、移除）都會讓 lobby version 加一並記入有上限的 change log；
+    lobby 事件帶有該 version，客戶端發現跳號時以 changes_since() 補齊差異，不必重抓整個房間列表。
+    """
+    def __init__(self, event_bus: EventBus | None = None):
+        self._event_bus = event_bus if event_bus is not None else EventBus()
         self._rooms: dict[str, Room] = {}
         self._player_room_map: dict[str, str] = {}
         self._free_ids: list[str] = [] # Cache of pre-validated IDs
         self._room_player_lock = threading.Lock()
         self._id_pool_lock = threading.Lock()
+        self._lobby_version = 0
+        self._change_log: deque[tuple[int, str]] = deque(maxlen=LOBBY_CHANGE_LOG_SIZE)  # (version, room_id)
+        self._snapshot: tuple[int, list[tuple[str, str, str, int, int, str]]] | None = None
         self._fill_id_pool()
 
+    @property
+    def event_bus(self) -> EventBus:
+        return self._event_bus
+
     def _fill_id_pool(self, batch_size=100):
         chars = string.digits + string.ascii_lowercase
         new_ids = []
@@ -72,17 +94,25 @@ class RoomManager:
             attempts += 1
         raise RoomIDGenerationError("Failed to generate unique room ID after maximum attempts")
 
-    def create_room(self, host_username: str, game_name: str, max_players: int) -> str:
+    def create_room(self, host_username: str, game_name: str, max_players: int) -> tuple[str, int]:
+        """Returns (room_id, lobby version of the ROOM_CREATED); the host is not sent the event and adopts the version from its response."""
         if host_username in self._player_room_map:
             logger.warning(f"Create room failed: user {host_username} is already in a room")
             raise PlayerAlreadyInRoomError(f"User {host_username} is already in a room")
         room_id = self._generate_room_id()
         with self._room_player_lock:
-            self._rooms[room_id] = Room(
-                host=host_username, game_name=game_name, players=[host_username], max_players=max_players)
+            room = Room(host=host_username, game_name=game_name, players=[host_username], max_players=max_players)
+            self._rooms[room_id] = room
             self._player_room_map[host_username] = room_id
+            created_event = Message.event(Action.ROOM_CREATED, RoomCreatedEventPayload(
+                room_id=room_id, host_username=room.host, game_name=room.game_name,
+                current_players=len(room.players), max_players=room.max_players, status=room.status.value,
+                version=self._bump_version_locked(room_id)))
         logger.info(f"Room created: room_id={room_id}, host={host_username}, game={game_name}")
-        return room_id
+        self._event_bus.subscribe(room_topic(room_id), host_username)
+        # the creator learns about the room from its response
+        self._event_bus.publish(LOBBY_TOPIC, created_event, exclude=(host_username,))
+        return room_id, created_event.payload.version
     
     def add_player_to_room(self, room_id: str, username: str) -> None:
         with self._room_player_lock:
@@ -99,9 +129,15 @@ class RoomManager:
             room.players.append(username)
             self._player_room_map[username] = room_id
             logger.info(f"User {username} added to room {room_id}")
+            members = room.players.copy()
+            room_updated, my_room_updated = self._room_update_events(room_id, room)
+        self._event_bus.subscribe(room_topic(room_id), username)
+        self._event_bus.publish(LOBBY_TOPIC, room_updated, exclude=members)
+        self._event_bus.publish(room_topic(room_id), my_room_updated)
 
 
-    def remove_player_from_room(self, room_id: str, username: str) -> None:
+    def remove_player_from_room(self, room_id: str, username: str) -> int:
+        """Returns the lobby version of the resulting ROOM_UPDATED / ROOM_REMOVED, which the leaver is not sent."""
         with self._room_player_lock:
             room = self._rooms.get(room_id)
             if not room:
@@ -120,7 +156,90 @@ class RoomManager:
             else:
                 logger.warning(f"Leave room failed: user {username} not in room {room_id}")
                 raise PlayerNotInRoomError(f"User {username} is not in room {room_id}")
-            
+            deleted = not room.players
+            members = room.players.copy()
+            if deleted:
+                removed_event = Message.event(Action.ROOM_REMOVED, RoomRemovedEventPayload(
+                    room_id=room_id, version=self._bump_version_locked(room_id)))
+            else:
+                room_updated, my_room_updated = self._room_update_events(room_id, room)
+
+        topic = room_topic(room_id)
+        self._event_bus.unsubscribe(topic, username)
+        if deleted:
+            self._event_bus.drop_topic(topic)
+            self._event_bus.publish(LOBBY_TOPIC, removed_event, exclude=(username,))
+            return removed_event.payload.version
+        # players outside the room see the new player count, players inside see the new member list
+        self._event_bus.publish(LOBBY_TOPIC, room_updated, exclude=[username, *members])
+        self._event_bus.publish(topic, my_room_updated)
+        return room_updated.payload.version
+
+    def _room_update_events(self, room_id: str, room: Room) -> tuple[Message, Message]:
+        """ROOM_UPDATED / MY_ROOM_UPDATED for the room's current state; call with _room_player_lock held.
+
+        members get MY_ROOM_UPDATED instead of ROOM_UPDATED, so it carries the lobby version they skip."""
+        version = self._bump_version_locked(room_id)
+        room_updated = Message.event(Action.ROOM_UPDATED, RoomUpdatedEventPayload(
+            room_id=room_id, host_username=room.host, game_name=room.game_name,
+            current_players=len(room.players), max_players=room.max_players, status=room.status.value,
+            version=version))
+        my_room_updated = Message.event(Action.MY_ROOM_UPDATED, MyRoomUpdatedEventPayload(
+            host_username=room.host, game_name=room.game_name, players=room.players.copy(),
+            max_players=room.max_players, status=room.status.value, lobby_version=version))
+        return room_updated, my_room_updated
+
+    def _bump_version_locked(self, room_id: str) -> int:
+        self._lobby_version += 1
+        self._change_log.append((self._lobby_version, room_id))
+        self._snapshot = None
+        return self._lobby_version
+
+    @staticmethod
+    def _room_row(room_id: str, room: Room) -> tuple[str, str, str, int, int, str]:
+        return (room_id, room.host, room.game_name, len(room.players), room.max_players, room.status.value)
+
+    @property
+    def lobby_version(self) -> int:
+        with self._room_player_lock:
+            return self._lobby_version
+
+    def lobby_snapshot(self) -> tuple[int, list[tuple[str, str, str, int, int, str]]]:
+        """(version, room rows); the rows are built once per version and shared, do not modify them."""
+        with self._room_player_lock:
+            return self._snapshot_locked()
+
+    def _snapshot_locked(self) -> tuple[int, list[tuple[str, str, str, int, int, str]]]:
+        if self._snapshot is None:
+            self._snapshot = (self._lobby_version, [self._room_row(rid, room) for rid, room in self._rooms.items()])
+        return self._snapshot
+
+    def changes_since(self, version: int) -> tuple[int, bool, list[tuple[str, str, str, int, int, str]], list[str]]:
+        """Rooms changed after `version` as (current version, full, changed rows, removed room ids).
+
+        `version` 已不在 change log 範圍內（或比目前還新）時回傳完整快照，full=True。
+        """
+        with self._room_player_lock:
+            current = self._lobby_version
+            if version == current:
+                return current, False, [], []
+            oldest = self._change_log[0][0] if self._change_log else current + 1
+            if version > current or version < oldest - 1:
+                return current, True, self._snapshot_locked()[1], []
+            changed: set[str] = set()
+            for logged_version, room_id in reversed(self._change_log):
+                if logged_version <= version:
+                    break
+                changed.add(room_id)
+            rows, removed = [], []
+            for room_id in changed:
+                room = self._rooms.get(room_id)
+                if room:
+                    rows.append(self._room_row(room_id, room))
+                else:
+                    removed.append(room_id)
+            return current, False, rows, removed
+
     def get_all_rooms(self) -> dict[str, Room]:
         with self._room_player_lock:
             return self._rooms.copy()
@@ -1,77 +1,78 @@
 from session.session import Session
-from .bijection_map import BijectionMap
 from protocol.enums import Role
 import threading
 
+
 class SessionUserMap:
-    def __init__(self):
-        self._session_indeterminate: set[Session] = set()
-        self._session_indeterminate_lock = threading.Lock()
+    """Connected sessions and the (role, username) each one is logged in as.
 
-        self._role_bijection_map: dict[Role, BijectionMap[Session, str]] = {
-            Role.PLAYER: BijectionMap(),
-            Role.DEVELOPER: BijectionMap(),
-        }
+    主索引 `session -> (role, username)`（尚未登入為 None），另有每個角色的 `username -> session` 次索引。
+    寫入（連線、登入、登出、斷線）都在鎖內進行：主索引就地修改（單一 dict get/set 在 GIL 下是原子的，
+    連線風暴時不必每次複製整個 dict）；只有已登入使用者的角色次索引以 copy-on-write 整個替換，
+    讓 get_all_player_sessions() 等列舉不必加鎖。單筆查詢都不需要鎖，是 O(1) 且不互相競爭。
+    """
+    def __init__(self):
+        self._write_lock = threading.Lock()
+        self._users: dict[Session, tuple[Role, str] | None] = {}
+        self._sessions_by_role: dict[Role, dict[str, Session]] = {role: {} for role in Role}
 
     def add_session(self, session: Session):
-        with self._session_indeterminate_lock:
-            self._session_indeterminate.add(session)
+        with self._write_lock:
+            if session in self._users:
+                return
+            self._users[session] = None
 
     def remove_session(self, session: Session):
-        with self._session_indeterminate_lock:
-            if session in self._session_indeterminate:
-                self._session_indeterminate.discard(session)
+        with self._write_lock:
+            if session not in self._users:
                 return
+            user_info = self._users.pop(session)
+            if user_info is not None:
+                self._unindex_locked(*user_info)
 
-        for bmap in self._role_bijection_map.values():
-            if bmap.get_by_key1(session):
-                bmap.remove_by_key1(session)
-                return
     def move_session_to_user(self, session: Session, role: Role, username: str):
-        with self._session_indeterminate_lock:
-            self._session_indeterminate.remove(session) # raise KeyError if not present
-        
-        self._role_bijection_map[role].add(session, username)
+        """Mark a connected session as logged in; KeyError if it is unknown or logged in, or the user is taken."""
+        with self._write_lock:
+            if session not in self._users or self._users[session] is not None:
+                raise KeyError("Session is not connected or already logged in")
+            by_username = self._sessions_by_role[role]
+            if username in by_username:
+                raise KeyError("User is already logged in")
+            by_username = dict(by_username)
+            by_username[username] = session
+            self._sessions_by_role = {**self._sessions_by_role, role: by_username}
+            self._users[session] = (role, username)
 
     def move_session_back(self, session: Session):
-        # Find which role it belongs to
-        found = False
-        for bmap in self._role_bijection_map.values():
-            if bmap.get_by_key1(session):
-                bmap.remove_by_key1(session)
-                found = True
-                break
-        
-        if found:
-            with self._session_indeterminate_lock:
-                self._session_indeterminate.add(session)
+        with self._write_lock:
+            user_info = self._users.get(session)
+            if user_info is None:
+                return
+            self._unindex_locked(*user_info)
+            self._users[session] = None
 
     def get_session_by_user(self, role: Role, username: str) -> Session | None:
-        return self._role_bijection_map[role].get_by_key2(username)
-        
+        return self._sessions_by_role[role].get(username)
+
     def get_user_by_session(self, session: Session) -> tuple[Role, str] | None:
-        for role, bmap in self._role_bijection_map.items():
-            username = bmap.get_by_key1(session)
-            if username:
-                return role, username
-        return None
+        return self._users.get(session)
 
     def get_all_sessions(self) -> list[Session]:
-        sessions = []
-        with self._session_indeterminate_lock:
-            sessions.extend(self._session_indeterminate)
-        for bmap in self._role_bijection_map.values():
-            sessions.extend(bmap.get_all_key1s())
-        return sessions
-    
+        with self._write_lock:  # the dict changes in place; copy it while no one writes
+            return list(self._users)
+
     def get_all_player_sessions(self) -> list[Session]:
-        return self._role_bijection_map[Role.PLAYER].get_all_key1s()
-    
+        return list(self._sessions_by_role[Role.PLAYER].values())
+
     def get_all_developer_sessions(self) -> list[Session]:
-        return self._role_bijection_map[Role.DEVELOPER].get_all_key1s()
-        
+        return list(self._sessions_by_role[Role.DEVELOPER].values())
+
     def clear_all(self):
-        with self._session_indeterminate_lock:
-            self._session_indeterminate.clear()
-        for bmap in self._role_bijection_map.values():
-            bmap.clear()
\ No newline at end of file
+        with self._write_lock:
+            self._users = {}
+            self._sessions_by_role = {role: {} for role in Role}
+
+    def _unindex_locked(self, role: Role, username: str):
+        by_username = dict(self._sessions_by_role[role])
+        by_username.pop(username, None)
+        self._sessions_by_role = {**self._sessions_by_role, role: by_username}
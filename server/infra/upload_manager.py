@@ -1,9 +1,10 @@
 import uuid
 import os
 import time
+import hashlib
 import threading
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
 @dataclass
 class UploadState:
@@ -18,6 +19,8 @@ class UploadState:
     current_size: int
     temp_file_path: str
     last_activity: float
+    hasher: Any = field(default_factory=hashlib.sha256, repr=False)  # SHA256 of the bytes appended so far
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)  # orders appends of this upload
 
 class UploadManager:
     def __init__(self, temp_dir: str = "server\\temp_uploads"):
@@ -63,10 +66,12 @@ class UploadManager:
             state.last_activity = time.time()
             
         try:
-            with open(state.temp_file_path, "ab") as f:
-                f.write(data)
-            
-            with self._lock:
+            # 寫入與雜湊在同一把（每個上傳各自的）鎖內，檔案內容與 hasher 的順序一致；
+            # 完成上傳時不必再把整個檔案讀一遍
+            with state.lock:
+                with open(state.temp_file_path, "ab") as f:
+                    f.write(data)
+                state.hasher.update(data)
                 state.current_size += len(data)
                 
             return True
@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from typing import Callable, Hashable, Optional, Sequence
+from protocol.errors import SchemaError
+from protocol.json_codec import response_placeholder
+from .context import RequestContext, HandlerResult
+
+logger = logging.getLogger(__name__)
+
+Next = Callable[[RequestContext], HandlerResult]
+Middleware = Callable[[RequestContext, Next], HandlerResult]
+
+SLOW_REQUEST_SECONDS = 1.0
+DEFAULT_RATE_PER_SECOND = 50.0
+DEFAULT_RATE_BURST = 100
+MAX_RATE_BUCKETS = 4096
+
+
+def failure(ctx: RequestContext, error: str) -> HandlerResult:
+    """Failed result answered from the header alone; the request payload is never decoded."""
+    assert ctx.message.action is not None
+    return response_placeholder(ctx.message.action), False, error
+
+
+def _name(middleware: Middleware) -> str:
+    return getattr(middleware, "name", None) or getattr(middleware, "__name__", type(middleware).__name__)
+
+
+class MiddlewareStats:
+    """Calls and self time (excluding the rest of the chain) of every middleware in a Pipeline."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, int] = {}
+        self._seconds: dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            self._seconds[name] = self._seconds.get(name, 0.0) + seconds
+
+    def snapshot(self) -> dict[str, tuple[int, float]]:
+        with self._lock:
+            return {name: (calls, self._seconds[name]) for name, calls in self._calls.items()}
+
+
+class Pipeline:
+    """Runs a RequestContext through the middleware in order, then the route's handler.
+
+    每個 middleware 的自身耗時（扣掉後面的 middleware 與 handler）都記錄在 stats 中。
+    """
+    def __init__(self, middlewares: Sequence[Middleware] = ()):
+        self._middlewares: list[Middleware] = list(middlewares)
+        self.stats = MiddlewareStats()
+        self._chain = self._build()
+
+    def use(self, middleware: Middleware) -> None:
+        """Append a middleware; it runs after the existing ones, right before the handler."""
+        self._middlewares.append(middleware)
+        self._chain = self._build()
+
+    def __call__(self, ctx: RequestContext) -> HandlerResult:
+        return self._chain(ctx)
+
+    def _build(self) -> Next:
+        chain: Next = lambda ctx: ctx.route.handler(ctx)
+        for middleware in reversed(self._middlewares):
+            chain = self._measured(_name(middleware), middleware, chain)
+        return chain
+
+    def _measured(self, name: str, middleware: Middleware, next_: Next) -> Next:
+        stats = self.stats
+
+        def call(ctx: RequestContext) -> HandlerResult:
+            inner = 0.0
+
+            def timed_next(c: RequestContext) -> HandlerResult:
+                nonlocal inner
+                t = time.perf_counter()
+                try:
+                    return next_(c)
+                finally:
+                    inner += time.perf_counter() - t
+
+            t0 = time.perf_counter()
+            try:
+                return middleware(ctx, timed_next)
+            finally:
+                stats.record(name, time.perf_counter() - t0 - inner)
+        return call
+
+
+def error_mapping(ctx: RequestContext, next_: Next) -> HandlerResult:
+    """Turn a malformed payload or an unexpected handler exception into a failed response."""
+    try:
+        return next_(ctx)
+    except SchemaError as e:
+        return failure(ctx, f"Invalid payload: {e}")
+    except Exception:
+        logger.exception(f"Handler error: action={ctx.message.action}, trace={ctx.trace_id}, addr={ctx.addr}")
+        return failure(ctx, "Internal server error")
+
+
+def auth(ctx: RequestContext, next_: Next) -> HandlerResult:
+    """Enforce the route's declared roles before the payload is decoded."""
+    roles = ctx.route.roles
+    if roles is not None:
+        if not ctx.authenticated:
+            return failure(ctx, "Unauthenticated session")
+        if ctx.role not in roles:
+            logger.warning(f"Rejected {ctx.message.action}: role={ctx.role} user={ctx.username}, addr={ctx.addr}")
+            return failure(ctx, "Role not permitted")
+    return next_(ctx)
+
+
+class Timing:
+    """Per-action request count and latency; requests slower than `slow_seconds` are logged."""
+    name = "timing"
+
+    def __init__(self, slow_seconds: float = SLOW_REQUEST_SECONDS):
+        self._slow_seconds = slow_seconds
+        self._lock = threading.Lock()
+        self._stats: dict[str, list] = {}  # action value -> [count, total seconds, max seconds]
+
+    def __call__(self, ctx: RequestContext, next_: Next) -> HandlerResult:
+        try:
+            return next_(ctx)
+        finally:
+            elapsed = ctx.elapsed()
+            action = ctx.message.action.value if ctx.message.action is not None else "?"
+            with self._lock:
+                entry = self._stats.setdefault(action, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+            if elapsed >= self._slow_seconds:
+                logger.warning(f"Slow request: action={action}, {elapsed * 1000:.0f} ms, user={ctx.username}, trace={ctx.trace_id}")
+
+    def snapshot(self) -> dict[str, tuple[int, float, float]]:
+        """action -> (count, total seconds, max seconds)"""
+        with self._lock:
+            return {action: (count, total, peak) for action, (count, total, peak) in self._stats.items()}
+
+
+class RateLimit:
+    """Token bucket per session (or per `key(ctx)`); requests over the rate are answered "Rate limited"."""
+    name = "rate_limit"
+
+    def __init__(self, rate: float = DEFAULT_RATE_PER_SECOND, burst: int = DEFAULT_RATE_BURST,
+                 key: Optional[Callable[[RequestContext], Hashable]] = None):
+        self._rate = rate
+        self._burst = float(burst)
+        self._key = key if key is not None else (lambda ctx: ctx.session)
+        self._lock = threading.Lock()
+        self._buckets: dict[Hashable, list[float]] = {}  # key -> [tokens, last refill]
+        self.limited = 0
+
+    def __call__(self, ctx: RequestContext, next_: Next) -> HandlerResult:
+        if not self._take(self._key(ctx)):
+            return failure(ctx, "Rate limited")
+        return next_(ctx)
+
+    def forget(self, key: Hashable) -> None:
+        """Drop the bucket of `key`, e.g. a session that has disconnected."""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _take(self, key: Hashable) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MAX_RATE_BUCKETS:
+                    self._prune_locked(now)
+                bucket = self._buckets[key] = [self._burst, now]
+            tokens = min(self._burst, bucket[0] + (now - bucket[1]) * self._rate)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                self.limited += 1
+                return False
+            bucket[0] = tokens - 1.0
+            return True
+
+    def _prune_locked(self, now: float) -> None:
+        # a bucket that has refilled completely carries no state (e.g. a key that is never forgotten)
+        idle = self._burst / self._rate if self._rate > 0 else float("inf")
+        self._buckets = {k: b for k, b in self._buckets.items() if now - b[1] < idle}
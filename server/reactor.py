@@ -0,0 +1,434 @@
+import logging
+import selectors
+import socket
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Hashable, Optional
+from protocol.enums import MessageType
+from protocol.message import Message
+from session.session import Session
+from session.outbound import OutboundQueue, SlowConsumerPolicy, DEFAULT_MAX_QUEUED_FRAMES, coalesce_key, cancelled_key
+from session.errors import SessionError, SessionDisconnectedError
+from session.broadcast import SharedFrame
+from transport.framed_socket import FramedSocket, SENDMSG_MAX_BUFFERS, frame_prefix
+from transport.frame_decoder import FrameDecoder
+from transport.errors import DataTransmissionError
+from .server import Server
+from .infra.admission import AdmissionLimits
+from .infra.db_writer import WriteOptions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+MAX_PENDING_FRAMES_PER_CONNECTION = 32  # stop reading a connection while this many frames wait for a worker
+MAX_READS_PER_EVENT = 16  # bound the time one busy connection can hold the I/O thread
+MAX_ACCEPTS_PER_EVENT = 64
+
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+_ACCEPT = object()
+_WAKEUP = object()
+_CLOSED = object()  # queued after the last frame of a closed connection so cleanup runs in order
+
+
+class _Connection:
+    """Per-socket state shared between the I/O thread and the workers."""
+    def __init__(self, sock: socket.socket, addr: tuple[str, int], backlog: OutboundQueue):
+        self.sock = sock
+        self.addr = addr
+        self.decoder = FrameDecoder()
+        self.session: Optional["ReactorSession"] = None
+        # inbound frames waiting for a worker; processed one at a time, in order
+        self.inbox: deque = deque()
+        self.inbox_lock = threading.Lock()
+        self.scheduled = False
+        self.read_paused = False
+        # outbound buffers not yet accepted by the kernel
+        self.outbound: deque[memoryview] = deque()
+        # whole frames queued behind `outbound` while the peer is slow; bounded, see SlowConsumerPolicy
+        self.backlog = backlog
+        self.out_lock = threading.Lock()
+        self.want_write = False
+        self.registered_events = 0
+        self.closed = False
+
+
+class ReactorSession(Session):
+    """Session whose socket is owned by the reactor I/O thread.
+
+    send_message() 可以從任何執行緒呼叫且不會阻塞：寫不完的部分交給 I/O 執行緒在可寫時送出。
+    接收由 reactor 負責，因此不支援 receive_message()。
+    """
+    def __init__(self, fsock: FramedSocket, reactor: "ReactorServer", conn: _Connection):
+        super().__init__(fsock)
+        self._reactor = reactor
+        self._conn = conn
+        conn.backlog.encoder = self._encode_views
+
+    def send_message(self, message: Message):
+        try:
+            buffers = self.encode_prefixed(message)
+        except Exception as e:
+            raise SessionError("send_message failed") from e
+        if not self._reactor.write_prefixed(self._conn, buffers,
+                                            droppable=message.type == MessageType.EVENT, key=coalesce_key(message),
+                                            cancels=cancelled_key(message), message=message):
+            raise SessionDisconnectedError("disconnected")
+
+    def send_shared(self, shared: SharedFrame):
+        try:
+            data = self.shared_frame(shared)
+        except Exception as e:
+            raise SessionError("send_shared failed") from e
+        if not self._reactor.write_prefixed(self._conn, (data,), droppable=shared.droppable, key=shared.key,
+                                            cancels=shared.cancels, message=shared.message):
+            raise SessionDisconnectedError("disconnected")
+
+    def _encode_views(self, message: Message) -> list[memoryview]:
+        """Backlog encoder: a coalesced event re-encoded in the form write_prefixed() queues."""
+        return [memoryview(b).cast('B') for b in self.encode_prefixed(message) if len(b)]
+
+    @property
+    def closed(self) -> bool:
+        return self._conn.closed
+
+    def receive_message(self) -> Message:
+        raise SessionError("receive_message is not available on reactor sessions")
+
+    def close(self):
+        self._reactor.close_connection(self._conn)
+
+
+class ReactorServer(Server):
+    """Single I/O thread multiplexing every connection with selectors (epoll on Linux).
+
+    完整的 frame 交給有上限的 worker pool 執行 Dispatcher.dispatch；同一連線的 request 依序處理，
+    handler 與 wire protocol 與 thread-per-connection 引擎完全相同。
+    """
+    LISTEN_BACKLOG = 1024
+
+    def __init__(self, addr: tuple[str, int], trace_io: bool = False, workers: int = DEFAULT_WORKERS,
+                 outbound_queue_size: int = DEFAULT_MAX_QUEUED_FRAMES,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+                 admission_limits: AdmissionLimits | None = None, rate_limit: float = 0.0,
+                 write_options: WriteOptions | None = None):
+        super().__init__(addr, trace_io=trace_io, outbound_queue_size=outbound_queue_size,
+                         slow_consumer_policy=slow_consumer_policy, workers=workers,
+                         admission_limits=admission_limits, rate_limit=rate_limit, write_options=write_options)
+        self._workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ReactorWorker")
+        self._selector = selectors.DefaultSelector()
+        self._connections: set[_Connection] = set()
+        self._callbacks: deque[Callable[[], None]] = deque()
+        self._callbacks_lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._io_thread: Optional[threading.Thread] = None
+
+    def serve(self):
+        """Run the I/O loop on the calling thread until stop() is called."""
+        logger.info("Server (reactor engine, %d workers) listening on %s:%d", self._workers, self._addr[0], self._addr[1])
+        self._io_thread = threading.current_thread()
+        self._acceptor.setblocking(False)
+        self._selector.register(self._acceptor, selectors.EVENT_READ, _ACCEPT)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, _WAKEUP)
+        try:
+            while not self._stop_event.is_set():
+                for key, mask in self._selector.select():
+                    if key.data is _ACCEPT:
+                        self._on_acceptable()
+                    elif key.data is _WAKEUP:
+                        self._drain_wakeup()
+                    else:
+                        conn = key.data
+                        if mask & selectors.EVENT_READ:
+                            self._on_readable(conn)
+                        if mask & selectors.EVENT_WRITE and not conn.closed:
+                            self._on_writable(conn)
+                self._run_callbacks()
+        finally:
+            self._shutdown()
+
+    def stop(self):
+        """Signal the I/O loop to stop; connections are closed by the I/O thread."""
+        self._stop_event.set()
+        self._wakeup()
+
+    # --- called from any thread ---
+    def write_frame(self, conn: _Connection, buffers: list[bytes | bytearray | memoryview], *,
+                    droppable: bool = False, key: Optional[Hashable] = None, cancels: Optional[Hashable] = None) -> bool:
+        """Queue one frame whose body is the concatenation of `buffers` and try to write it immediately.
+
+        Returns False if the connection is closed, or is being closed because its backlog overflowed.
+        """
+        return self.write_prefixed(conn, [frame_prefix(buffers), *buffers], droppable=droppable, key=key, cancels=cancels)
+
+    def write_prefixed(self, conn: _Connection, buffers, *, droppable: bool = False, key: Optional[Hashable] = None,
+                       cancels: Optional[Hashable] = None, message: Optional[Message] = None) -> bool:
+        """Like write_frame, for buffers that already include the length prefix (e.g. a SharedFrame)."""
+        views = [memoryview(b).cast('B') for b in buffers if len(b)]
+        with conn.out_lock:
+            if conn.closed:
+                return False
+            if conn.outbound:
+                # the I/O thread is already waiting for writability; wait in the bounded backlog
+                if conn.backlog.put(views, droppable=droppable, key=key, cancels=cancels, message=message):
+                    return True
+                logger.warning("Client %s:%d is too slow (outbound backlog full); disconnecting", conn.addr[0], conn.addr[1])
+                self._call_soon(lambda: self._close(conn))
+                return False
+            conn.outbound.extend(views)
+            if not self._flush_locked(conn):
+                return False
+            if conn.outbound and not conn.want_write:
+                conn.want_write = True
+                self._call_soon(lambda: self._update_interest(conn))
+        return True
+
+    def close_connection(self, conn: _Connection):
+        if threading.current_thread() is self._io_thread:
+            self._close(conn)
+        else:
+            self._call_soon(lambda: self._close(conn))
+
+    def _call_soon(self, callback: Callable[[], None]):
+        with self._callbacks_lock:
+            self._callbacks.append(callback)
+        if threading.current_thread() is not self._io_thread:
+            self._wakeup()
+
+    def _wakeup(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, InterruptedError):
+            pass  # a wakeup is already pending
+        except OSError:
+            pass
+
+    def _flush_locked(self, conn: _Connection) -> bool:
+        """Write as much of conn.outbound as the kernel accepts. Caller holds conn.out_lock."""
+        out = conn.outbound
+        while out:
+            try:
+                if _HAS_SENDMSG:
+                    sent = conn.sock.sendmsg(list(islice(out, SENDMSG_MAX_BUFFERS)))
+                else:
+                    sent = conn.sock.send(out[0])
+            except (BlockingIOError, InterruptedError):
+                return True
+            except OSError as e:
+                logger.debug("Send to %s failed: %s", conn.addr, e)
+                out.clear()
+                # always deferred: _close() takes conn.out_lock, which the caller holds
+                self._call_soon(lambda: self._close(conn))
+                return False
+            while sent:
+                n = len(out[0])
+                if sent >= n:
+                    out.popleft()
+                    sent -= n
+                else:
+                    out[0] = out[0][sent:]
+                    sent = 0
+        return True
+
+    # --- I/O thread only ---
+    def _on_acceptable(self):
+        for _ in range(MAX_ACCEPTS_PER_EVENT):
+            try:
+                sock, addr = self._acceptor.accept_socket()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                if not self._stop_event.is_set():
+                    logger.exception("Accept failed")
+                return
+            if not self._admit_connection(addr):
+                sock.close()
+                continue
+            sock.setblocking(False)
+            conn = _Connection(sock, addr, self._new_outbound_queue())
+            session = ReactorSession(FramedSocket(sock), self, conn)
+            session.set_trace_io(self._trace_io)
+            conn.session = session
+            self._connections.add(conn)
+            self._session_user_map.add_session(session)
+            self._update_interest(conn)
+            logger.info("Accepted connection from %s:%d", addr[0], addr[1])
+
+    def _on_readable(self, conn: _Connection):
+        for _ in range(MAX_READS_PER_EVENT):
+            try:
+                n = conn.sock.recv_into(conn.decoder.get_buffer())
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug("Receive from %s failed: %s", conn.addr, e)
+                self._close(conn)
+                return
+            if n == 0:
+                self._close(conn)
+                return
+            try:
+                frames = conn.decoder.buffer_updated(n)
+            except DataTransmissionError as e:
+                logger.warning("Client %s:%d sent an invalid frame: %s", conn.addr[0], conn.addr[1], e)
+                self._close(conn)
+                return
+            if frames:
+                self._enqueue(conn, frames)
+                if conn.read_paused:
+                    return
+
+    def _on_writable(self, conn: _Connection):
+        with conn.out_lock:
+            while True:
+                if not self._flush_locked(conn):
+                    return
+                if conn.outbound:
+                    break
+                # kernel took everything; feed it the next frames from the backlog
+                views = conn.backlog.get_nowait()
+                if views is None:
+                    break
+                conn.outbound.extend(views)
+            if not conn.outbound:
+                conn.want_write = False
+        self._update_interest(conn)
+
+    def _enqueue(self, conn: _Connection, frames: list):
+        with conn.inbox_lock:
+            conn.inbox.extend(frames)
+            pause = not conn.read_paused and len(conn.inbox) >= MAX_PENDING_FRAMES_PER_CONNECTION
+            if pause:
+                conn.read_paused = True
+            submit = not conn.scheduled
+            conn.scheduled = True
+        if pause:
+            self._update_interest(conn)
+        if submit:
+            self._pool.submit(self._drain, conn)
+
+    def _resume_reading(self, conn: _Connection):
+        with conn.inbox_lock:
+            if not conn.read_paused:
+                return
+            conn.read_paused = False
+        self._update_interest(conn)
+
+    def _update_interest(self, conn: _Connection):
+        if conn.closed:
+            return
+        events = 0
+        if not conn.read_paused:
+            events |= selectors.EVENT_READ
+        if conn.want_write:
+            events |= selectors.EVENT_WRITE
+        if events == conn.registered_events:
+            return
+        try:
+            if conn.registered_events == 0:
+                self._selector.register(conn.sock, events, conn)
+            elif events == 0:
+                self._selector.unregister(conn.sock)
+            else:
+                self._selector.modify(conn.sock, events, conn)
+            conn.registered_events = events
+        except (KeyError, ValueError, OSError) as e:
+            logger.debug("Failed to update selector interest for %s: %s", conn.addr, e)
+            self._close(conn)
+
+    def _close(self, conn: _Connection):
+        with conn.out_lock:
+            if conn.closed:
+                return
+            conn.closed = True
+            conn.outbound.clear()
+            conn.backlog.close()
+        if conn.registered_events:
+            try:
+                self._selector.unregister(conn.sock)
+            except (KeyError, ValueError):
+                pass
+            conn.registered_events = 0
+        try:
+            conn.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        conn.sock.close()
+        self._connections.discard(conn)
+        logger.info(f"Client {conn.addr[0]}:{conn.addr[1]} disconnected")
+        # cleanup goes through the connection's queue so it runs after in-flight requests
+        self._enqueue(conn, [_CLOSED])
+
+    def _drain_wakeup(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _run_callbacks(self):
+        with self._callbacks_lock:
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                logger.exception("Reactor callback raised")
+
+    def _shutdown(self):
+        for conn in list(self._connections):
+            with conn.out_lock:
+                conn.closed = True
+            try:
+                conn.sock.close()
+            except OSError:
+                pass
+        self._connections.clear()
+        self._session_user_map.clear_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._db.close()
+        try:
+            self._selector.close()
+        except Exception:
+            pass
+        try:
+            self._acceptor.close()
+        except Exception:
+            logger.exception("Error closing acceptor")
+        self._wake_r.close()
+        self._wake_w.close()
+
+    # --- worker threads ---
+    def _drain(self, conn: _Connection):
+        """Process one connection's queued frames in order (runs on a pool worker)."""
+        session = conn.session
+        assert session is not None
+        while True:
+            with conn.inbox_lock:
+                if not conn.inbox:
+                    conn.scheduled = False
+                    return
+                item = conn.inbox.popleft()
+                resume = conn.read_paused and len(conn.inbox) < MAX_PENDING_FRAMES_PER_CONNECTION // 2
+            if resume:
+                self._call_soon(lambda: self._resume_reading(conn))
+            if item is _CLOSED:
+                self._cleanup_session(session)
+                continue
+            if conn.closed:
+                continue
+            try:
+                req = session.decode_frame(item)
+                resp = self._dispatcher.dispatch(req, session)
+                session.send_message(resp)
+            except Exception as e:
+                if isinstance(e, SessionDisconnectedError):
+                    logger.info(f"Client {conn.addr[0]}:{conn.addr[1]} disconnected")
+                else:
+                    logger.exception(f"Client {conn.addr[0]}:{conn.addr[1]} handler error: {e}")
+                self.close_connection(conn)
@@ -1,41 +1,164 @@
 import logging
 import threading
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Hashable, Optional
 from server.infra.acceptor import Acceptor
 from session.session import Session
-from server.dispatcher import Dispatcher
+from session.queued_session import QueuedSession
+from session.outbound import OutboundQueue, OutboundStats, SlowConsumerPolicy, DEFAULT_MAX_QUEUED_FRAMES
+from transport.framed_socket import FramedSocket
+from server.dispatcher import Dispatcher, ordering_key
+from server.middleware import RateLimit
 from session.errors import SessionDisconnectedError
 from server.infra.database import Database
+from server.infra.db_writer import WriteOptions
 from server.infra.session_user_map import SessionUserMap
 from server.infra.room_manager import RoomManager
+from server.infra.admission import AdmissionController, AdmissionLimits, SERVER_BUSY_ERROR
 from protocol.enums import Role
+from protocol.message import Message
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DISPATCH_WORKERS = 16
+DEFAULT_WRITER_WORKERS = 8
+WRITE_STALL_TIMEOUT = 5.0  # seconds one frame may wait for a client's socket before the client is dropped
+
+
+class _Lanes:
+    """Admitted requests of one connection, grouped by ordering lane.
+
+    每個 lane 同時最多只有一個 pool task 在處理，lane 內依到達順序執行；lane 處理完即移除。
+    預設所有 request 共用同一個 lane（與過去逐一處理相同），concurrent_dispatch 時才依 ordering_key 分流。
+    """
+    def __init__(self):
+        self.pending: dict[Hashable, deque[Message]] = {}  # a lane is present while a task is draining it
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)  # notified when the last pool task of the connection ends
+        self.tasks = 0  # pool tasks submitted and not finished (or cancelled) yet
+        self.closed = False
+
+    def task_done(self, _future=None) -> None:
+        with self.lock:
+            self.tasks -= 1
+            if not self.tasks:
+                self.idle.notify_all()
+
+    def close_and_wait(self) -> int:
+        """Stop the lanes, wait for tasks already dispatching, and return how many admitted requests were dropped."""
+        with self.lock:
+            self.closed = True
+            dropped = sum(len(pending) for pending in self.pending.values())
+            self.pending.clear()
+            while self.tasks:
+                self.idle.wait()
+        return dropped
+
+
+_SERIAL_LANE = "serial"
+
 
 class Server:
-    def __init__(self, addr: tuple[str, int], trace_io: bool = False):
+    LISTEN_BACKLOG = 5
+
+    def __init__(self, addr: tuple[str, int], trace_io: bool = False,
+                 outbound_queue_size: int = DEFAULT_MAX_QUEUED_FRAMES,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+                 workers: int = DEFAULT_DISPATCH_WORKERS,
+                 admission_limits: AdmissionLimits | None = None,
+                 concurrent_dispatch: bool = False,
+                 rate_limit: float = 0.0,
+                 write_options: WriteOptions | None = None):
         self._addr = addr
-        self._acceptor = Acceptor(addr)
-        self._db = Database()
+        self._acceptor = Acceptor(addr, backlog=self.LISTEN_BACKLOG)
+        self._db = Database(write_options=write_options)
         self._session_user_map = SessionUserMap()
         self._room_manager = RoomManager()
         self._dispatcher = Dispatcher(self._db, self._session_user_map, self._room_manager)
+        self._rate_limit: Optional[RateLimit] = None
+        if rate_limit > 0:
+            self._rate_limit = RateLimit(rate_limit, burst=max(1, int(rate_limit * 2)))
+            self._dispatcher.use(self._rate_limit)
         self._stop_event = threading.Event()
         self._threads: list[threading.Thread] = []
         # self._sessions: list[Session] = []
         
         self._trace_io = bool(trace_io)
+        self._outbound_queue_size = outbound_queue_size
+        self._slow_consumer_policy = slow_consumer_policy
+        self._outbound_stats = OutboundStats()
+        self._admission = AdmissionController(admission_limits)
+        self._dispatch_workers = workers
+        self._dispatch_pool: Optional[ThreadPoolExecutor] = None  # thread engine only; created by serve()
+        self._writer_pool: Optional[ThreadPoolExecutor] = None  # thread engine only: flushes every QueuedSession
+        self._concurrent_dispatch = bool(concurrent_dispatch)
+
+    def _new_outbound_queue(self) -> OutboundQueue:
+        """Per-connection outbound queue; every engine applies the same bound and slow-consumer policy."""
+        return OutboundQueue(self._outbound_queue_size, self._slow_consumer_policy, stats=self._outbound_stats)
 
     def output_room_manager_status(self):
         self._room_manager.output_status()
 
+    def output_admission_status(self):
+        limits = self._admission.limits
+        stats = self._admission.stats()
+        logger.info(f"Connections: {stats['connections']}/{limits.max_connections} (rejected {stats['rejected_connections']}); "
+                    f"requests in flight: {stats['queued_requests']}/{limits.max_queued_requests}, "
+                    f"per session <= {limits.max_inflight_per_session} (rejected {stats['rejected_requests']})")
+
+    def output_dispatch_status(self):
+        for action, (count, total, peak) in sorted(self._dispatcher.timing.snapshot().items()):
+            logger.info(f"{action}: {count} requests, avg {total / count * 1000:.1f} ms, max {peak * 1000:.1f} ms")
+        for name, (calls, seconds) in self._dispatcher.pipeline.stats.snapshot().items():
+            logger.info(f"middleware {name}: {calls} calls, self time {seconds * 1000:.1f} ms")
+
+    def output_database_status(self):
+        pool = self._db.pool_stats()
+        logger.info(f"Database pool: {pool['open']}/{pool['size']} connections open, {pool['idle']} idle, "
+                    f"{pool['waits']} waits, journal_mode={pool['journal_mode']}")
+        for name, (count, total, peak) in sorted(self._db.query_stats().items()):
+            logger.info(f"{name}: {count} queries, avg {total / count * 1000:.2f} ms, max {peak * 1000:.2f} ms")
+        writer = self._db.writer_stats()
+        logger.info(f"Database writer: {writer['writes']} writes in {writer['batches']} batches (avg {writer['avg_batch']:.1f}, "
+                    f"max {writer['largest_batch']}), {writer['failed']} failed, avg commit {writer['avg_commit_ms']:.2f} ms, "
+                    f"{writer['queued']} queued")
+        catalog = self._dispatcher.catalog.stats()
+        logger.info(f"Game catalog: {catalog['games']} games, hits={catalog['hits']}, misses={catalog['misses']}; "
+                    f"files {catalog['asset_entries']} ({catalog['asset_bytes']} bytes), hits={catalog['asset_hits']}, "
+                    f"misses={catalog['asset_misses']}; invalidations={catalog['invalidations']}")
+
+    def output_outbound_status(self):
+        stats = self._outbound_stats.snapshot()
+        logger.info(f"Outbound queues ({self._slow_consumer_policy.value}, {self._outbound_queue_size} frames): "
+                    f"coalesced={stats['coalesced']}, cancelled={stats['cancelled']}, dropped={stats['dropped']}")
+
+    def _admit_connection(self, addr: Optional[tuple[str, int]]) -> bool:
+        """Count a new connection against the limit; every engine closes the socket when this returns False."""
+        if self._admission.open_connection():
+            return True
+        logger.warning("Server busy: refusing connection from %s (max %d connections)",
+                       f"{addr[0]}:{addr[1]}" if addr else "unknown peer", self._admission.limits.max_connections)
+        return False
+
+    def _busy_response(self, req: Message) -> Message:
+        return self._dispatcher.reject(req, SERVER_BUSY_ERROR)
+
     def serve(self):
-        """Accept connections in a loop and handle each in a dedicated thread."""
-        logger.info("Server listening on %s:%d", self._addr[0], self._addr[1])
+        """Accept connections in a loop; each connection gets a reader thread, dispatch and writes run on bounded pools."""
+        logger.info("Server listening on %s:%d (%d dispatch workers)", self._addr[0], self._addr[1], self._dispatch_workers)
+        self._dispatch_pool = ThreadPoolExecutor(max_workers=self._dispatch_workers, thread_name_prefix="DispatchWorker")
+        self._writer_pool = ThreadPoolExecutor(max_workers=DEFAULT_WRITER_WORKERS, thread_name_prefix="SessionWriter")
         while not self._stop_event.is_set():
             try:
-                session, addr = self._acceptor.accept()
+                sock, addr = self._acceptor.accept_socket()
+                if not self._admit_connection(addr):
+                    sock.close()
+                    continue
+                session = QueuedSession(FramedSocket(sock), self._new_outbound_queue(), writer_pool=self._writer_pool)
+                # a client that stops reading holds a writer for at most this long, then it is disconnected
+                session.set_send_timeout(WRITE_STALL_TIMEOUT)
                 try:
                     session.set_trace_io(self._trace_io)
                 except Exception:
@@ -47,18 +170,22 @@ class Server:
                 logger.exception("Accept failed")
                 continue
             t = threading.Thread(target=self._client_loop, args=(session, addr), daemon=True)
+            self._threads = [th for th in self._threads if th.is_alive()]
             self._threads.append(t)
             self._session_user_map.add_session(session)
             t.start()
 
     def _client_loop(self, session: Session, addr: Optional[tuple[str, int]] = None):
-        """Per-connection loop: receive, dispatch, respond until error or stop."""
+        """Per-connection reader: admit each request into its ordering lane, or answer "Server busy" at once."""
+        lanes = _Lanes()
         try:
             while not self._stop_event.is_set():
                 try:
                     req = session.receive_message()
-                    resp = self._dispatcher.dispatch(req, session)
-                    session.send_message(resp)
+                    if not self._admission.admit(session):
+                        session.send_message(self._busy_response(req))
+                        continue
+                    self._submit(session, lanes, req, addr)
                 except Exception as e:
                     # 正常斷線：降低為 info，其他錯誤保留堆疊
                     if isinstance(e, SessionDisconnectedError):
@@ -73,8 +200,63 @@ class Server:
                             logger.exception(f"Client handler error: {e}")
                     break
         finally:
+            try:
+                session.close()  # in-flight handlers see a closed session (see Dispatcher.dispatch)
+            except Exception:
+                pass
+            # a LOGIN still dispatching must not re-register the session after cleanup removed it
+            dropped = lanes.close_and_wait()
+            if dropped:
+                self._admission.release(session, dropped)
             self._cleanup_session(session)
 
+    def _submit(self, session: Session, lanes: _Lanes, req: Message, addr: Optional[tuple[str, int]]):
+        if self._concurrent_dispatch:
+            key = ordering_key(req)
+            if key is None:
+                key = object()  # a lane of its own
+        else:
+            key = _SERIAL_LANE
+        with lanes.lock:
+            pending = lanes.pending.get(key)
+            if pending is not None:
+                pending.append(req)
+                return
+            lanes.pending[key] = deque((req,))
+            lanes.tasks += 1
+        assert self._dispatch_pool is not None
+        try:
+            future = self._dispatch_pool.submit(self._drain_lane, session, lanes, key, addr)
+        except RuntimeError:  # pool shut down by stop()
+            lanes.task_done()
+            raise
+        future.add_done_callback(lanes.task_done)  # also runs if stop() cancels the task
+
+    def _drain_lane(self, session: Session, lanes: _Lanes, key: Hashable, addr: Optional[tuple[str, int]]):
+        """Dispatch one lane's admitted requests in order (runs on a pool worker)."""
+        while True:
+            with lanes.lock:
+                pending = lanes.pending.get(key)
+                if lanes.closed or pending is None:
+                    return
+                if not pending:
+                    del lanes.pending[key]
+                    return
+                req = pending.popleft()
+            try:
+                resp = self._dispatcher.dispatch(req, session)
+                session.send_message(resp)
+            except SessionDisconnectedError:
+                pass  # the reader thread notices the disconnect and cleans up
+            except Exception as e:
+                if addr:
+                    logger.exception(f"Client {addr[0]}:{addr[1]} handler error: {e}")
+                else:
+                    logger.exception(f"Client handler error: {e}")
+                session.close()
+            finally:
+                self._admission.release(session)
+
     def _cleanup_session(self, session: Session):
         userinfo = self._session_user_map.get_user_by_session(session)
         if userinfo:
@@ -85,7 +267,11 @@ class Server:
                 if room_id:
                     self._room_manager.remove_player_from_room(room_id, username)
                     logger.info(f"User {username} removed from room {room_id} on session cleanup")
+                self._room_manager.event_bus.detach(username)
         self._session_user_map.remove_session(session)
+        if self._rate_limit is not None:
+            self._rate_limit.forget(session)
+        self._admission.close_connection()
         try:
             session.close()
         except Exception:
@@ -114,3 +300,8 @@ class Server:
             except Exception:
                 pass
         self._threads.clear()
+        if self._dispatch_pool is not None:
+            self._dispatch_pool.shutdown(wait=False, cancel_futures=True)
+        if self._writer_pool is not None:
+            self._writer_pool.shutdown(wait=False, cancel_futures=True)
+        self._db.close()
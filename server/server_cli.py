@@ -2,10 +2,34 @@ import logging
 from typing import Optional
 from threading import Thread
 from .server import Server
+from .reactor import ReactorServer
+from .async_server import AsyncServer
+from .infra.admission import AdmissionLimits, DEFAULT_MAX_INFLIGHT_PER_SESSION, DEFAULT_MAX_QUEUED_REQUESTS
+from .infra.db_writer import WriteOptions
+from session.outbound import SlowConsumerPolicy, DEFAULT_MAX_QUEUED_FRAMES
 
 class ServerCLI:
-    def __init__(self, addr: tuple[str, int], trace_io: bool = False):
-        self._server = Server(addr, trace_io=trace_io)
+    def __init__(self, addr: tuple[str, int], trace_io: bool = False, engine: str = "thread", workers: int | None = None,
+                 outbound_queue_size: int = DEFAULT_MAX_QUEUED_FRAMES,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+                 admission_limits: AdmissionLimits | None = None, concurrent_dispatch: bool = False,
+                 rate_limit: float = 0.0, write_options: WriteOptions | None = None):
+        outbound = dict(outbound_queue_size=outbound_queue_size, slow_consumer_policy=slow_consumer_policy,
+                        admission_limits=admission_limits, rate_limit=rate_limit, write_options=write_options)
+        if concurrent_dispatch and engine != "thread":
+            raise ValueError(f"concurrent_dispatch is only supported by the thread engine, not {engine!r}")
+        if admission_limits is not None and engine != "thread" and (
+                admission_limits.max_inflight_per_session != DEFAULT_MAX_INFLIGHT_PER_SESSION
+                or admission_limits.max_queued_requests != DEFAULT_MAX_QUEUED_REQUESTS):
+            raise ValueError(f"per-request admission limits are only enforced by the thread engine, not {engine!r}")
+        if workers is not None:
+            outbound["workers"] = workers  # otherwise each engine's own default
+        if engine == "reactor":
+            self._server = ReactorServer(addr, trace_io=trace_io, **outbound)
+        elif engine == "asyncio":
+            self._server = AsyncServer(addr, trace_io=trace_io, **outbound)
+        else:
+            self._server = Server(addr, trace_io=trace_io, concurrent_dispatch=concurrent_dispatch, **outbound)
         self._thread: Optional[Thread] = None
 
     def run(self):
@@ -18,10 +42,18 @@ class ServerCLI:
                     break
                 elif cmd == "roomstatus":
                     self._server.output_room_manager_status()
+                elif cmd == "queuestatus":
+                    self._server.output_outbound_status()
+                elif cmd == "dbstatus":
+                    self._server.output_database_status()
+                elif cmd == "dispatchstatus":
+                    self._server.output_dispatch_status()
+                elif cmd == "status":
+                    self._server.output_admission_status()
                 elif cmd == "":
                     continue
                 else:
-                    print("Unknown command. Type 'roomstatus' or 'quit'.")
+                    print("Unknown command. Type 'status', 'roomstatus', 'queuestatus', 'dispatchstatus', 'dbstatus' or 'quit'.")
         except KeyboardInterrupt:
             print("\nStopping server...")
         finally:
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Callable, Optional
+from protocol.message import Message
+from protocol.enums import Action, MessageType
+from protocol.codec import encode_parts, decode as decode_message, describe as describe_frame
+from protocol.payloads.session import HelloPayload
+from transport.async_framed import FrameProtocol
+from transport.errors import FramedSocketError
+from transport.framed_socket import frame_prefix
+from .errors import SessionError, SessionTimeoutError, SessionDisconnectedError
+from .session import SUPPORTED_FEATURES
+from .outbound import OutboundQueue, coalesce_key, cancelled_key
+from .broadcast import SharedFrame
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_REQUESTS = 32  # pause reading while this many incoming requests wait to be served
+
+_END = object()
+
+
+class AsyncSession:
+    """asyncio counterpart of Session.
+
+    - 客戶端：`await session.request(msg)` 等待對應 msg_id 的 response，`async for ev in session.events()` 取得事件。
+    - 伺服器端（serve_requests=True）：收到的 request（以及其他非 response 的 frame）由 `async for req in session.requests()` 取出，
+      events() 不會有任何東西。
+    `send_message()` 可從任何執行緒呼叫，因此能直接交給既有的同步 handler（例如廣播事件）。
+    """
+    def __init__(self, *, serve_requests: bool = False,
+                 on_connected: Optional[Callable[["AsyncSession"], None]] = None,
+                 outbound: Optional[OutboundQueue] = None):
+        """outbound: 若提供，transport 寫入緩衝區超過 high-water mark 時，後續 frame 進入此有上限的佇列
+        並套用其 SlowConsumerPolicy；未提供時（客戶端）直接交給 transport。"""
+        self._protocol = FrameProtocol(self._on_frame,
+                                       on_connected=self._on_connected_cb,
+                                       on_disconnected=self._on_disconnected_cb,
+                                       on_resume_writing=self._flush_outbound)
+        self._outbound = outbound
+        if outbound is not None:
+            outbound.encoder = self._encode_prefixed
+        self._serve_requests = serve_requests
+        self._on_connected = on_connected
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._pending: dict[str, asyncio.Future] = {}
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._requests: asyncio.Queue = asyncio.Queue()
+        self._reading_paused = False
+        self._closed = False
+        self._trace_io = False
+        self._features: frozenset[str] = frozenset()
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "AsyncSession":
+        loop = asyncio.get_running_loop()
+        session = cls()
+        await loop.create_connection(lambda: session.protocol, host, port)
+        return session
+
+    @property
+    def protocol(self) -> FrameProtocol:
+        return self._protocol
+
+    @property
+    def peer_address(self) -> tuple[str, int] | None:
+        return self._protocol.peer_address
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def set_trace_io(self, enabled: bool) -> None:
+        self._trace_io = bool(enabled)
+
+    @property
+    def features(self) -> frozenset[str]:
+        return self._features
+
+    def enable_features(self, features) -> frozenset[str]:
+        """Same as Session.enable_features."""
+        self._features = SUPPORTED_FEATURES.intersection(features)
+        return self._features
+
+    async def negotiate_features(self, features=SUPPORTED_FEATURES, *, timeout: float | None = None) -> frozenset[str]:
+        """Same as Session.negotiate_features."""
+        req = Message.request(Action.HELLO, HelloPayload(features=sorted(SUPPORTED_FEATURES.intersection(features))))
+        resp = await self.request(req, timeout=timeout)
+        if not resp.ok:
+            return self._features
+        return self.enable_features(resp.payload.features)
+
+    # --- sending ---
+    def encode_frame(self, message: Message) -> list[bytes | bytearray | memoryview]:
+        parts = encode_parts(message, self._features)
+        if self._trace_io:
+            logger.debug("TX %s", describe_frame(parts[0]))
+        return parts
+
+    def send_message(self, message: Message):
+        """Send without waiting; safe to call from any thread (e.g. handlers running in an executor)."""
+        try:
+            buffers = self._encode_prefixed(message)
+        except Exception as e:
+            raise SessionError("send_message failed") from e
+        key = cancels = None
+        if self._outbound is not None:
+            key, cancels = coalesce_key(message), cancelled_key(message)
+        self._schedule_write(buffers, message.type == MessageType.EVENT, key, cancels, message)
+
+    def send_shared(self, shared: SharedFrame):
+        """Write a broadcast frame encoded once for all sessions with the same wire format."""
+        try:
+            data = shared.frame(self._features)
+        except Exception as e:
+            raise SessionError("send_shared failed") from e
+        if self._trace_io:
+            logger.debug("TX %s", describe_frame(memoryview(data)[4:]))
+        self._schedule_write((data,), shared.droppable, shared.key, shared.cancels, shared.message)
+
+    def _encode_prefixed(self, message: Message) -> list[bytes | bytearray | memoryview]:
+        parts = self.encode_frame(message)
+        return [frame_prefix(parts), *parts]
+
+    def _schedule_write(self, buffers, droppable: bool, key, cancels, message: Optional[Message] = None):
+        if self._closed or self._loop is None:
+            raise SessionDisconnectedError("disconnected")
+        if threading.get_ident() == self._loop_thread_id:
+            self._write(buffers, droppable, key, cancels, message)
+        else:
+            self._loop.call_soon_threadsafe(self._write, buffers, droppable, key, cancels, message)
+
+    async def send(self, message: Message):
+        """Send and wait for the transport's write buffer to drain below its high-water mark."""
+        self.send_message(message)
+        await self.drain()
+
+    async def drain(self):
+        try:
+            await self._protocol.drain()
+        except FramedSocketError as e:
+            raise SessionDisconnectedError("disconnected") from e
+
+    async def request(self, message: Message, *, timeout: float | None = None) -> Message:
+        """Send a request and await the response carrying the same msg_id."""
+        if not message.msg_id:
+            raise SessionError("request() needs a message with msg_id")
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending[message.msg_id] = fut
+        try:
+            await self.send(message)
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError as e:
+            raise SessionTimeoutError("request timed out") from e
+        finally:
+            self._pending.pop(message.msg_id, None)
+
+    def _write(self, buffers, droppable: bool = False, key=None, cancels=None, message: Optional[Message] = None):
+        """Loop thread: write complete frames (length prefix included), or queue them while the transport is paused."""
+        outbound = self._outbound
+        if outbound is not None and (self._protocol.write_paused or len(outbound)):
+            if self._protocol.is_closing:
+                return
+            if not outbound.put(buffers, droppable=droppable, key=key, cancels=cancels, message=message):
+                logger.warning("Outbound queue of %s is full; disconnecting slow consumer", self.peer_address)
+                self._protocol.close()
+            return
+        try:
+            self._protocol.write_prefixed(buffers)
+        except FramedSocketError as e:
+            logger.debug("Dropping frame for closed session %s: %s", self.peer_address, e)
+
+    def _flush_outbound(self):
+        """Transport drained below its low-water mark: move queued frames to it until it pauses again."""
+        outbound = self._outbound
+        if outbound is None:
+            return
+        while not self._protocol.write_paused:
+            buffers = outbound.get_nowait()
+            if buffers is None:
+                return
+            try:
+                self._protocol.write_prefixed(buffers)
+            except FramedSocketError:
+                return
+
+    # --- receiving ---
+    async def events(self) -> AsyncIterator[Message]:
+        """Iterate over event messages until the session disconnects."""
+        while True:
+            item = await self._events.get()
+            if item is _END:
+                self._events.put_nowait(_END)  # let other iterators finish too
+                return
+            yield item
+
+    async def requests(self) -> AsyncIterator[Message]:
+        """Iterate over incoming frames (serve_requests=True) until the session disconnects.
+
+        Everything a peer sends that is not a response to our own request shows up here, requests or not.
+        """
+        while True:
+            item = await self._requests.get()
+            if item is _END:
+                return
+            if self._reading_paused and self._requests.qsize() < MAX_PENDING_REQUESTS // 2:
+                self._reading_paused = False
+                self._protocol.resume_reading()
+            yield item
+
+    def close(self):
+        """Close the connection; safe to call from any thread."""
+        if self._loop is None:
+            return
+        if threading.get_ident() == self._loop_thread_id:
+            self._protocol.close()
+        else:
+            self._loop.call_soon_threadsafe(self._protocol.close)
+
+    # --- protocol callbacks (loop thread) ---
+    def _on_connected_cb(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if self._on_connected:
+            self._on_connected(self)
+
+    def _on_frame(self, frame: bytearray):
+        try:
+            message = decode_message(frame)
+            if self._trace_io:
+                logger.debug("RX %s", describe_frame(frame))
+        except Exception:
+            logger.warning("Dropping undecodable frame from %s", self.peer_address, exc_info=True)
+            return
+        if message.type == MessageType.RESPONSE and message.msg_id:
+            fut = self._pending.get(message.msg_id)
+            if fut is not None and not fut.done():
+                fut.set_result(message)
+                return
+        if self._serve_requests:
+            # nobody drains events on a serving session: stray events / responses are handed to the
+            # server as well, whose Dispatcher answers them "Not a request" like the thread engine does
+            self._requests.put_nowait(message)
+            if not self._reading_paused and self._requests.qsize() >= MAX_PENDING_REQUESTS:
+                self._reading_paused = True
+                self._protocol.pause_reading()
+            return
+        self._events.put_nowait(message)
+
+    def _on_disconnected_cb(self, exc: Exception | None):
+        self._closed = True
+        if self._outbound is not None:
+            self._outbound.close()
+        for fut in self._pending.values():
+            if not fut.done():
+                fut.set_exception(SessionDisconnectedError("disconnected"))
+        self._events.put_nowait(_END)
+        self._requests.put_nowait(_END)
@@ -0,0 +1,56 @@
+import logging
+from typing import Iterable
+from protocol.codec import encode_parts, wire_format
+from protocol.enums import MessageType
+from protocol.message import Message
+from transport.framed_socket import frame_prefix
+from .outbound import coalesce_key, cancelled_key
+from .errors import SessionError
+
+logger = logging.getLogger(__name__)
+
+
+class SharedFrame:
+    """One message encoded at most once per wire format, length prefix included.
+
+    同一格式（見 protocol.codec.wire_format）的所有接收者共用同一個不可變的 bytes，
+    各 session 以 send_shared() 原封不動地寫出，不再各自 json.dumps。
+    """
+    __slots__ = ("message", "droppable", "key", "cancels", "_frames")
+
+    def __init__(self, message: Message):
+        self.message = message
+        self.droppable = message.type == MessageType.EVENT
+        self.key = coalesce_key(message)
+        self.cancels = cancelled_key(message)
+        self._frames: dict[str, bytes] = {}
+
+    @property
+    def encodings(self) -> int:
+        """How many times the message has actually been encoded."""
+        return len(self._frames)
+
+    def frame(self, features: frozenset[str]) -> bytes:
+        fmt = wire_format(features)
+        data = self._frames.get(fmt)
+        if data is None:
+            parts = encode_parts(self.message, features)
+            data = b"".join([frame_prefix(parts), *parts])
+            self._frames[fmt] = data
+        return data
+
+
+def broadcast(message: Message | SharedFrame, sessions: Iterable) -> int:
+    """Send one message to every session in `sessions`, encoding it once per wire format.
+
+    單一接收者斷線或送出失敗只記錄 debug，不會中斷對其他人的廣播。回傳成功送出的數量。
+    """
+    shared = message if isinstance(message, SharedFrame) else SharedFrame(message)
+    sent = 0
+    for session in sessions:
+        try:
+            session.send_shared(shared)
+            sent += 1
+        except SessionError as e:
+            logger.debug("Broadcast of %s to %s failed: %s", shared.message.action, session.peer_address, e)
+    return sent
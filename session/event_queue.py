@@ -0,0 +1,98 @@
+import threading
+from collections import deque
+from typing import Hashable, Optional
+from protocol.message import Message
+from .outbound import coalesce_key, cancelled_key, merge_lobby_versions
+
+
+class _Pending:
+    __slots__ = ("message", "key")
+
+    def __init__(self, message: Message, key: Optional[Hashable]):
+        self.message: Optional[Message] = message
+        self.key = key
+
+
+class EventQueue:
+    """Unbounded FIFO of received events that keeps only the newest pending state per coalesce_key.
+
+    尚未被取走的 ROOM_UPDATED / MY_ROOM_UPDATED 會在原位置被同 key 的新事件取代；
+    ROOM_REMOVED 會取消該房間尚未取走的 ROOM_UPDATED，並佔用它的位置。取代者帶上被取代事件的 lobby version
+    （見 merge_lobby_versions），消費端不會因此看到跳號。coalesced / cancelled 記錄被省下的事件數。
+    """
+    def __init__(self):
+        self._items: deque[_Pending] = deque()  # cancelled entries stay with message=None until popped
+        self._live = 0
+        self._keyed: dict[Hashable, _Pending] = {}
+        self._cond = threading.Condition()
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def put(self, message: Message) -> bool:
+        """Queue an event; returns True if the queue was empty before (a consumer should be scheduled)."""
+        key = coalesce_key(message)
+        cancels = cancelled_key(message)
+        with self._cond:
+            was_empty = self._live == 0
+            if cancels is not None:
+                pending = self._keyed.pop(cancels, None)
+                if pending is not None:
+                    self.cancelled += 1
+                    merged = merge_lobby_versions(pending.message, message)
+                    if merged is not None:
+                        pending.message = merged
+                        pending.key = key
+                        if key is not None:
+                            self._keyed[key] = pending
+                        return False
+                    pending.message = None
+                    self._live -= 1
+            if key is not None:
+                pending = self._keyed.get(key)
+                if pending is not None:
+                    pending.message = merge_lobby_versions(pending.message, message) or message
+                    self.coalesced += 1
+                    return False
+            pending = _Pending(message, key)
+            self._items.append(pending)
+            self._live += 1
+            if key is not None:
+                self._keyed[key] = pending
+            self._cond.notify()
+            return was_empty
+
+    def get(self, timeout: float | None = None) -> Optional[Message]:
+        """Next event; blocks while empty. None on timeout."""
+        with self._cond:
+            while not self._live:
+                if not self._cond.wait(timeout):
+                    return None
+            return self._pop_locked()
+
+    def get_nowait(self) -> Optional[Message]:
+        with self._cond:
+            if not self._live:
+                return None
+            return self._pop_locked()
+
+    def drain(self) -> list[Message]:
+        """Take every pending event at once (e.g. one GUI update per batch)."""
+        with self._cond:
+            messages = [p.message for p in self._items if p.message is not None]
+            self._items.clear()
+            self._keyed.clear()
+            self._live = 0
+            return messages
+
+    def _pop_locked(self) -> Message:
+        while True:
+            pending = self._items.popleft()
+            if pending.message is not None:
+                break
+        self._live -= 1
+        if pending.key is not None and self._keyed.get(pending.key) is pending:
+            del self._keyed[pending.key]
+        return pending.message
@@ -0,0 +1,224 @@
+import dataclasses
+import threading
+from collections import deque
+from enum import Enum
+from typing import Callable, Hashable, Optional, Sequence
+from protocol.enums import Action, MessageType
+from protocol.message import Message
+from .errors import SessionDisconnectedError
+
+DEFAULT_MAX_QUEUED_FRAMES = 256
+
+
+class SlowConsumerPolicy(Enum):
+    """What a server session does with events that queue up behind a slow reader.
+
+    responses 永遠不會被丟棄或合併；佇列滿了還有 response 要送時一律斷線。
+    """
+    DROP = 'drop'              # drop new events once the queue is full
+    COALESCE = 'coalesce'      # always keep only the newest pending event per coalesce_key; drop the rest when full
+    DISCONNECT = 'disconnect'  # close the connection once the queue is full
+
+
+def coalesce_key(message: Message) -> Optional[Hashable]:
+    """Events that describe the latest state of something; a newer one makes a queued older one obsolete."""
+    if message.type != MessageType.EVENT:
+        return None
+    if message.action == Action.ROOM_UPDATED:
+        return (message.action, message.payload.room_id)
+    if message.action == Action.MY_ROOM_UPDATED:
+        return (message.action,)
+    return None
+
+
+def cancelled_key(message: Message) -> Optional[Hashable]:
+    """coalesce_key of the pending event a message makes pointless: ROOM_REMOVED cancels the room's ROOM_UPDATED."""
+    if message.type == MessageType.EVENT and message.action == Action.ROOM_REMOVED:
+        return (Action.ROOM_UPDATED, message.payload.room_id)
+    return None
+
+
+def _lobby_version(payload) -> int:
+    """Lobby version an event carries: `version` of ROOM_* events, `lobby_version` of MY_ROOM_UPDATED."""
+    return getattr(payload, "lobby_version", None) or getattr(payload, "version", 0)
+
+
+def merge_lobby_versions(older: Optional[Message], newer: Message) -> Optional[Message]:
+    """`newer` standing in for `older` too: its coalesced_versions also list older's version(s).
+
+    lobby 事件被合併或取消時，被取代事件的 version 不能就此消失，否則客戶端會看到跳號而重抓列表；
+    合併後的事件帶上所有被它取代的 version（MY_ROOM_UPDATED 則是 lobby_version），客戶端據此知道沒有遺漏。
+    非 lobby 事件或未編號（version 0）的事件回傳 None，照舊直接取代。
+    """
+    if older is None or not hasattr(newer.payload, "coalesced_versions") or not _lobby_version(older.payload):
+        return None
+    versions = {_lobby_version(older.payload), *getattr(older.payload, "coalesced_versions", ()), *newer.payload.coalesced_versions}
+    versions.discard(_lobby_version(newer.payload))
+    payload = dataclasses.replace(newer.payload, coalesced_versions=sorted(versions))
+    return Message(type=newer.type, action=newer.action, payload=payload, msg_id=newer.msg_id)
+
+
+class OutboundStats:
+    """Counters summed over every OutboundQueue of a server (shown by the server CLI)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def add(self, *, dropped: int = 0, coalesced: int = 0, cancelled: int = 0) -> None:
+        with self._lock:
+            self.dropped += dropped
+            self.coalesced += coalesced
+            self.cancelled += cancelled
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {"dropped": self.dropped, "coalesced": self.coalesced, "cancelled": self.cancelled}
+
+
+class _Frame:
+    __slots__ = ("parts", "droppable", "key", "message")
+
+    def __init__(self, parts: Sequence, droppable: bool, key: Optional[Hashable], message: Optional[Message]):
+        self.parts = parts
+        self.droppable = droppable
+        self.key = key
+        self.message = message  # kept for frames that may be coalesced or cancelled
+
+
+class OutboundQueue:
+    """Bounded FIFO of encoded frames waiting to be written to one connection.
+
+    put() 不會阻塞：佇列滿時依 SlowConsumerPolicy 處理 event，回傳 False 代表應該中斷這個連線。
+    COALESCE 策略下，尚未送出的 event 若被同 key 的新 event 取代，直接在原位置換成新的 frame；
+    ROOM_REMOVED 會取消該房間尚未送出的 ROOM_UPDATED（見 cancelled_key），並在它的位置送出。
+    設定了 `encoder` 時，取代者會帶上被取代事件的 lobby version 重新編碼（見 merge_lobby_versions），
+    所以 frame 依其最舊的 version 排序送出，客戶端不會看到跳號。
+    get() 供 writer 執行緒阻塞取用；get_nowait() 供 reactor / event loop 在可寫時取用。
+    """
+    def __init__(self, max_frames: int = DEFAULT_MAX_QUEUED_FRAMES,
+                 policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+                 stats: Optional[OutboundStats] = None):
+        if max_frames < 1:
+            raise ValueError("max_frames must be at least 1")
+        self._max_frames = max_frames
+        self._policy = policy
+        self._coalesce = policy == SlowConsumerPolicy.COALESCE
+        self._stats = stats
+        self.encoder: Optional[Callable[[Message], Sequence]] = None  # message -> prefixed buffers, set by the session
+        self._frames: deque[_Frame] = deque()  # cancelled frames stay here with parts=None until popped
+        self._live = 0
+        self._keyed: dict[Hashable, _Frame] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    @property
+    def policy(self) -> SlowConsumerPolicy:
+        return self._policy
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return self._live
+
+    def put(self, parts: Sequence, *, droppable: bool = False, key: Optional[Hashable] = None,
+            cancels: Optional[Hashable] = None, message: Optional[Message] = None) -> bool:
+        """Queue one frame. Returns False when the consumer is too slow and must be disconnected.
+
+        `message` is the decoded form of `parts`; it lets a coalesced or cancelling event carry the replaced versions.
+        """
+        with self._cond:
+            if self._closed:
+                raise SessionDisconnectedError("outbound queue closed")
+            if self._coalesce:
+                if cancels is not None:
+                    cancelled = self._keyed.pop(cancels, None)
+                    if cancelled is not None:
+                        self._count(cancelled=1)
+                        merged = self._merge(cancelled.message, message)
+                        if merged is not None:
+                            # the cancelling event takes the cancelled one's place, versions included
+                            cancelled.parts, cancelled.message = merged
+                            cancelled.key = key
+                            cancelled.droppable = droppable
+                            if key is not None:
+                                self._keyed[key] = cancelled
+                            return True
+                        cancelled.parts = None
+                        self._live -= 1
+                if key is not None:
+                    queued = self._keyed.get(key)
+                    if queued is not None:
+                        self._count(coalesced=1)
+                        merged = self._merge(queued.message, message)
+                        if merged is not None:
+                            queued.parts, queued.message = merged
+                        else:
+                            queued.parts, queued.message = parts, message
+                        return True
+            if self._live >= self._max_frames:
+                if not droppable or self._policy == SlowConsumerPolicy.DISCONNECT:
+                    return False
+                self._count(dropped=1)
+                return True
+            frame = _Frame(parts, droppable, key, message if (key is not None and self._coalesce) else None)
+            self._frames.append(frame)
+            self._live += 1
+            if key is not None and self._coalesce:
+                self._keyed[key] = frame
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: float | None = None) -> Optional[Sequence]:
+        """Next frame's buffers; blocks while empty. None after close() or on timeout."""
+        with self._cond:
+            while not self._live:
+                if self._closed or not self._cond.wait(timeout):
+                    return None
+            return self._pop_locked()
+
+    def get_nowait(self) -> Optional[Sequence]:
+        with self._cond:
+            if not self._live:
+                return None
+            return self._pop_locked()
+
+    def close(self) -> None:
+        """Discard queued frames and wake the writer; later put() calls raise SessionDisconnectedError."""
+        with self._cond:
+            self._closed = True
+            self._frames.clear()
+            self._keyed.clear()
+            self._live = 0
+            self._cond.notify_all()
+
+    def _pop_locked(self) -> Sequence:
+        while True:
+            frame = self._frames.popleft()
+            if frame.parts is not None:
+                break
+        self._live -= 1
+        if frame.key is not None and self._keyed.get(frame.key) is frame:
+            del self._keyed[frame.key]
+        return frame.parts
+
+    def _merge(self, older: Optional[Message], newer: Optional[Message]) -> Optional[tuple[Sequence, Message]]:
+        if newer is None or self.encoder is None:
+            return None
+        merged = merge_lobby_versions(older, newer)
+        if merged is None:
+            return None
+        return self.encoder(merged), merged
+
+    def _count(self, *, dropped: int = 0, coalesced: int = 0, cancelled: int = 0) -> None:
+        self.dropped += dropped
+        self.coalesced += coalesced
+        self.cancelled += cancelled
+        if self._stats is not None:
+            self._stats.add(dropped=dropped, coalesced=coalesced, cancelled=cancelled)
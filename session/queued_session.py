@@ -0,0 +1,121 @@
+import logging
+import threading
+from concurrent.futures import Executor
+from typing import Optional
+from transport.framed_socket import FramedSocket
+from protocol.message import Message
+from protocol.enums import MessageType
+from .session import Session
+from .outbound import OutboundQueue, coalesce_key, cancelled_key
+from .broadcast import SharedFrame
+from .errors import SessionError, SessionDisconnectedError
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedSession(Session):
+    """Server-side Session whose writes go through a bounded OutboundQueue drained by a writer.
+
+    send_message() 只負責編碼並放入佇列，不會阻塞；因此廣播事件的 handler 不會被慢速或卡住的客戶端拖住。
+    佇列滿時依 OutboundQueue 的 SlowConsumerPolicy 丟棄/合併事件或中斷連線。
+    writer 預設是每個 session 一條執行緒；給定 `writer_pool` 時改由共用的 pool 在有資料時排程 flush，
+    同一 session 同時最多一個 flush，連線數不再決定執行緒數。
+    """
+    def __init__(self, fsock: FramedSocket, outbound: Optional[OutboundQueue] = None, *,
+                 writer_pool: Optional[Executor] = None):
+        super().__init__(fsock)
+        self._outbound = outbound if outbound is not None else OutboundQueue()
+        self._outbound.encoder = self.encode_prefixed
+        self._writer_pool = writer_pool
+        self._flush_lock = threading.Lock()
+        self._flushing = False  # a flush task is scheduled or running on writer_pool
+        if writer_pool is None:
+            self._writer = threading.Thread(target=self._writer_loop, name="SessionWriter", daemon=True)
+            self._writer.start()
+
+    @property
+    def outbound(self) -> OutboundQueue:
+        return self._outbound
+
+    def send_message(self, message: Message):
+        """Queue one message. Events for a closed or overflowing session are dropped silently so a
+        broadcasting handler is never interrupted by someone else's connection; responses raise."""
+        try:
+            buffers = self.encode_prefixed(message)
+        except Exception as e:
+            raise SessionError("send_message failed") from e
+        self._enqueue(buffers, message.type == MessageType.EVENT, coalesce_key(message), cancelled_key(message), message)
+
+    def send_shared(self, shared: SharedFrame):
+        try:
+            data = self.shared_frame(shared)
+        except Exception as e:
+            raise SessionError("send_shared failed") from e
+        self._enqueue((data,), shared.droppable, shared.key, shared.cancels, shared.message)
+
+    def _enqueue(self, buffers, droppable: bool, key, cancels, message: Message):
+        try:
+            accepted = self._outbound.put(buffers, droppable=droppable, key=key, cancels=cancels, message=message)
+        except SessionDisconnectedError:
+            if droppable:
+                return
+            raise
+        if not accepted:
+            logger.warning("Outbound queue of %s is full; disconnecting slow consumer", self.peer_address)
+            self.close()
+            if not droppable:
+                raise SessionDisconnectedError("outbound queue full")
+            return
+        if self._writer_pool is not None:
+            self._schedule_flush()
+
+    def close(self):
+        self._outbound.close()
+        super().close()
+
+    def _writer_loop(self):
+        while True:
+            parts = self._outbound.get()
+            if parts is None:
+                return
+            if not self._write(parts):
+                return
+
+    def _schedule_flush(self):
+        with self._flush_lock:
+            if self._flushing:
+                return
+            self._flushing = True
+        try:
+            self._writer_pool.submit(self._flush)
+        except RuntimeError:  # pool shut down with the server
+            with self._flush_lock:
+                self._flushing = False
+
+    def _flush(self):
+        """writer_pool task: write queued frames until the queue is empty."""
+        while True:
+            parts = self._outbound.get_nowait()
+            if parts is None:
+                with self._flush_lock:
+                    # a frame queued after get_nowait() saw _flushing set and did not schedule another flush
+                    if len(self._outbound) and not self._outbound.closed:
+                        continue
+                    self._flushing = False
+                    return
+            if not self._write(parts):
+                with self._flush_lock:
+                    self._flushing = False
+                return
+
+    def _write(self, parts) -> bool:
+        try:
+            self._fsock.send_prefixed(parts)
+            return True
+        except Exception as e:
+            logger.debug("Writer for %s stopped: %s", self.peer_address, e)
+            try:
+                self.close()
+            except SessionError:
+                pass
+            return False
@@ -1,21 +1,34 @@
+import heapq
 import logging
-import queue
+import socket
+import time
+from concurrent.futures import Future, InvalidStateError
 from typing import Callable, Optional
-from transport.framed_socket import FramedSocket
+from transport.framed_socket import FramedSocket, frame_prefix
 from protocol.message import Message
-from protocol.enums import MessageType
-from protocol.json_codec import encode as encode_message, decode as decode_message
+from protocol.enums import Action, Feature, MessageType
+from protocol.codec import encode_parts, decode as decode_message, describe as describe_frame
+from protocol.payloads.session import HelloPayload
 from .errors import SessionError, SessionTimeoutError, SessionDisconnectedError
+from .broadcast import SharedFrame
+from .event_queue import EventQueue
 from transport.errors import InteractionTimeoutError, DisconnectedError
 import threading
 
 logger = logging.getLogger(__name__)
+
+# Wire features this implementation understands; the peers agree on a subset via Action.HELLO.
+SUPPORTED_FEATURES = frozenset({Feature.ATTACHMENTS.value, Feature.BINARY.value})
+
 class Session:
     def __init__(self, fsock: FramedSocket):
         self._fsock = fsock
-        self._event_queue: queue.Queue[Message] = queue.Queue()
-        self._response_dict: dict[str, Message] = {}
-        self._cond = threading.Condition()
+        self._event_queue = EventQueue()  # events not taken by an on_event callback; superseded ones coalesce
+        self._pending: dict[str, Future] = {}
+        self._deadlines: list[tuple[float, str]] = []  # heap of (monotonic deadline, msg_id)
+        self._pending_lock = threading.Lock()
+        self._wakeup_r: socket.socket | None = None
+        self._wakeup_w: socket.socket | None = None
         self._stop_event = threading.Event()
         self.recv_message_thread: Optional[threading.Thread] = None
         self._on_event: Optional[Callable[[Message], None]] = None
@@ -23,6 +36,8 @@ class Session:
         self._rxloop_prev_timeout: float | None = None
         self._user_timeout: float | None = None
         self._trace_io: bool = False
+        self._features: frozenset[str] = frozenset()
+        self._closed = False
 
     def set_trace_io(self, enabled: bool) -> None:
         self._trace_io = bool(enabled)
@@ -31,25 +46,80 @@ class Session:
     def peer_address(self) -> tuple[str, int] | None:
         return self._fsock.peer_address
 
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def features(self) -> frozenset[str]:
+        """Wire features negotiated with the peer (empty = legacy JSON frames only)."""
+        return self._features
+
+    def enable_features(self, features) -> frozenset[str]:
+        """Enable the supported subset of `features` for outgoing frames and return it."""
+        self._features = SUPPORTED_FEATURES.intersection(features)
+        return self._features
+
+    def negotiate_features(self, features=SUPPORTED_FEATURES, *, timeout: float | None = None) -> frozenset[str]:
+        """Offer `features` to the server with Action.HELLO and enable what it accepts.
+
+        舊版伺服器不認得 HELLO，會直接斷線（SessionDisconnectedError）或不回應（`timeout` 後 SessionTimeoutError）；
+        呼叫端應準備好改以純 JSON frame 重新連線（見 Client.connect）。未協商的連線維持純 JSON frame。
+        """
+        req = Message.request(Action.HELLO, HelloPayload(features=sorted(SUPPORTED_FEATURES.intersection(features))))
+        resp = self.request_response(req, timeout=timeout)
+        if not resp.ok:
+            return self._features
+        return self.enable_features(resp.payload.features)
+
     def send_message(self, message: Message):
         try:
-            data = encode_message(message)
-            if self._trace_io:
-                logger.debug("TX %s", data.decode("utf-8"))
-            self._fsock.send(data)
+            self._fsock.send_buffers(self.encode_frame(message))
         except InteractionTimeoutError as e:
             raise SessionTimeoutError("send_message timed out") from e
         except Exception as e:
             # 不在下層記 exception，改由呼叫端/邊界統一記錄
             raise SessionError("send_message failed") from e
 
+    def send_shared(self, shared: SharedFrame):
+        """Write a broadcast frame that is encoded once for all sessions with the same wire format."""
+        try:
+            self._fsock.send_prefixed((self.shared_frame(shared),))
+        except InteractionTimeoutError as e:
+            raise SessionTimeoutError("send_shared timed out") from e
+        except Exception as e:
+            raise SessionError("send_shared failed") from e
+
+    def shared_frame(self, shared: SharedFrame) -> bytes:
+        """This session's variant of `shared` (length prefix included)."""
+        data = shared.frame(self._features)
+        if self._trace_io:
+            logger.debug("TX %s", describe_frame(memoryview(data)[4:]))
+        return data
+
+    def encode_frame(self, message: Message) -> list[bytes | bytearray | memoryview]:
+        """Encode a message into the buffers of a frame body (without length prefix)."""
+        parts = encode_parts(message, self._features)
+        if self._trace_io:
+            logger.debug("TX %s", describe_frame(parts[0]))
+        return parts
+
+    def encode_prefixed(self, message: Message) -> list[bytes | bytearray | memoryview]:
+        """encode_frame() with the length prefix in front, ready for send_prefixed()."""
+        parts = self.encode_frame(message)
+        return [frame_prefix(parts), *parts]
+
+    def decode_frame(self, data: bytes | bytearray | memoryview) -> Message:
+        """Decode one received frame body into a message."""
+        message = decode_message(data)
+        if self._trace_io:
+            logger.debug("RX %s", describe_frame(data))
+        return message
+
     def receive_message(self) -> Message:
         try:
             data = self._fsock.receive()
-            message = decode_message(data)
-            if self._trace_io:
-                logger.debug("RX %s", data.decode("utf-8"))
-            return message
+            return self.decode_frame(data)
         except InteractionTimeoutError as e:
             # 接收超時屬於「暫時無資料」，上層可選擇重試或忽略
             raise SessionTimeoutError("receive_message timed out") from e
@@ -61,32 +131,32 @@ class Session:
             # 不在下層記 exception，改由呼叫端/邊界統一記錄
             raise SessionError("receive_message failed") from e
     
-    def request_response(self, message: Message, *, on_event: Optional[Callable[[Message], None]] = None) -> Message:
+    def request_response(self, message: Message, *, on_event: Optional[Callable[[Message], None]] = None,
+                         timeout: float | None = None) -> Message:
         """Send a request and wait until the matching response is received.
 
         Any non-matching messages received during the wait are treated as events.
         If `on_event` is provided, it will be invoked for each such message; otherwise,
         they are queued and can be retrieved later via `poll_event()`.
+        With `timeout`, SessionTimeoutError is raised if no response arrives within that many seconds.
         """
         req_id = message.msg_id
         if not req_id:
             # Defensive: although Message.request always sets msg_id
             logger.debug("request_response called with message without msg_id; sending anyway")
-        # If background recv loop is running, coordinate via condition + response_dict
-        if self.recv_message_thread is not None and self.recv_message_thread.is_alive():
-            self.send_message(message)
-            with self._cond:
-                while req_id not in self._response_dict:
-                    self._cond.wait()
-                resp = self._response_dict.pop(req_id)
-                return resp
+        # If background recv loop is running, wait on this request's own future
+        if req_id and self._recv_loop_running():
+            return self.request_async(message, timeout=timeout).result()
         # Fallback: do inline receive loop
+        deadline = time.monotonic() + timeout if timeout is not None else None
         self.send_message(message)
         while True:
             try:
                 incoming = self.receive_message()
             except SessionTimeoutError:
                 # 無資料，繼續等待
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
                 continue
             if incoming.type == MessageType.RESPONSE and incoming.msg_id == req_id:
                 return incoming
@@ -97,8 +167,104 @@ class Session:
                     self._event_queue.put(incoming)
             except Exception:
                 logger.exception("on_event callback raised")
+
+    def request_async(self, message: Message, *, timeout: float | None = None) -> "Future[Message]":
+        """Send a request and return a Future resolved with the response carrying the same msg_id.
+
+        需要背景接收迴圈（start_recv_loop）。每個 response 只會喚醒自己的 Future，
+        因此可以同時送出多個 request。`timeout` 秒內未收到 response 時 Future 以 SessionTimeoutError 結束；
+        呼叫 `future.cancel()` 可放棄等待（已送出的 request 不會撤回，遲到的 response 直接丟棄）。
+        """
+        req_id = message.msg_id
+        if not req_id:
+            raise SessionError("request_async needs a message with msg_id")
+        if not self._recv_loop_running():
+            raise SessionError("request_async requires the background receive loop")
+        fut: Future[Message] = Future()
+        with self._pending_lock:
+            if req_id in self._pending:
+                raise SessionError(f"request {req_id} is already in flight")
+            self._pending[req_id] = fut
+            earliest = False
+            if timeout is not None:
+                heapq.heappush(self._deadlines, (time.monotonic() + timeout, req_id))
+                earliest = self._deadlines[0][1] == req_id
+        if earliest:
+            self._wakeup()  # the receive loop is blocked without a deadline or with a later one
+        fut.add_done_callback(lambda f, rid=req_id: self._forget_request(rid, f))
+        try:
+            self.send_message(message)
+        except BaseException as e:
+            self._fail_request(req_id, e)
+        return fut
+
+    def _recv_loop_running(self) -> bool:
+        t = self.recv_message_thread
+        return t is not None and t.is_alive()
+
+    def _forget_request(self, req_id: str, fut: Future) -> None:
+        with self._pending_lock:
+            if self._pending.get(req_id) is fut:
+                del self._pending[req_id]
+
+    def _resolve_request(self, response: Message) -> bool:
+        """Hand a response to the future waiting for it; False if nobody is waiting."""
+        with self._pending_lock:
+            fut = self._pending.pop(response.msg_id, None)  # type: ignore[arg-type]
+        if fut is None:
+            return False
+        try:
+            fut.set_result(response)
+        except InvalidStateError:
+            pass  # cancelled meanwhile
+        return True
+
+    def _fail_request(self, req_id: str, exc: BaseException) -> None:
+        with self._pending_lock:
+            fut = self._pending.pop(req_id, None)
+        if fut is not None:
+            try:
+                fut.set_exception(exc)
+            except InvalidStateError:
+                pass
+
+    def _fail_all_requests(self, make_exc: Callable[[], BaseException]) -> None:
+        with self._pending_lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+            self._deadlines.clear()
+        for _, fut in pending:
+            try:
+                fut.set_exception(make_exc())
+            except InvalidStateError:
+                pass
+
+    def _next_deadline_in(self) -> float | None:
+        with self._pending_lock:
+            if not self._deadlines:
+                return None
+            return max(0.0, self._deadlines[0][0] - time.monotonic())
+
+    def _expire_requests(self) -> None:
+        """Fail requests whose deadline has passed (called from the receive loop)."""
+        if not self._deadlines:
+            return
+        now = time.monotonic()
+        expired = []
+        with self._pending_lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, req_id = heapq.heappop(self._deadlines)
+                fut = self._pending.pop(req_id, None)
+                if fut is not None:
+                    expired.append(fut)
+        for fut in expired:
+            try:
+                fut.set_exception(SessionTimeoutError("request timed out"))
+            except InvalidStateError:
+                pass
     
     def close(self):
+        self._closed = True
         try:
             self.stop_recv_loop()
             self._fsock.close()
@@ -150,10 +316,7 @@ class Session:
     
     def poll_event(self) -> Message | None:
         """Retrieve one queued event message, if any."""
-        try:
-            return self._event_queue.get_nowait()
-        except queue.Empty:
-            return None
+        return self._event_queue.get_nowait()
 
     # --- Background receive loop management ---
     def start_recv_loop(self, *, on_event: Optional[Callable[[Message], None]] = None, on_disconnect: Optional[Callable[[], None]] = None) -> None:
@@ -168,15 +331,17 @@ class Session:
         self._on_event = on_event
         self._on_disconnect = on_disconnect
         self._stop_event.clear()
-        # 為了能在 stop 時快速退出阻塞的 recv，將接收設為短超時（不影響 send）
+        # 接收迴圈阻塞等待資料（不再以短超時輪詢）；stop 或新的 request 期限透過 wakeup socketpair 喚醒。
+        # frame 開始到達後以阻塞方式讀完，避免大 frame 讀到一半逾時而破壞 framing。
         try:
-            # 儲存舊值並設為短接收超時（例如 0.2s）
             # self._rxloop_prev_timeout = self._fsock.gettimeout()
             self._rxloop_prev_recv_timeout = self._fsock.get_recv_timeout()
-            self._fsock.set_recv_timeout(0.2)
+            self._fsock.set_recv_timeout(None)
         except Exception:
-            # 若設置失敗，不影響主流程；只是可能需要靠 join 超時結束
             pass
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
         t = threading.Thread(target=self._recv_loop, name="SessionRecvLoop", daemon=True)
         self.recv_message_thread = t
         t.start()
@@ -185,13 +350,15 @@ class Session:
         if self.recv_message_thread is None:
             return
         self._stop_event.set()
-        # Waking up the thread if it's blocked on socket happens when socket closes
+        self._wakeup()
         try:
             self.recv_message_thread.join(timeout=2.0)
         except Exception:
             pass
         finally:
             self.recv_message_thread = None
+            self._close_wakeup()
+            self._fail_all_requests(lambda: SessionError("receive loop stopped"))
             # 恢復原本的 io timeout 或套用 deferred 使用者設定，並恢復接收超時
             try:
                 # if self._user_timeout is not None:
@@ -206,16 +373,50 @@ class Session:
                 # self._rxloop_prev_timeout = None
                 self._rxloop_prev_recv_timeout = None
 
+    def _wakeup(self) -> None:
+        w = self._wakeup_w
+        if w is None:
+            return
+        try:
+            w.send(b"\0")
+        except OSError:
+            pass  # buffer full (a wakeup is already pending) or pair closed
+
+    def _drain_wakeups(self) -> None:
+        r = self._wakeup_r
+        if r is None:
+            return
+        try:
+            while r.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _close_wakeup(self) -> None:
+        for s in (self._wakeup_r, self._wakeup_w):
+            if s is not None:
+                try:
+                    s.close()
+                except OSError:
+                    pass
+        self._wakeup_r = self._wakeup_w = None
+
     def _recv_loop(self) -> None:
+        wakeup = self._wakeup_r
         while not self._stop_event.is_set():
+            self._expire_requests()
             try:
+                # Idle sessions sleep here until data, a stop request or the next request deadline
+                if not self._fsock.wait_readable(self._next_deadline_in(), wakeup):
+                    self._drain_wakeups()
+                    continue
                 incoming = self.receive_message()
             except SessionTimeoutError:
-                # Timeout means no data received yet, just continue checking stop_event
                 continue
-            except SessionDisconnectedError:
+            except (SessionDisconnectedError, DisconnectedError):
                 # Server closed the connection, break the loop
                 logger.info("Session disconnected in background loop")
+                self._fail_all_requests(lambda: SessionDisconnectedError("disconnected"))
                 if self._on_disconnect:
                     try:
                         self._on_disconnect()
@@ -228,9 +429,8 @@ class Session:
             try:
                 # Route by type / correlation id
                 if incoming.type == MessageType.RESPONSE and incoming.msg_id:
-                    with self._cond:
-                        self._response_dict[incoming.msg_id] = incoming
-                        self._cond.notify_all()
+                    if not self._resolve_request(incoming):
+                        logger.debug("Dropping response %s with no waiting request", incoming.msg_id)
                 else:
                     if self._on_event is not None:
                         try:
@@ -0,0 +1,70 @@
+import json
+import socket
+import struct
+import threading
+import time
+
+import client.client as client_module
+from client.client import Client
+
+
+def legacy_server(mode: str) -> tuple[tuple[str, int], list[str]]:
+    """A server that predates HELLO: it drops ("drop") or ignores ("silent") the unknown action."""
+    listener = socket.create_server(("127.0.0.1", 0))
+    seen: list[str] = []
+
+    def recv_exact(conn: socket.socket, n: int) -> bytes:
+        data = b""
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def serve(conn: socket.socket):
+        with conn:
+            try:
+                while True:
+                    (length,) = struct.unpack("!I", recv_exact(conn, 4))
+                    action = json.loads(recv_exact(conn, length))["action"]
+                    seen.append(action)
+                    if action == "session.hello" and mode == "drop":
+                        return
+            except (ConnectionError, OSError):
+                return
+
+    def accept_loop():
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return listener.getsockname(), seen
+
+
+client_module.HELLO_TIMEOUT = 0.3
+
+# a legacy server closing the connection on HELLO: reconnect and stay on plain JSON
+for mode in ("drop", "silent"):
+    addr, seen = legacy_server(mode)
+    disconnects = []
+    c = Client(addr)
+    c.connect(connect_timeout=2.0, on_disconnect=lambda: disconnects.append(1))
+    assert c.is_connected() and c._session.features == frozenset()
+    assert seen == ["session.hello"] and not disconnects
+    c.close()
+    # the next connect does not try again
+    c.connect(connect_timeout=2.0)
+    assert seen == ["session.hello"] and c._session.features == frozenset()
+    c.close()
+
+# negotiate=False never sends HELLO
+addr, seen = legacy_server("drop")
+c = Client(addr, negotiate=False)
+c.connect(connect_timeout=2.0)
+time.sleep(0.1)
+assert seen == [] and c._session.features == frozenset()
+c.close()
+
+print("client hello_fallback tests passed")
@@ -0,0 +1,99 @@
+"""Side-by-side benchmark: JSON, JSON + attachments and binary frames on recorded message mixes.
+
+Run from the repository root:
+    python -m tests.protocol.bench_binary_codec
+"""
+import time
+
+from protocol import codec
+from protocol.enums import Action
+from protocol.message import Message
+from protocol.payloads.common import EmptyPayload
+from protocol.payloads.events import *
+from protocol.payloads.game import *
+from protocol.payloads.room import *
+
+MIN_SECONDS_PER_CASE = 0.5
+CHUNK_SIZE = 1024 * 1024
+
+FORMATS = [
+    ("json", frozenset()),
+    ("json+att", frozenset({"attachments"})),
+    ("binary", frozenset({"binary"})),
+]
+
+
+def _lobby_mix() -> list[Message]:
+    """A player sitting in the lobby: periodic room list refreshes plus room events."""
+    rooms = [(f"room-{i:04d}", f"host{i}", f"game{i % 9}", 1 + i % 4, 4, "waiting") for i in range(40)]
+    mix = []
+    for i in range(10):
+        req = Message.request(Action.FETCH_ROOM_LIST, EmptyPayload())
+        mix.append(req)
+        mix.append(Message.response(Action.FETCH_ROOM_LIST, FetchRoomListResponsePayload(rooms=rooms), msg_id=req.msg_id))
+        mix.append(Message.event(Action.ROOM_UPDATED, RoomUpdatedEventPayload(f"room-{i:04d}", f"host{i}", "game1", 2, 4, "waiting")))
+        mix.append(Message.event(Action.ROOM_CREATED, RoomCreatedEventPayload(f"room-{100 + i}", "bob", "game2", 1, 4, "waiting")))
+        mix.append(Message.event(Action.MY_ROOM_UPDATED, MyRoomUpdatedEventPayload("alice", "game1", ["alice", "bob"], 4, "waiting")))
+    return mix
+
+
+def _store_mix() -> list[Message]:
+    """Browsing the store: one page of games, then detail and cover for each."""
+    games = [(f"game{i}", "1.2.0", 2, 4) for i in range(12)]
+    req = Message.request(Action.FETCH_STORE, FetchStorePayload(page=0, page_size=12))
+    mix = [req, Message.response(Action.FETCH_STORE, FetchStoreResponsePayload(games=games, total_count=240), msg_id=req.msg_id)]
+    for name, *_ in games:
+        req = Message.request(Action.FETCH_GAME_DETAIL, FetchGameDetailPayload(name))
+        mix.append(req)
+        mix.append(Message.response(Action.FETCH_GAME_DETAIL, FetchGameDetailResponsePayload(name, "dev", "1.2.0", 2, 4, "A game. " * 30), msg_id=req.msg_id))
+        req = Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload(name))
+        mix.append(req)
+        mix.append(Message.response(Action.FETCH_GAME_COVER, FetchGameCoverResponsePayload(name, b"\x89PNG" * 12 * 1024), msg_id=req.msg_id))
+    return mix
+
+
+def _download_mix() -> list[Message]:
+    """Downloading an 8 MB game in 1 MB chunks."""
+    req = Message.request(Action.DOWNLOAD_GAME_INIT, DownloadGameInitPayload("game1"))
+    mix = [req, Message.response(Action.DOWNLOAD_GAME_INIT, DownloadGameInitResponsePayload("d", "1.2.0", 2, 4, 8 * CHUNK_SIZE, CHUNK_SIZE, 8, "ab" * 32), msg_id=req.msg_id)]
+    data = bytes(range(256)) * (CHUNK_SIZE // 256)
+    for i in range(8):
+        req = Message.request(Action.DOWNLOAD_GAME_CHUNK, DownloadGameChunkPayload("d", i))
+        mix.append(req)
+        mix.append(Message.response(Action.DOWNLOAD_GAME_CHUNK, DownloadGameChunkResponsePayload("d", i, data), msg_id=req.msg_id))
+    mix.append(Message.request(Action.DOWNLOAD_GAME_FINISH, DownloadGameFinishPayload("d")))
+    return mix
+
+
+MIXES = [("lobby", _lobby_mix()), ("store", _store_mix()), ("download", _download_mix())]
+
+
+def _wire_bytes(mix: list[Message], features: frozenset[str]) -> int:
+    return sum(4 + sum(len(p) for p in codec.encode_parts(m, features)) for m in mix)
+
+
+def _roundtrips_per_second(mix: list[Message], features: frozenset[str]) -> float:
+    encode_parts, decode = codec.encode_parts, codec.decode
+    rounds = 0
+    start = time.perf_counter()
+    while True:
+        for m in mix:
+            decode(b"".join(encode_parts(m, features))).payload
+        rounds += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS_PER_CASE:
+            return rounds * len(mix) / elapsed
+
+
+def main():
+    print(f"{'mix':<10} {'format':<10} {'wire bytes':>12} {'vs json':>8} {'msgs/s (enc+dec)':>17}")
+    for label, mix in MIXES:
+        baseline = _wire_bytes(mix, frozenset())
+        for name, features in FORMATS:
+            size = _wire_bytes(mix, features)
+            rate = _roundtrips_per_second(mix, features)
+            print(f"{label:<10} {name:<10} {size:>12} {size / baseline:>7.0%} {rate:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
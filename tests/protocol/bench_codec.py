@@ -0,0 +1,121 @@
+"""Microbenchmark: json_codec encode/decode per Action, compiled payload codecs vs. the asdict/get_type_hints path.
+
+Run from the repository root:
+    python -m tests.protocol.bench_codec
+"""
+import base64
+import json
+import time
+import typing
+from dataclasses import asdict, is_dataclass
+
+from protocol import json_codec
+from protocol.enums import Action, MessageType
+from protocol.message import Message
+from protocol.payloads.auth import Credential
+from protocol.payloads.common import EmptyPayload
+from protocol.payloads.events import *
+from protocol.payloads.game import *
+from protocol.payloads.room import *
+from protocol.payloads.session import HelloPayload
+
+MIN_SECONDS_PER_CASE = 0.2
+
+_ROOMS = [(f"room{i}", f"host{i}", f"game{i % 7}", 1 + i % 4, 4, "waiting") for i in range(50)]
+_GAMES = [(f"game{i}", "1.0.0", 2, 4) for i in range(20)]
+_CHUNK = b"\x00\x01" * (512 * 1024)
+
+SAMPLES = [
+    Message.request(Action.HELLO, HelloPayload(features=["attachments"])),
+    Message.request(Action.LOGIN, Credential(username="alice", password="pw", role="player")),
+    Message.response(Action.LOGOUT, EmptyPayload(), msg_id="m"),
+    Message.request(Action.UPLOAD_GAME_INIT, UploadGameInitPayload("g", "1.0", 2, 4, "ab" * 32, 10 << 20)),
+    Message.request(Action.UPLOAD_GAME_CHUNK, UploadGameChunkPayload("u", 0, _CHUNK)),
+    Message.request(Action.UPLOAD_GAME_FINISH, UploadGameFinishPayload("u")),
+    Message.response(Action.FETCH_MY_WORKS, FetchMyWorksResponsePayload(works=_GAMES), msg_id="m"),
+    Message.response(Action.FETCH_STORE, FetchStoreResponsePayload(games=_GAMES, total_count=200), msg_id="m"),
+    Message.response(Action.FETCH_GAME_COVER, FetchGameCoverResponsePayload("g", _CHUNK[:64 * 1024]), msg_id="m"),
+    Message.response(Action.FETCH_GAME_DETAIL, FetchGameDetailResponsePayload("g", "dev", "1.0", 2, 4, "desc " * 40), msg_id="m"),
+    Message.response(Action.DOWNLOAD_GAME_INIT, DownloadGameInitResponsePayload("d", "1.0", 2, 4, 10 << 20, 1 << 20, 10, "ab" * 32), msg_id="m"),
+    Message.request(Action.DOWNLOAD_GAME_CHUNK, DownloadGameChunkPayload("d", 3)),
+    Message.response(Action.DOWNLOAD_GAME_CHUNK, DownloadGameChunkResponsePayload("d", 3, _CHUNK), msg_id="m"),
+    Message.request(Action.DOWNLOAD_GAME_FINISH, DownloadGameFinishPayload("d")),
+    Message.request(Action.CREATE_ROOM, CreateRoomPayload("g")),
+    Message.response(Action.CHECK_MY_ROOM, CheckMyRoomResponsePayload(True, "r", "g", "alice", ["alice", "bob"], 4), msg_id="m"),
+    Message.response(Action.FETCH_ROOM_LIST, FetchRoomListResponsePayload(rooms=_ROOMS), msg_id="m"),
+    Message.event(Action.ROOM_CREATED, RoomCreatedEventPayload("r", "alice", "g", 1, 4, "waiting")),
+    Message.event(Action.ROOM_UPDATED, RoomUpdatedEventPayload("r", "alice", "g", 2, 4, "waiting")),
+    Message.event(Action.MY_ROOM_UPDATED, MyRoomUpdatedEventPayload("alice", "g", ["alice", "bob"], 4, "waiting")),
+]
+
+
+def _legacy_encode(message: Message) -> bytes:
+    """json_codec.encode before compiled codecs (dataclasses.asdict per message)."""
+    payload = asdict(message.payload) if is_dataclass(message.payload) else message.payload
+    obj = {"type": message.type.value, "payload": payload, "action": message.action.value}
+    if message.msg_id:
+        obj["msg_id"] = message.msg_id
+    if message.ok is not None:
+        obj["ok"] = message.ok
+    if message.error:
+        obj["error"] = message.error
+
+    def json_default(o):
+        if isinstance(o, bytes):
+            return base64.b64encode(o).decode("ascii")
+        raise TypeError
+    return json.dumps(obj, default=json_default).encode("utf-8")
+
+
+def _legacy_decode(data: bytes) -> Message:
+    """json_codec.decode before compiled codecs (get_type_hints per message)."""
+    obj = json.loads(data.decode("utf-8"))
+    msg_type = MessageType(obj["type"])
+    action = Action(obj["action"])
+    if msg_type == MessageType.RESPONSE and action in json_codec._RESPONSE_PAYLOAD_MAP:
+        payload_cls = json_codec._RESPONSE_PAYLOAD_MAP[action]
+    else:
+        payload_cls = json_codec._PAYLOAD_MAP.get(action, EmptyPayload)
+    if payload_cls is EmptyPayload:
+        payload = EmptyPayload()
+    else:
+        payload_dict = obj["payload"]
+        for field_name, field_type in typing.get_type_hints(payload_cls).items():
+            if field_type == bytes and field_name in payload_dict:
+                payload_dict[field_name] = base64.b64decode(payload_dict[field_name])
+        payload = payload_cls(**payload_dict)
+    return Message(type=msg_type, action=action, payload=payload, msg_id=obj.get("msg_id"), ok=obj.get("ok"), error=obj.get("error"))
+
+
+def _decode_full(data) -> Message:
+    """Decode including the (lazily built) payload."""
+    msg = json_codec.decode(data)
+    msg.payload
+    return msg
+
+
+def _rate(fn, arg) -> float:
+    count = 0
+    start = time.perf_counter()
+    while True:
+        fn(arg)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS_PER_CASE:
+            return count / elapsed
+
+
+def main():
+    print(f"{'message':<28} {'enc legacy/s':>13} {'enc/s':>10} {'dec legacy/s':>13} {'dec/s':>10} {'att enc/s':>10} {'att dec/s':>10}")
+    for msg in SAMPLES:
+        data = json_codec.encode(msg)
+        frame = b"".join(json_codec.encode_parts(msg, attachments=True))
+        assert _legacy_decode(data).msg_id == json_codec.decode(data).msg_id == json_codec.decode(frame).msg_id
+        label = f"{msg.type.value}:{msg.action.value}"
+        print(f"{label:<28} {_rate(_legacy_encode, msg):>13.0f} {_rate(json_codec.encode, msg):>10.0f} "
+              f"{_rate(_legacy_decode, data):>13.0f} {_rate(_decode_full, data):>10.0f} "
+              f"{_rate(lambda m: json_codec.encode_parts(m, attachments=True), msg):>10.0f} {_rate(_decode_full, frame):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import socket
+import threading
+
+from protocol.enums import Action, Feature, MessageType
+from protocol.message import Message
+from protocol.errors import SchemaError
+from protocol.json_codec import encode, encode_parts, decode, describe, is_attachment_frame
+from protocol.payloads.game import UploadGameChunkPayload, FetchGameCoverResponsePayload
+from protocol.payloads.auth import Credential
+from session.session import Session
+from transport.framed_socket import FramedSocket
+
+data = bytes(range(256)) * 4096  # 1 MiB
+
+# bytes fields travel as raw attachments, not base64
+req = Message.request(Action.UPLOAD_GAME_CHUNK, UploadGameChunkPayload(upload_id="u1", chunk_index=3, data=data))
+parts = encode_parts(req, attachments=True)
+assert len(parts) == 2 and parts[1] is data
+frame = b"".join(parts)
+assert is_attachment_frame(frame)
+assert len(frame) < len(data) + 256
+assert len(encode(req)) > len(data) * 4 // 3
+
+decoded = decode(frame)
+assert decoded.type == MessageType.REQUEST and decoded.action == Action.UPLOAD_GAME_CHUNK
+assert decoded.msg_id == req.msg_id
+assert decoded.payload.upload_id == "u1" and decoded.payload.chunk_index == 3
+assert isinstance(decoded.payload.data, memoryview) and decoded.payload.data.readonly
+assert decoded.payload.data == data
+assert '"$att": 0' in describe(frame)
+
+# Empty attachments and payloads without bytes fields
+resp = Message.response(Action.FETCH_GAME_COVER, FetchGameCoverResponsePayload(game_name="g", cover_data=b""), msg_id=req.msg_id, ok=False, error="Game not found")
+decoded = decode(bytearray(b"".join(encode_parts(resp, attachments=True))))
+assert decoded.payload.cover_data == b"" and decoded.ok is False and decoded.error == "Game not found"
+
+login = Message.request(Action.LOGIN, Credential(username="user", password="pass", role="player"))
+decoded = decode(b"".join(encode_parts(login, attachments=True)))
+assert decoded.payload.username == "user"
+
+# Legacy JSON frames still decode, and attachments=False keeps emitting them
+assert encode_parts(req) == [encode(req)]
+assert decode(encode(req)).payload.data == data
+
+# Truncated attachment frames are rejected
+try:
+    decode(frame[:-1])
+except SchemaError as e:
+    assert "length mismatch" in str(e)
+else:
+    raise AssertionError("truncated frame decoded")
+
+# Attachments received over a socket stay valid after the next frame arrives (each frame owns its buffer)
+a, b = socket.socketpair()
+sender, receiver = Session(FramedSocket(a)), Session(FramedSocket(b))
+for session in (sender, receiver):
+    session.enable_features({Feature.ATTACHMENTS.value, Feature.BINARY.value})
+other = bytes(reversed(data))
+
+
+def send_chunks():
+    for chunk_data in (data, other):
+        sender.send_message(Message.request(Action.UPLOAD_GAME_CHUNK, UploadGameChunkPayload(upload_id="u1", chunk_index=0, data=chunk_data)))
+
+
+writer = threading.Thread(target=send_chunks)
+writer.start()
+first, second = receiver.receive_message(), receiver.receive_message()
+assert first.payload.data == data and second.payload.data == other
+writer.join()
+sender.close()
+receiver.close()
+
+print("protocol roundtrip_attachments tests passed")
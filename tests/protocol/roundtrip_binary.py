@@ -0,0 +1,53 @@
+from protocol import binary_codec, codec, json_codec
+from protocol.enums import Action, MessageType
+from protocol.errors import SchemaError
+from protocol.message import Message
+from protocol.payloads.game import DownloadGameChunkResponsePayload
+from protocol.payloads.room import CheckMyRoomResponsePayload, FetchRoomListResponsePayload
+from protocol.payloads.events import RoomRemovedEventPayload
+
+# Every action has a distinct wire code
+assert len(set(binary_codec.ACTION_CODES.values())) == len(Action)
+
+data = b"\xff" * 100_000
+resp = Message.response(Action.DOWNLOAD_GAME_CHUNK, DownloadGameChunkResponsePayload("d1", 7, data), msg_id="1b4e28ba-2fa1-11d2-883f-0016d3cca427", ok=True)
+parts = binary_codec.encode_parts(resp)
+assert parts[1] is data
+frame = b"".join(parts)
+assert len(frame) < len(data) + 64
+
+decoded = codec.decode(frame)
+assert decoded.type == MessageType.RESPONSE and decoded.action == Action.DOWNLOAD_GAME_CHUNK
+assert decoded.msg_id == resp.msg_id and decoded.ok is True and decoded.error is None
+assert decoded.payload.download_id == "d1" and decoded.payload.chunk_index == 7
+assert isinstance(decoded.payload.data, memoryview) and decoded.payload.data == data
+assert '"data": "<100000 bytes>"' in codec.describe(parts[0])
+
+# Non-UUID ids, errors, tuple lists and events
+rooms = [("r1", "alice", "g", 1, 4, "waiting")]
+resp = Message.response(Action.FETCH_ROOM_LIST, FetchRoomListResponsePayload(rooms=rooms), msg_id="custom-id", ok=False, error="Unauthenticated session")
+decoded = binary_codec.decode(binary_codec.encode(resp))
+assert decoded.msg_id == "custom-id" and decoded.ok is False and decoded.error == "Unauthenticated session"
+assert decoded.payload.rooms == rooms
+
+event = Message.event(Action.ROOM_REMOVED, RoomRemovedEventPayload("r1"))
+decoded = binary_codec.decode(binary_codec.encode(event))
+assert decoded.type == MessageType.EVENT and decoded.msg_id is None and decoded.ok is None
+assert decoded.payload.room_id == "r1"
+
+# The codec front-end still decodes JSON frames and picks the format from the features
+assert codec.decode(json_codec.encode(event)).payload.room_id == "r1"
+assert binary_codec.is_binary_frame(codec.encode_parts(event, frozenset({"binary", "attachments"}))[0])
+assert codec.encode_parts(event) == [json_codec.encode(event)]
+
+# Field count mismatch is a schema error, raised when the payload is first read
+bad = binary_codec.decode(binary_codec.encode(Message.event(Action.ROOM_REMOVED, CheckMyRoomResponsePayload(False, "", "", "", [], 0))))
+assert bad.action == Action.ROOM_REMOVED and not bad.payload_loaded
+try:
+    bad.payload
+except SchemaError:
+    pass
+else:
+    raise AssertionError("mismatched payload decoded")
+
+print("protocol roundtrip_binary tests passed")
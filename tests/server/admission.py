@@ -0,0 +1,81 @@
+import os
+import socket
+import tempfile
+import threading
+
+from client.infra.connector import Connector
+from protocol.enums import Action, MessageType
+from protocol.message import Message
+from protocol.payloads.common import EmptyPayload
+from server.infra.admission import AdmissionController, AdmissionLimits, SERVER_BUSY_ERROR
+from server.server import Server
+
+# Limits are counted per owner and server-wide
+ctl = AdmissionController(AdmissionLimits(max_connections=1, max_inflight_per_session=2, max_queued_requests=3))
+assert ctl.open_connection() is True
+assert ctl.open_connection() is False
+assert ctl.admit("a") and ctl.admit("a")
+assert ctl.admit("a") is False  # per-session limit
+assert ctl.admit("b") is True
+assert ctl.admit("c") is False  # server-wide limit
+ctl.release("a", 2)
+assert ctl.admit("c") is True
+assert ctl.stats() == {"connections": 1, "queued_requests": 2, "rejected_connections": 1, "rejected_requests": 2}
+ctl.close_connection()
+assert ctl.open_connection() is True
+
+# Thread engine: one dispatch worker, one in-flight request per connection
+workdir = tempfile.mkdtemp()
+os.chdir(workdir)
+
+server = Server(("127.0.0.1", 0), workers=1,
+                admission_limits=AdmissionLimits(max_connections=2, max_inflight_per_session=1, max_queued_requests=16))
+gate = threading.Event()
+dispatch = server._dispatcher.dispatch
+
+
+def gated_dispatch(req, session):
+    gate.wait(timeout=5.0)
+    return dispatch(req, session)
+
+
+server._dispatcher.dispatch = gated_dispatch
+addr = server._acceptor._sock.getsockname()
+t = threading.Thread(target=server.serve, daemon=True)
+t.start()
+
+s = Connector(addr).connect(connect_timeout=2.0)
+s.set_recv_timeout(2.0)
+first = Message.request(Action.FETCH_ROOM_LIST, EmptyPayload())
+second = Message.request(Action.FETCH_ROOM_LIST, EmptyPayload())
+s.send_message(first)
+s.send_message(second)
+
+# The second request is shed while the first is still held by the handler
+resp = s.receive_message()
+assert resp.type == MessageType.RESPONSE and resp.msg_id == second.msg_id
+assert resp.ok is False and resp.error == SERVER_BUSY_ERROR
+
+gate.set()
+resp = s.receive_message()
+assert resp.msg_id == first.msg_id and resp.error != SERVER_BUSY_ERROR
+
+# Once answered, the slot is free again
+third = Message.request(Action.FETCH_ROOM_LIST, EmptyPayload())
+s.send_message(third)
+resp = s.receive_message()
+assert resp.msg_id == third.msg_id and resp.error != SERVER_BUSY_ERROR
+
+# A connection over the limit is closed without being served
+s2 = Connector(addr).connect(connect_timeout=2.0)
+s3 = socket.create_connection(addr, timeout=2.0)
+assert s3.recv(1) == b""
+assert server._admission.stats()["rejected_connections"] == 1
+
+for sess in (s, s2):
+    sess.close()
+s3.close()
+server.stop()
+t.join(timeout=2.0)
+
+print("server admission tests passed")
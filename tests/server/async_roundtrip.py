@@ -0,0 +1,69 @@
+import asyncio
+import os
+import tempfile
+import threading
+
+from protocol.enums import Action, MessageType, Role
+from protocol.message import Message
+from protocol.payloads.auth import Credential
+from protocol.payloads.common import EmptyPayload
+from protocol.payloads.game import UploadGameChunkPayload
+from protocol.payloads.room import FetchRoomChangesPayload
+from server.async_server import AsyncServer
+from session.async_session import AsyncSession
+
+# Run the asyncio engine in a scratch directory (Database/UploadManager write to cwd)
+workdir = tempfile.mkdtemp()
+os.chdir(workdir)
+
+server = AsyncServer(("127.0.0.1", 0), workers=2)
+host, port = server._acceptor.get_socket().getsockname()
+t = threading.Thread(target=server.serve, daemon=True)
+t.start()
+
+
+async def main():
+    sessions = []
+    for i in range(3):
+        s = await AsyncSession.connect(host, port)
+        sessions.append(s)
+        cred = Credential(username=f"user{i}", password="pw", role=Role.PLAYER.value)
+        resp = await s.request(Message.request(Action.REGISTER, cred), timeout=2.0)
+        assert resp.type == MessageType.RESPONSE and resp.ok is True, resp.error
+        resp = await s.request(Message.request(Action.LOGIN, cred), timeout=2.0)
+        assert resp.ok is True, resp.error
+
+    # Several requests in flight on one session resolve their own futures
+    s = sessions[0]
+    reqs = [Message.request(Action.FETCH_ROOM_LIST, EmptyPayload()) for _ in range(10)]
+    resps = await asyncio.gather(*(s.request(r, timeout=2.0) for r in reqs))
+    assert [r.msg_id for r in resps] == [r.msg_id for r in reqs]
+    assert all(r.ok and r.payload.rooms == [] for r in resps)
+    resp = await s.request(Message.request(Action.FETCH_ROOM_CHANGES, FetchRoomChangesPayload(since_version=resps[0].payload.version)), timeout=2.0)
+    assert resp.ok and not resp.payload.full and resp.payload.rooms == [] and resp.payload.removed == []
+
+    # Large frames go through the executor-backed handlers
+    req = Message.request(Action.UPLOAD_GAME_CHUNK, UploadGameChunkPayload(upload_id="missing", chunk_index=0, data=b"x" * (1024 * 1024)))
+    resp = await s.request(req, timeout=2.0)
+    assert resp.ok is False and resp.error == "Invalid upload ID or write error"
+    assert await s.negotiate_features(timeout=2.0) == {"attachments", "binary"}
+    resp = await s.request(req, timeout=2.0)
+    assert resp.ok is False and resp.error == "Invalid upload ID or write error"
+
+    # A serving session does not buffer what the peer should not send: events are answered like the thread engine does
+    stray = Message(type=MessageType.EVENT, action=Action.ROOM_REMOVED, payload=EmptyPayload(), msg_id="stray")
+    resp = await s.request(stray, timeout=2.0)
+    assert resp.ok is False and resp.error == "Not a request"
+
+    for s in sessions:
+        s.close()
+    await asyncio.sleep(0.1)
+    assert all(s.closed for s in sessions)
+
+
+asyncio.run(main())
+server.stop()
+t.join(timeout=2.0)
+assert not t.is_alive()
+
+print("server asyncio roundtrip tests passed")
@@ -0,0 +1,57 @@
+"""Registration burst benchmark: one commit per insert vs batched commits on the database writer.
+
+Many threads call Database.create_player at once, as during a registration burst.
+max_batch=1 reproduces the previous behaviour, where every insert was its own transaction and its own fsync.
+Run from the repository root:
+    python -m tests.server.bench_database_writer [threads] [registrations]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from server.infra.database import Database
+from server.infra.db_writer import WriteOptions, DEFAULT_BATCH_WINDOW
+
+
+def run(options: WriteOptions, threads: int, registrations: int) -> tuple[float, dict]:
+    """Registrations per second and the writer stats."""
+    db = Database(os.path.join(tempfile.mkdtemp(), "bench.db"), write_options=options)
+    per_thread = registrations // threads
+    start = threading.Barrier(threads + 1)
+
+    def register(n: int):
+        start.wait()
+        for i in range(per_thread):
+            assert db.create_player(f"user{n}_{i}", "pw")
+
+    workers = [threading.Thread(target=register, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stats = db.writer_stats()
+    db.close()
+    return per_thread * threads / elapsed, stats
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    registrations = int(sys.argv[2]) if len(sys.argv) > 2 else 6400
+    print(f"{threads} threads, {registrations} registrations")
+    print(f"{'synchronous':<12} {'commits':<22} {'reg/s':>10} {'batches':>9} {'avg batch':>10}")
+    for synchronous in ("FULL", "NORMAL"):
+        for name, options in (
+            ("one per insert", WriteOptions(batch_window=0, max_batch=1, synchronous=synchronous)),
+            (f"batched ({DEFAULT_BATCH_WINDOW * 1000:g} ms)", WriteOptions(synchronous=synchronous)),
+        ):
+            rate, stats = run(options, threads, registrations)
+            print(f"{synchronous:<12} {name:<22} {rate:>10.0f} {stats['batches']:>9} {stats['avg_batch']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
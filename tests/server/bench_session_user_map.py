@@ -0,0 +1,144 @@
+"""Contention benchmark: SessionUserMap lookups from many threads while sessions log in and out.
+
+Compares the previous map (a locked set plus one locked BijectionMap per role, scanned on every lookup)
+with the copy-on-write map whose reads take no lock.
+Run from the repository root:
+    python -m tests.server.bench_session_user_map [threads] [seconds] [sessions]
+"""
+import random
+import sys
+import threading
+import time
+
+from protocol.enums import Role
+from server.infra.bijection_map import BijectionMap
+from server.infra.session_user_map import SessionUserMap
+
+
+class LegacySessionUserMap:
+    """SessionUserMap as it was before the copy-on-write index."""
+    def __init__(self):
+        self._session_indeterminate: set = set()
+        self._session_indeterminate_lock = threading.Lock()
+        self._role_bijection_map: dict[Role, BijectionMap] = {
+            Role.PLAYER: BijectionMap(),
+            Role.DEVELOPER: BijectionMap(),
+        }
+
+    def add_session(self, session):
+        with self._session_indeterminate_lock:
+            self._session_indeterminate.add(session)
+
+    def remove_session(self, session):
+        with self._session_indeterminate_lock:
+            if session in self._session_indeterminate:
+                self._session_indeterminate.discard(session)
+                return
+        for bmap in self._role_bijection_map.values():
+            if bmap.get_by_key1(session):
+                bmap.remove_by_key1(session)
+                return
+
+    def move_session_to_user(self, session, role, username):
+        with self._session_indeterminate_lock:
+            self._session_indeterminate.remove(session)
+        self._role_bijection_map[role].add(session, username)
+
+    def move_session_back(self, session):
+        found = False
+        for bmap in self._role_bijection_map.values():
+            if bmap.get_by_key1(session):
+                bmap.remove_by_key1(session)
+                found = True
+                break
+        if found:
+            with self._session_indeterminate_lock:
+                self._session_indeterminate.add(session)
+
+    def get_session_by_user(self, role, username):
+        return self._role_bijection_map[role].get_by_key2(username)
+
+    def get_user_by_session(self, session):
+        for role, bmap in self._role_bijection_map.items():
+            username = bmap.get_by_key1(session)
+            if username:
+                return role, username
+        return None
+
+
+class _Session:
+    """Stand-in for a Session: hashable by identity, like the real one."""
+
+
+def _populate(smap, sessions: list) -> None:
+    for i, s in enumerate(sessions):
+        smap.add_session(s)
+        if i % 2 == 0:
+            smap.move_session_to_user(s, Role.PLAYER if i % 4 == 0 else Role.DEVELOPER, f"user{i}")
+
+
+def run(smap, threads: int, seconds: float, sessions: list) -> tuple[float, int]:
+    """Lookups per second over all reader threads, and the number of login/logout writes done meanwhile."""
+    _populate(smap, sessions)
+    stop = threading.Event()
+    start = threading.Barrier(threads + 2)
+    counts = [0] * threads
+    writes = 0
+
+    def reader(n: int):
+        rng = random.Random(n)
+        picks = [rng.choice(sessions) for _ in range(1024)]
+        done = 0
+        start.wait()
+        while not stop.is_set():
+            for s in picks:
+                smap.get_user_by_session(s)
+            done += len(picks)
+        counts[n] = done
+
+    def writer():
+        nonlocal writes
+        churn = [s for i, s in enumerate(sessions) if i % 2 == 1]
+        start.wait()
+        while not stop.is_set():
+            for i, s in enumerate(churn):
+                smap.move_session_to_user(s, Role.PLAYER, f"churn{i}")
+                smap.move_session_back(s)
+                writes += 2
+                if stop.is_set():
+                    break
+
+    workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)] + [threading.Thread(target=writer)]
+    for t in workers:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    return sum(counts) / (time.perf_counter() - t0), writes
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    sessions = [_Session() for _ in range(count)]
+
+    # Both maps answer the same
+    legacy, cow = LegacySessionUserMap(), SessionUserMap()
+    _populate(legacy, sessions)
+    _populate(cow, sessions)
+    assert all(legacy.get_user_by_session(s) == cow.get_user_by_session(s) for s in sessions)
+
+    print(f"{threads} reader threads + 1 login/logout writer, {count} sessions, {seconds:.1f} s each")
+    print(f"{'map':<22} {'lookups/s':>12} {'writes':>10} {'writes alone':>13}")
+    for name, cls in (("legacy (locked)", LegacySessionUserMap), ("copy-on-write", SessionUserMap)):
+        rate, writes = run(cls(), threads, seconds, sessions)
+        _, alone = run(cls(), 0, seconds, sessions)  # writer without readers: cost of the copies themselves
+        print(f"{name:<22} {rate:>12.0f} {writes:>10} {alone:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Store pagination benchmark on a large catalog: OFFSET pages vs keyset pages, COUNT(*) vs the maintained counter.
+
+With OFFSET, SQLite steps over every row before the page, so deep pages get slower;
+a keyset page (`name > cursor`) starts from the index, so page 1 and page 5,000 cost the same.
+Run from the repository root:
+    python -m tests.server.bench_store_pagination [games] [page_size] [repeat]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from server.infra.database import Database
+from server.infra.game_catalog import GameCatalog
+
+
+def _populate(path: str, games: int) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO developers (username, password) VALUES (?, 'pw')", [(f"dev{d}",) for d in range(100)])
+        conn.executemany(
+            "INSERT INTO games (name, developer, version, min_players, max_players, client_zip_sha256, client_folder_sha256, file_path) "
+            "VALUES (?, ?, '1.0.0', 2, 4, 'zip', 'folder', 'path')",
+            # names inserted in shuffled order so that the table order is not the sort order
+            [(f"game{(i * 7919) % games:07d}", f"dev{i % 100}") for i in range(games)],
+        )
+
+
+def _time(fn, repeat: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    Database(path).close()  # schema, index, counter, triggers
+    _populate(path, games)
+    db = Database(path)
+    catalog = GameCatalog(db)
+    catalog.get_total_games_count()  # load once, outside the timings
+
+    deep = max(1, games // page_size)  # last full page: page 5,000 of 100k games with 20 per page
+    deep_cursor = f"game{(deep - 1) * page_size - 1:07d}" if deep > 1 else None
+    assert [g[0] for g in db.get_all_games_paginated(deep, page_size)] == [g[0] for g in db.get_games_after(deep_cursor, page_size)]
+
+    print(f"{games} games, {page_size} per page, median of {repeat} runs (ms)")
+    print(f"{'query':<34} {'page 1':>10} {f'page {deep}':>12}")
+    rows = [
+        ("OFFSET (database)", lambda: db.get_all_games_paginated(1, page_size), lambda: db.get_all_games_paginated(deep, page_size)),
+        ("keyset (database)", lambda: db.get_games_after(None, page_size), lambda: db.get_games_after(deep_cursor, page_size)),
+        ("keyset (catalog)", lambda: catalog.get_games_after(None, page_size), lambda: catalog.get_games_after(deep_cursor, page_size)),
+    ]
+    for name, first, last in rows:
+        print(f"{name:<34} {_time(first, repeat):>10.3f} {_time(last, repeat):>12.3f}")
+
+    with sqlite3.connect(path) as conn:
+        count_all = _time(lambda: conn.execute("SELECT COUNT(*) FROM games").fetchone(), repeat)
+    print(f"{'COUNT(*)':<34} {count_all:>10.3f}")
+    print(f"{'counter (get_total_games_count)':<34} {_time(db.get_total_games_count, repeat):>10.3f}")
+    print(f"{'get_games_by_developer (indexed)':<34} {_time(lambda: db.get_games_by_developer('dev42'), repeat):>10.3f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
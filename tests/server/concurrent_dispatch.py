@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+
+from client.infra.connector import Connector
+from protocol.enums import Action
+from protocol.message import Message
+from protocol.payloads.common import EmptyPayload
+from protocol.payloads.game import UploadGameChunkPayload
+from server.dispatcher import ordering_key
+from server.server import Server
+
+
+def chunk(upload_id: str, index: int) -> Message:
+    return Message.request(Action.UPLOAD_GAME_CHUNK, UploadGameChunkPayload(upload_id=upload_id, chunk_index=index, data=b"x"))
+
+
+# Only uploads/downloads of the same id and session-level requests share a lane
+assert ordering_key(chunk("u1", 0)) == ordering_key(chunk("u1", 1)) == ("upload", "u1")
+assert ordering_key(chunk("u2", 0)) != ordering_key(chunk("u1", 0))
+assert ordering_key(Message.request(Action.FETCH_ROOM_LIST, EmptyPayload())) is None
+assert ordering_key(Message.request(Action.LOGOUT, EmptyPayload())) == "session"
+
+workdir = tempfile.mkdtemp()
+os.chdir(workdir)
+
+server = Server(("127.0.0.1", 0), workers=4, concurrent_dispatch=True)
+gate = threading.Event()
+started: list[str] = []  # msg_ids in the order handlers began
+dispatch = server._dispatcher.dispatch
+
+
+def gated_dispatch(req, session):
+    started.append(req.msg_id)
+    if req.action == Action.FETCH_STORE or (req.action == Action.UPLOAD_GAME_CHUNK and req.payload.chunk_index == 0):
+        gate.wait(timeout=5.0)
+    return dispatch(req, session)
+
+
+server._dispatcher.dispatch = gated_dispatch
+addr = server._acceptor._sock.getsockname()
+t = threading.Thread(target=server.serve, daemon=True)
+t.start()
+
+s = Connector(addr).connect(connect_timeout=2.0)
+s.set_recv_timeout(2.0)
+
+slow = Message.request(Action.FETCH_STORE, EmptyPayload())
+first, second = chunk("u1", 0), chunk("u1", 1)
+fast = Message.request(Action.FETCH_ROOM_LIST, EmptyPayload())
+for req in (slow, first, second, fast):
+    s.send_message(req)
+
+# The quick request is answered while the slow one and the upload lane are held
+resp = s.receive_message()
+assert resp.msg_id == fast.msg_id
+assert second.msg_id not in started  # waits behind chunk 0 of the same upload
+
+gate.set()
+rest = {s.receive_message().msg_id for _ in range(3)}
+assert rest == {slow.msg_id, first.msg_id, second.msg_id}
+assert started.index(first.msg_id) < started.index(second.msg_id)
+
+s.close()
+server.stop()
+t.join(timeout=2.0)
+
+print("server concurrent_dispatch tests passed")
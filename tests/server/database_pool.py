@@ -0,0 +1,53 @@
+import os
+import tempfile
+import threading
+
+from server.infra.database import Database
+
+path = os.path.join(tempfile.mkdtemp(), "pool.db")
+db = Database(path, pool_size=2)
+assert db.pool_stats()["journal_mode"] == "wal"
+
+assert db.create_player("alice", "pw") is True
+assert db.create_player("alice", "pw") is False  # IntegrityError is rolled back, the connection stays usable
+assert db.get_player("alice") == ("alice", "pw")
+assert db.create_developer("dev", "pw") is True
+assert db.create_game("g", "dev", "1.0.0", 2, 4, "zip", "folder", "path") is True
+assert db.set_game("g", "1.1.0", 2, 4, "zip2", "folder2", "path2") is True
+assert db.get_game("g")[2] == "1.1.0"
+
+# Many threads share the two pooled connections
+errors = []
+
+
+def worker(n: int):
+    try:
+        for i in range(50):
+            assert db.create_player(f"p{n}_{i}", "pw")
+            assert db.get_player(f"p{n}_{i}") == (f"p{n}_{i}", "pw")
+            assert db.get_total_games_count() == 1
+    except Exception as e:
+        errors.append(e)
+
+
+threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+assert not errors, errors
+
+pool = db.pool_stats()
+assert pool["open"] <= 2 and pool["size"] == 2
+stats = db.query_stats()
+assert stats["create_player"][0] == 2 + 8 * 50
+assert stats["get_total_games_count"][0] == 8 * 50
+
+# A fresh Database sees committed data; after close() queries fail softly
+other = Database(path)
+assert other.get_player("p7_49") == ("p7_49", "pw")
+other.close()
+db.close()
+assert db.get_player("alice") is None
+
+print("server database_pool tests passed")
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+
+from server.infra.database import Database
+from server.infra.db_writer import WriteOptions
+
+workdir = tempfile.mkdtemp()
+
+# A wide batch window: everything submitted together commits in one transaction
+db = Database(os.path.join(workdir, "writer.db"), write_options=WriteOptions(batch_window=0.2))
+pending = [db.create_player_async(f"p{i}", "pw") for i in range(50)]
+pending.append(db.create_player_async("p7", "again"))  # IntegrityError rolls back only this insert
+pending.append(db.create_developer_async("dev", "pw"))
+assert [f.result(timeout=5) for f in pending] == [True] * 50 + [False, True]
+assert db.get_player("p7") == ("p7", "pw") and db.get_developer("dev") == ("dev", "pw")
+stats = db.writer_stats()
+assert stats["batches"] == 1 and stats["writes"] == 52 and stats["failed"] == 1, stats
+
+# Synchronous callers from many threads share batches; a resolved write is visible to readers
+db.close()
+db = Database(os.path.join(workdir, "writer.db"), write_options=WriteOptions(synchronous="FULL"))
+errors = []
+
+
+def register(n: int):
+    try:
+        for i in range(20):
+            assert db.create_player(f"t{n}_{i}", "pw") is True
+            assert db.get_player(f"t{n}_{i}") == (f"t{n}_{i}", "pw")
+        assert db.create_player("p0", "pw") is False
+    except Exception as e:
+        errors.append(e)
+
+
+threads = [threading.Thread(target=register, args=(n,)) for n in range(16)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+assert not errors, errors
+stats = db.writer_stats()
+assert stats["writes"] == 16 * 21 and stats["failed"] == 16 and stats["batches"] < stats["writes"], stats
+assert db.query_stats()["create_player"][0] == 16 * 21
+
+# Games go through the writer as well
+assert db.create_game("g", "dev", "1.0.0", 2, 4, "zip", "folder", "path") is True
+assert db.create_game("g", "dev", "1.0.0", 2, 4, "zip", "folder", "path") is False
+assert db.set_game("g", "1.1.0", 2, 4, "zip", "folder", "path") is True and db.get_game("g")[2] == "1.1.0"
+assert db.set_game("missing", "1.1.0", 2, 4, "zip", "folder", "path") is False
+assert db.get_total_games_count() == 1
+
+# close() commits what is queued; later writes fail softly
+pending = [db.create_player_async(f"late{i}", "pw") for i in range(30)]
+db.close()
+assert all(f.done() and f.result() is True for f in pending)
+assert db.create_player("after", "pw") is False
+other = Database(os.path.join(workdir, "writer.db"))
+assert other.get_player("late29") == ("late29", "pw")
+other.close()
+
+try:
+    Database(os.path.join(workdir, "bad.db"), write_options=WriteOptions(synchronous="SOMETIMES"))
+    raise AssertionError("expected ValueError")
+except ValueError:
+    pass
+
+print("server database_writer tests passed")
@@ -0,0 +1,41 @@
+from protocol import binary_codec, json_codec
+from protocol.enums import Action, MessageType
+from protocol.message import Message
+from protocol.payloads.game import FetchGameCoverPayload, UploadGameChunkPayload
+from protocol.payloads.events import RoomRemovedEventPayload
+from server.dispatcher import Dispatcher
+
+
+class _NoUsers:
+    def get_user_by_session(self, session):
+        return None
+
+
+class _FakeSession:
+    peer_address = ("127.0.0.1", 0)
+
+
+d = Dispatcher(None, _NoUsers(), None)  # type: ignore[arg-type]
+session = _FakeSession()
+
+# Unauthenticated requests are rejected from the header; the 1 MB chunk is never decoded
+for encode, decode in ((json_codec.encode, json_codec.decode), (binary_codec.encode, binary_codec.decode)):
+    req = decode(encode(Message.request(Action.UPLOAD_GAME_CHUNK, UploadGameChunkPayload("u", 0, b"x" * (1024 * 1024)))))
+    resp = d.dispatch(req, session)  # type: ignore[arg-type]
+    assert not req.payload_loaded
+    assert resp.type == MessageType.RESPONSE and resp.msg_id == req.msg_id
+    assert resp.ok is False and resp.error == "Unauthenticated session"
+
+    # The placeholder has the response type the client expects
+    req = decode(encode(Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload("g"))))
+    resp = d.dispatch(req, session)  # type: ignore[arg-type]
+    assert not req.payload_loaded
+    assert resp.payload.cover_data == b"" and resp.payload.game_name == ""
+    assert binary_codec.decode(binary_codec.encode(resp)).payload.cover_data == b""
+
+    # Events sent to the server are not echoed back
+    ev = decode(encode(Message.event(Action.ROOM_REMOVED, RoomRemovedEventPayload("r"))))
+    resp = d.dispatch(ev, session)  # type: ignore[arg-type]
+    assert not ev.payload_loaded and resp.ok is False and resp.error == "Not a request"
+
+print("server dispatcher_lazy tests passed")
@@ -0,0 +1,64 @@
+from protocol.enums import Action, Role
+from protocol.message import Message
+from protocol.payloads.common import EmptyPayload
+from protocol.payloads.game import FetchGameCoverPayload
+from server.context import Route, ANY_ROLE
+from server.dispatcher import Dispatcher
+from server.middleware import RateLimit
+
+
+class _Users:
+    def __init__(self):
+        self.users = {}
+        self.lookups = 0
+
+    def get_user_by_session(self, session):
+        self.lookups += 1
+        return self.users.get(session)
+
+
+class _FakeSession:
+    peer_address = ("127.0.0.1", 0)
+
+
+users = _Users()
+d = Dispatcher(None, users, None)  # type: ignore[arg-type]
+player, developer = _FakeSession(), _FakeSession()
+users.users[player] = (Role.PLAYER, "alice")
+users.users[developer] = (Role.DEVELOPER, "dev")
+
+# Declared roles are enforced before the payload is decoded; identity is resolved once per request
+seen = []
+d._routes[Action.FETCH_MY_WORKS] = Route(lambda ctx: (seen.append((ctx.role, ctx.username, ctx.trace_id)) or EmptyPayload(), True, None), frozenset({Role.DEVELOPER}))
+req = Message.request(Action.FETCH_MY_WORKS, EmptyPayload())
+resp = d.dispatch(req, player)  # type: ignore[arg-type]
+assert resp.ok is False and resp.error == "Role not permitted"
+users.lookups = 0
+resp = d.dispatch(req, developer)  # type: ignore[arg-type]
+assert resp.ok is True and seen == [(Role.DEVELOPER, "dev", req.msg_id)]
+assert users.lookups == 1
+
+# Unexpected handler errors become a failed response instead of closing the connection
+def boom(ctx):
+    raise RuntimeError("boom")
+
+
+d._routes[Action.FETCH_GAME_COVER] = Route(boom, ANY_ROLE)
+resp = d.dispatch(Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload("g")), player)  # type: ignore[arg-type]
+assert resp.ok is False and resp.error == "Internal server error"
+assert resp.payload.cover_data == b""
+
+# Plugged-in rate limiting runs after auth
+limiter = RateLimit(rate=0.001, burst=2)
+d.use(limiter)
+results = [d.dispatch(req, developer).error for _ in range(3)]  # type: ignore[arg-type]
+assert results == [None, None, "Rate limited"] and limiter.limited == 1
+
+# Every middleware measures itself, and timing keeps per-action latency
+stats = d.pipeline.stats.snapshot()
+assert set(stats) == {"error_mapping", "timing", "auth", "rate_limit"}
+assert stats["auth"][0] == 6 and stats["rate_limit"][0] == 3
+count, total, peak = d.timing.snapshot()[Action.FETCH_MY_WORKS.value]
+assert count == 5 and 0 <= peak <= total
+
+print("server dispatcher_pipeline tests passed")
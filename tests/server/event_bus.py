@@ -0,0 +1,63 @@
+import socket
+
+from protocol.enums import Action
+from server.infra.event_bus import EventBus, LOBBY_TOPIC, room_topic
+from server.infra.room_manager import RoomManager
+from session.session import Session
+from transport.framed_socket import FramedSocket
+
+bus = EventBus()
+rooms = RoomManager(bus)
+clients: dict[str, Session] = {}
+for name in ("alice", "bob", "carol", "dave"):
+    a, b = socket.socketpair()
+    bus.attach(name, Session(FramedSocket(a)))
+    clients[name] = Session(FramedSocket(b))
+    clients[name].set_recv_timeout(0.2)
+
+
+def inbox(name: str) -> list:
+    got = []
+    while True:
+        try:
+            got.append(clients[name].receive_message())
+        except Exception:
+            return got
+
+
+def actions(name: str) -> list[Action]:
+    return [m.action for m in inbox(name)]
+
+
+assert len(bus.subscribers(LOBBY_TOPIC)) == 4
+
+# ROOM_CREATED goes to the lobby except the host
+room_id, created_version = rooms.create_room("alice", "snake", 4)
+assert actions("alice") == []
+assert [m.payload.version for m in inbox("bob")] == [created_version]
+assert actions("carol") == actions("dave") == [Action.ROOM_CREATED]
+
+# joining: the room sees the new member list, everyone else the new player count
+rooms.add_player_to_room(room_id, "bob")
+assert len(bus.subscribers(room_topic(room_id))) == 2
+# members skip the ROOM_UPDATED, MY_ROOM_UPDATED tells them its lobby version
+assert [m.payload.lobby_version for m in inbox("alice")] == [created_version + 1]
+assert actions("bob") == [Action.MY_ROOM_UPDATED]
+assert [m.payload.version for m in inbox("carol")] == [created_version + 1]
+assert actions("dave") == [Action.ROOM_UPDATED]
+
+# a detached player (logout / disconnect) gets nothing more
+bus.detach("dave")
+assert rooms.remove_player_from_room(room_id, "alice") == created_version + 2
+assert actions("alice") == []
+assert [(m.action, m.payload.players) for m in inbox("bob")] == [(Action.MY_ROOM_UPDATED, ["bob"])]
+assert [(m.action, m.payload.current_players) for m in inbox("carol")] == [(Action.ROOM_UPDATED, 1)]
+assert actions("dave") == []
+
+# the last player leaving removes the room and its topic
+rooms.remove_player_from_room(room_id, "bob")
+assert actions("bob") == []
+assert actions("alice") == actions("carol") == [Action.ROOM_REMOVED]
+assert not bus.subscribers(room_topic(room_id))
+
+print("server event_bus tests passed")
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import threading
+
+from protocol.payloads.game import FetchGameCoverPayload, FetchGameDetailPayload, FetchStorePayload
+from server.handlers import game as game_handlers
+from server.infra.database import Database
+from server.infra.game_catalog import GameCatalog
+
+workdir = tempfile.mkdtemp()
+db = Database(os.path.join(workdir, "catalog.db"))
+db.create_developer("dev", "pw")
+for i in range(25):
+    game_dir = os.path.join(workdir, f"g{i}")
+    os.makedirs(game_dir)
+    with open(os.path.join(game_dir, "cover.png"), "wb") as f:
+        f.write(bytes([i]) * 100)
+    if i % 2 == 0:
+        with open(os.path.join(game_dir, "description.txt"), "w", encoding="utf-8") as f:
+            f.write(f"game {i}\n")
+    db.create_game(f"game{i:02d}", "dev", "1.0.0", 2, 4, "zip", "folder", game_dir)
+
+catalog = GameCatalog(db)
+
+
+def browse():
+    store, ok, _ = game_handlers.handle_fetch_store(FetchStorePayload(page=2, page_size=10), catalog, None)  # type: ignore[arg-type]
+    assert ok and store.total_count == 25 and [g[0] for g in store.games] == [f"game{i:02d}" for i in range(10, 20)]
+    for name, *_ in store.games:
+        detail, ok, _ = game_handlers.handle_fetch_game_detail(FetchGameDetailPayload(name), catalog, None)  # type: ignore[arg-type]
+        assert ok and detail.description == ("" if int(name[4:]) % 2 else f"game {int(name[4:])}\n")
+        cover, ok, _ = game_handlers.handle_fetch_game_cover(FetchGameCoverPayload(name), catalog, None)  # type: ignore[arg-type]
+        assert ok and cover.cover_data == bytes([int(name[4:])]) * 100
+
+
+# After the first pass, a store page plus 20 detail/cover requests touch neither SQLite nor the files
+browse()
+queries = db.query_stats()
+files = catalog.stats()["asset_misses"]
+browse()
+assert db.query_stats() == queries
+assert catalog.stats()["asset_misses"] == files
+assert catalog.stats()["misses"] == 1
+
+# Writes go through to the database and update the cache
+os.remove(os.path.join(workdir, "g3", "cover.png"))
+assert catalog.set_game("game03", "1.1.0", 2, 6, "zip2", "folder2", os.path.join(workdir, "g3")) is True
+assert catalog.get_game("game03")[2:5] == ("1.1.0", 2, 6) and db.get_game("game03")[2] == "1.1.0"
+assert catalog.get_asset("game03", "cover.png") is None  # stale cover was dropped
+assert catalog.create_game("zeta", "dev", "1.0.0", 1, 2, "z", "z", workdir) is True
+assert catalog.get_total_games_count() == 26 and catalog.get_all_games()[-1][0] == "zeta"
+assert [g[0] for g in catalog.get_games_by_developer("dev")][-1] == "zeta"
+assert catalog.create_game("zeta", "dev", "1.0.0", 1, 2, "z", "z", workdir) is False
+assert catalog.get_total_games_count() == 26
+
+# A write waiting on the database does not block a reload, and the reloaded row is not added twice
+committed, release = threading.Event(), threading.Event()
+released: list[bool] = []
+create_game = db.create_game
+
+
+def slow_create_game(*args):
+    ok = create_game(*args)
+    committed.set()
+    released.append(release.wait(timeout=2.0))
+    return ok
+
+
+db.create_game = slow_create_game
+writer = threading.Thread(target=catalog.create_game, args=("omega", "dev", "1.0.0", 1, 2, "o", "o", workdir))
+writer.start()
+assert committed.wait(timeout=2.0)
+catalog.invalidate()
+assert catalog.get_game("omega") is not None  # loaded while create_game is still waiting
+release.set()
+writer.join(timeout=2.0)
+db.create_game = create_game
+assert released == [True]
+assert catalog.get_total_games_count() == 27 and [g[0] for g in catalog.get_all_games()].count("omega") == 1
+
+# A small byte budget evicts least recently used files
+small = GameCatalog(db, asset_cache_bytes=250)
+for i in (0, 1, 2):
+    small.get_asset(f"game{i:02d}", "cover.png")
+assert small.stats()["asset_entries"] == 2 and small.stats()["asset_bytes"] == 200
+
+db.close()
+print("server game_catalog tests passed")
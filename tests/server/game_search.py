@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+from protocol import binary_codec
+from protocol.enums import Action
+from protocol.message import Message
+from protocol.payloads.game import SearchGamesPayload
+from server.handlers import game as game_handlers
+from server.infra.database import Database
+from server.infra.game_catalog import GameCatalog
+
+workdir = tempfile.mkdtemp()
+db = Database(os.path.join(workdir, "search.db"))
+db.create_developer("alice", "pw")
+db.create_developer("chessmaster", "pw")
+
+
+def add_game(name: str, developer: str, description: str | None, via_catalog: GameCatalog | None = None):
+    game_dir = os.path.join(workdir, name)
+    os.makedirs(game_dir, exist_ok=True)
+    if description is not None:
+        with open(os.path.join(game_dir, "description.txt"), "w", encoding="utf-8") as f:
+            f.write(description)
+    target = via_catalog or db
+    assert target.create_game(name, developer, "1.0.0", 2, 4, "zip", "folder", game_dir)
+
+
+# Games that existed before the index are added on the first search
+add_game("Space Chess", "alice", "Chess among the stars.")
+add_game("Tic Tac Toe", "alice", "A classic for two players.")
+add_game("Knight Tour", "chessmaster", "Move a knight over the board.")
+for i in range(30):
+    add_game(f"Filler {i:02d}", "alice", "Nothing to see here.")
+catalog = GameCatalog(db)
+
+# A failed sync is retried by the next search instead of leaving games out of the index
+index_game_search = db.index_game_search
+db.index_game_search = lambda name, developer, description: name != "Knight Tour" and index_game_search(name, developer, description)
+assert catalog.search("knight", 1, 10) == ([], 0) and not catalog._search_synced
+db.index_game_search = index_game_search
+
+
+def names(query: str, page: int = 1, page_size: int = 10) -> list[str]:
+    resp, ok, error = game_handlers.handle_search_games(SearchGamesPayload(query, page, page_size), catalog, None)  # type: ignore[arg-type]
+    assert ok, error
+    return [g[0] for g in resp.games]
+
+
+for backend in ("fts5", "like"):
+    db.search_backend = backend
+    assert names("chess")[0] == "Space Chess"  # name hit ranks above a developer-only hit
+    assert set(names("chess")) == {"Space Chess", "Knight Tour"}
+    assert names("classic players") == ["Tic Tac Toe"]  # every word must match
+    assert names("kni") == ["Knight Tour"]  # prefix
+    assert names("  !!! ") == [] and names("zebra") == []
+    resp, ok, _ = game_handlers.handle_search_games(SearchGamesPayload("nothing", 2, 20), catalog, None)  # type: ignore[arg-type]
+    assert ok and resp.total_count == 30 and len(resp.games) == 10
+    assert names("nothing", 1, 20) + names("nothing", 2, 20) == [f"Filler {i:02d}" for i in range(30)]
+db.search_backend = "fts5"
+
+# Writes through the catalog keep the index in sync
+add_game("Hexagon Wars", "alice", "Strategy on a hex grid.", via_catalog=catalog)
+assert names("strategy") == ["Hexagon Wars"]
+with open(os.path.join(workdir, "Hexagon Wars", "description.txt"), "w", encoding="utf-8") as f:
+    f.write("Now with dragons.")
+assert catalog.set_game("Hexagon Wars", "1.1.0", 2, 4, "zip", "folder", os.path.join(workdir, "Hexagon Wars"))
+assert names("strategy") == [] and names("dragons") == ["Hexagon Wars"]
+add_game("Silent", "alice", None, via_catalog=catalog)  # no description.txt
+assert names("silent") == ["Silent"]
+
+# Validation
+for payload, error in ((SearchGamesPayload("x" * 201, 1, 10), "Query is too long"), (SearchGamesPayload("chess", 0, 10), "Invalid page"),
+                       (SearchGamesPayload("chess", 1, 101), "Invalid page")):
+    _, ok, message = game_handlers.handle_search_games(payload, catalog, None)  # type: ignore[arg-type]
+    assert not ok and message.startswith(error), message
+
+req = Message.request(Action.SEARCH_GAMES, SearchGamesPayload("space chess", 1, 20))
+assert binary_codec.decode(binary_codec.encode(req)).payload == req.payload
+db.close()
+
+print("server game_search tests passed")
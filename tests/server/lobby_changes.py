@@ -0,0 +1,35 @@
+from server.infra.room_manager import RoomManager, LOBBY_CHANGE_LOG_SIZE
+
+rooms = RoomManager()
+assert rooms.lobby_version == 0
+assert rooms.changes_since(0) == (0, False, [], [])
+
+r1, v1 = rooms.create_room("alice", "snake", 4)
+r2, v2 = rooms.create_room("bob", "tetris", 2)
+assert (v1, v2) == (1, 2)
+rooms.add_player_to_room(r1, "carol")
+assert rooms.lobby_version == 3
+
+# the snapshot is shared until the next change
+version, rows = rooms.lobby_snapshot()
+assert version == 3 and rooms.lobby_snapshot()[1] is rows
+assert sorted(r[0] for r in rows) == sorted([r1, r2])
+
+# deltas: only rooms touched after the given version, removed rooms by id
+assert rooms.remove_player_from_room(r2, "bob") == 4
+version, full, changed, removed = rooms.changes_since(3)
+assert (version, full, changed, removed) == (4, False, [], [r2])
+version, full, changed, removed = rooms.changes_since(1)
+assert not full and [r[0] for r in changed] == [r1] and changed[0][3] == 2 and removed == [r2]
+assert rooms.lobby_snapshot()[1] is not rows
+
+# versions that fell out of the change log (or are from the future) get a full snapshot
+for _ in range(LOBBY_CHANGE_LOG_SIZE // 2):
+    rooms.add_player_to_room(r1, "dave")
+    rooms.remove_player_from_room(r1, "dave")
+version, full, changed, removed = rooms.changes_since(1)
+assert full and [r[0] for r in changed] == [r1] and removed == []
+assert rooms.changes_since(version + 5)[1] is True
+assert rooms.changes_since(version - 1)[1] is False
+
+print("server lobby_changes tests passed")
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import threading
+
+from client.infra.connector import Connector
+from client.api import auth, room
+from protocol.enums import Action, MessageType, Role
+from protocol.message import Message
+from protocol.payloads.game import UploadGameChunkPayload
+from server.reactor import ReactorServer
+
+# Run the reactor engine in a scratch directory (Database/UploadManager write to cwd)
+workdir = tempfile.mkdtemp()
+os.chdir(workdir)
+
+server = ReactorServer(("127.0.0.1", 0), workers=2)
+addr = server._acceptor._sock.getsockname()
+t = threading.Thread(target=server.serve, daemon=True)
+t.start()
+
+sessions = []
+for i in range(3):
+    s = Connector(addr).connect(connect_timeout=2.0)
+    s.set_recv_timeout(2.0)
+    sessions.append(s)
+    resp = auth.register(s, f"user{i}", "pw", Role.PLAYER.value)
+    assert resp.type == MessageType.RESPONSE and resp.ok is True, resp.error
+    resp = auth.login(s, f"user{i}", "pw", Role.PLAYER.value)
+    assert resp.ok is True, resp.error
+
+s = sessions[0]
+for _ in range(5):
+    resp = room.fetch_room_list(s)
+    assert resp.ok is True
+    assert resp.payload.rooms == []
+
+# Frames larger than the decoder's scratch buffer are reassembled
+req = Message.request(Action.UPLOAD_GAME_CHUNK, UploadGameChunkPayload(upload_id="missing", chunk_index=0, data=b"x" * (1024 * 1024)))
+resp = s.request_response(req)
+assert resp.msg_id == req.msg_id
+assert resp.ok is False and resp.error == "Invalid upload ID or write error"
+
+# After HELLO the same request travels as a binary frame
+assert s.negotiate_features() == {"attachments", "binary"}
+resp = s.request_response(req)
+assert resp.msg_id == req.msg_id
+assert resp.ok is False and resp.error == "Invalid upload ID or write error"
+
+# A duplicate login is rejected by the unchanged handlers
+dup = Connector(addr).connect(connect_timeout=2.0)
+dup.set_recv_timeout(2.0)
+resp = auth.login(dup, "user1", "pw", Role.PLAYER.value)
+assert resp.ok is False and resp.error == "User already logged in"
+
+for s in sessions + [dup]:
+    s.close()
+server.stop()
+t.join(timeout=2.0)
+assert not t.is_alive()
+
+print("server reactor roundtrip tests passed")
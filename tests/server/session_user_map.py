@@ -0,0 +1,44 @@
+from protocol.enums import Role
+from server.infra.session_user_map import SessionUserMap
+
+
+class _Session:
+    pass
+
+
+m = SessionUserMap()
+a, b, c = _Session(), _Session(), _Session()
+for s in (a, b, c):
+    m.add_session(s)
+assert m.get_user_by_session(a) is None and len(m.get_all_sessions()) == 3
+
+m.move_session_to_user(a, Role.PLAYER, "alice")
+m.move_session_to_user(b, Role.DEVELOPER, "bob")
+assert m.get_user_by_session(a) == (Role.PLAYER, "alice")
+assert m.get_session_by_user(Role.DEVELOPER, "bob") is b
+assert m.get_session_by_user(Role.PLAYER, "bob") is None
+assert m.get_all_player_sessions() == [a] and m.get_all_developer_sessions() == [b]
+
+# A taken username or an already logged-in session is refused without changing anything
+for session, username in ((c, "alice"), (a, "carol")):
+    try:
+        m.move_session_to_user(session, Role.PLAYER, username)
+        raise AssertionError("expected KeyError")
+    except KeyError:
+        pass
+assert m.get_user_by_session(c) is None and m.get_session_by_user(Role.PLAYER, "carol") is None
+
+# A snapshot taken by a reader is not changed by later writes
+players = m.get_all_player_sessions()
+m.move_session_back(a)
+assert players == [a]
+assert m.get_user_by_session(a) is None and m.get_session_by_user(Role.PLAYER, "alice") is None
+m.move_session_to_user(c, Role.PLAYER, "alice")
+
+m.remove_session(b)
+m.remove_session(b)
+assert m.get_session_by_user(Role.DEVELOPER, "bob") is None and b not in m.get_all_sessions()
+m.clear_all()
+assert m.get_all_sessions() == [] and m.get_user_by_session(c) is None
+
+print("server session_user_map tests passed")
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import tempfile
+
+from protocol import binary_codec
+from protocol.enums import Action
+from protocol.message import Message
+from protocol.payloads.game import FetchStorePayload, FetchStoreResponsePayload
+from server.handlers import game as game_handlers
+from server.infra.database import Database
+from server.infra.game_catalog import GameCatalog
+
+path = os.path.join(tempfile.mkdtemp(), "store.db")
+db = Database(path)
+db.create_developer("dev", "pw")
+db.create_developer("other", "pw")
+names = [f"game{i:03d}" for i in range(53)]
+for i, name in enumerate(reversed(names)):  # insertion order differs from name order
+    assert db.create_game(name, "dev" if i % 3 else "other", "1.0.0", 2, 4, "zip", "folder", "path")
+
+# Maintained counter, name order, keyset pages
+assert db.get_total_games_count() == 53
+assert [g[0] for g in db.get_all_games_paginated(2, 10)] == names[10:20]
+assert [g[0] for g in db.get_games_after(None, 10)] == names[:10]
+assert [g[0] for g in db.get_games_after("game009", 10)] == names[10:20]
+assert [g[0] for g in db.get_games_after("game050", 10)] == names[51:]
+assert [g[0] for g in db.get_games_by_developer("other")] == sorted(n for i, n in enumerate(reversed(names)) if i % 3 == 0)
+
+with sqlite3.connect(path) as conn:
+    plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN SELECT name FROM games WHERE developer = ? ORDER BY name", ("dev",)))
+    assert "idx_games_developer" in plan and "TEMP B-TREE" not in plan, plan
+    plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN SELECT name FROM games WHERE name > ? ORDER BY name LIMIT 10", ("x",)))
+    assert "SEARCH" in plan and "TEMP B-TREE" not in plan, plan
+    conn.execute("DELETE FROM games WHERE name = 'game000'")
+assert db.get_total_games_count() == 52
+db.close()
+assert Database(path).get_total_games_count() == 52  # reconciled on open as well
+
+# Keyset mode walks the whole store through opaque cursors, while pages by number still work
+db = Database(path)
+catalog = GameCatalog(db)
+seen, cursor, pages = [], "", 0
+while True:
+    resp, ok, _ = game_handlers.handle_fetch_store(FetchStorePayload(page=0, page_size=10, cursor=cursor), catalog, None)  # type: ignore[arg-type]
+    assert ok and resp.total_count == 52
+    seen += [g[0] for g in resp.games]
+    pages += 1
+    cursor = resp.next_cursor
+    if not cursor:
+        break
+    assert "game" not in cursor  # opaque to the client
+assert seen == names[1:] and pages == 6
+
+resp, ok, _ = game_handlers.handle_fetch_store(FetchStorePayload(page=1, page_size=52, cursor=""), catalog, None)  # type: ignore[arg-type]
+assert ok and len(resp.games) == 52 and resp.next_cursor == ""
+resp, ok, _ = game_handlers.handle_fetch_store(FetchStorePayload(page=3, page_size=20), catalog, None)  # type: ignore[arg-type]
+assert ok and [g[0] for g in resp.games] == names[41:] and resp.next_cursor == ""
+_, ok, error = game_handlers.handle_fetch_store(FetchStorePayload(page=1, page_size=10, cursor="%%%"), catalog, None)  # type: ignore[arg-type]
+assert not ok and error == "Invalid cursor"
+
+# The new fields survive the binary codec
+req = Message.request(Action.FETCH_STORE, FetchStorePayload(page=1, page_size=10, cursor="Z2FtZTAwOQ=="))
+assert binary_codec.decode(binary_codec.encode(req)).payload.cursor == "Z2FtZTAwOQ=="
+req = Message.request(Action.FETCH_STORE, FetchStorePayload(page=1, page_size=10))
+assert binary_codec.decode(binary_codec.encode(req)).payload.cursor is None
+resp_msg = Message.response(Action.FETCH_STORE, FetchStoreResponsePayload(games=[("g", "1.0.0", 2, 4)], total_count=1, next_cursor="Zw=="), msg_id=req.msg_id)
+assert binary_codec.decode(binary_codec.encode(resp_msg)).payload.next_cursor == "Zw=="
+db.close()
+
+print("server store_pagination tests passed")
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import threading
+import time
+
+from client.infra.connector import Connector
+from protocol.enums import Action, Role
+from protocol.message import Message
+from protocol.payloads.auth import Credential
+from protocol.payloads.common import EmptyPayload
+from server.infra.event_bus import LOBBY_TOPIC
+from server.server import Server, DEFAULT_WRITER_WORKERS
+
+workdir = tempfile.mkdtemp()
+os.chdir(workdir)
+
+server = Server(("127.0.0.1", 0), workers=4, rate_limit=1000.0)
+login_started = threading.Event()
+gate = threading.Event()
+login_done = threading.Event()
+attach = server._room_manager.event_bus.attach
+
+
+def held_attach(username, session):
+    """LOGIN has registered the session and is about to subscribe it to the lobby."""
+    login_started.set()
+    gate.wait(timeout=5.0)
+    attach(username, session)
+    login_done.set()
+
+
+server._room_manager.event_bus.attach = held_attach
+addr = server._acceptor._sock.getsockname()
+t = threading.Thread(target=server.serve, daemon=True)
+t.start()
+
+# Writes go through a shared writer pool: one reader thread per connection, not two
+before = threading.active_count()
+clients = [Connector(addr).connect(connect_timeout=2.0) for _ in range(20)]
+for c in clients:
+    c.set_recv_timeout(2.0)
+    req = Message.request(Action.FETCH_ROOM_LIST, EmptyPayload())
+    c.send_message(req)
+    assert c.receive_message().msg_id == req.msg_id
+writers = [th for th in threading.enumerate() if th.name.startswith("SessionWriter")]
+assert 0 < len(writers) <= DEFAULT_WRITER_WORKERS
+assert threading.active_count() - before <= len(clients) + DEFAULT_WRITER_WORKERS + 4
+for c in clients:
+    c.close()
+
+# A LOGIN still dispatching when the client goes away does not leave the session registered
+cred = Credential(username="alice", password="pw", role=Role.PLAYER.value)
+s = Connector(addr).connect(connect_timeout=2.0)
+s.set_recv_timeout(2.0)
+s.send_message(Message.request(Action.REGISTER, cred))
+assert s.receive_message().ok is True
+assert len(server._rate_limit._buckets) == 1
+s.send_message(Message.request(Action.LOGIN, cred))
+assert login_started.wait(timeout=2.0)
+s.close()
+time.sleep(0.2)  # the reader sees the disconnect while LOGIN is held
+gate.set()
+assert login_done.wait(timeout=2.0)
+deadline = time.monotonic() + 2.0
+while server._session_user_map.get_all_sessions() and time.monotonic() < deadline:
+    time.sleep(0.02)
+assert server._session_user_map.get_all_sessions() == []
+assert server._session_user_map.get_session_by_user(Role.PLAYER, "alice") is None
+assert not server._room_manager.event_bus.subscribers(LOBBY_TOPIC)
+assert not server._rate_limit._buckets  # the closed session's rate limit bucket is dropped with it
+
+server.stop()
+t.join(timeout=2.0)
+
+print("server thread_engine tests passed")
@@ -0,0 +1,86 @@
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+
+from protocol.payloads.game import UploadGameFinishPayload
+from server.handlers import game as game_handlers
+from server.infra.database import Database
+from server.infra.game_catalog import GameCatalog
+from server.infra.upload_manager import UploadManager
+
+workdir = tempfile.mkdtemp()
+game_handlers.GAMES_DIR = os.path.join(workdir, "games")
+manager = UploadManager(os.path.join(workdir, "uploads"))
+db = Database(os.path.join(workdir, "upload.db"))
+db.create_developer("dev", "pw")
+catalog = GameCatalog(db)
+
+files = {
+    "client/__main__.py": b"print('client')\n" * 1000,
+    "client/assets/big.bin": os.urandom(3 * 1024 * 1024),
+    "server/__main__.py": b"print('server')\n",
+    "common/consts.py": b"PORT = 1\n",
+    "description.txt": b"A test game.\n",
+}
+buf = io.BytesIO()
+with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+    for name, data in files.items():
+        z.writestr(name, data)
+upload = buf.getvalue()
+
+
+def start(data: bytes, sha256: str) -> str:
+    upload_id = manager.init_upload("dev", "hashed", "1.0.0", 2, 4, sha256, len(data))
+    for i in range(0, len(data), 64 * 1024):
+        assert manager.append_chunk(upload_id, data[i:i + 64 * 1024])
+    return upload_id
+
+
+# The running hash sees exactly the bytes written to the .part file
+upload_id = start(upload, hashlib.sha256(upload).hexdigest())
+state = manager.get_upload(upload_id)
+with open(state.temp_file_path, "rb") as f:
+    assert hashlib.sha256(f.read()).hexdigest() == state.hasher.hexdigest() and state.current_size == len(upload)
+
+_, ok, error = game_handlers.handle_upload_finish(UploadGameFinishPayload(upload_id), catalog, manager, None)  # type: ignore[arg-type]
+assert ok, error
+game = db.get_game("hashed")
+game_dir = game[7]
+
+# The zip hash matches the file on disk, and the zip (streamed with data descriptors) is valid
+with open(os.path.join(game_dir, "client.zip"), "rb") as f:
+    client_zip = f.read()
+assert game[5] == hashlib.sha256(client_zip).hexdigest()
+with zipfile.ZipFile(io.BytesIO(client_zip)) as z:
+    assert z.testzip() is None
+    assert sorted(z.namelist()) == ["client/__main__.py", "client/assets/big.bin", "common/consts.py"]
+    assert z.read("client/assets/big.bin") == files["client/assets/big.bin"]
+with zipfile.ZipFile(os.path.join(game_dir, "server.zip")) as z:
+    assert sorted(z.namelist()) == ["common/consts.py", "server/__main__.py"]
+
+# The folder hash is still the content of client/ then common/ in os.walk order
+with zipfile.ZipFile(io.BytesIO(upload)) as z:
+    z.extractall(os.path.join(workdir, "check"))
+folder_hash = hashlib.sha256()
+for folder in ("client", "common"):
+    for root, _, names in os.walk(os.path.join(workdir, "check", folder)):
+        for name in names:
+            with open(os.path.join(root, name), "rb") as f:
+                folder_hash.update(f.read())
+assert game[6] == folder_hash.hexdigest()
+
+# A wrong hash or a short upload is refused and the partial file removed
+upload_id = start(upload, "0" * 64)
+path = manager.get_upload(upload_id).temp_file_path
+_, ok, error = game_handlers.handle_upload_finish(UploadGameFinishPayload(upload_id), catalog, manager, None)  # type: ignore[arg-type]
+assert not ok and error == "Hash mismatch" and not os.path.exists(path)
+upload_id = manager.init_upload("dev", "hashed", "1.0.1", 2, 4, "0" * 64, len(upload) + 1)
+manager.append_chunk(upload_id, upload)
+path = manager.get_upload(upload_id).temp_file_path
+_, ok, error = game_handlers.handle_upload_finish(UploadGameFinishPayload(upload_id), catalog, manager, None)  # type: ignore[arg-type]
+assert not ok and error.startswith("Size mismatch") and not os.path.exists(path)
+db.close()
+
+print("server upload_hash tests passed")
@@ -0,0 +1,89 @@
+"""Measurement: process CPU used by idle client sessions with running receive loops.
+
+Compares the previous receive loop (0.2 s recv timeout polling) with the blocking loop woken by a socketpair.
+The accepting side lives in a child process so only client sockets count against this process.
+Run from the repository root:
+    python -m tests.session.bench_idle_cpu [clients] [seconds]
+"""
+import multiprocessing
+import socket
+import sys
+import threading
+import time
+
+from session.errors import SessionDisconnectedError, SessionError, SessionTimeoutError
+from session.session import Session
+from transport.framed_socket import FramedSocket
+
+
+class _PollingSession(Session):
+    """Session receive loop as it was before: a 0.2 s receive timeout so the loop can check the stop flag."""
+    def start_recv_loop(self, *, on_event=None, on_disconnect=None) -> None:
+        self._on_event = on_event
+        self._on_disconnect = on_disconnect
+        self._stop_event.clear()
+        self._rxloop_prev_recv_timeout = self._fsock.get_recv_timeout()
+        self._fsock.set_recv_timeout(0.2)
+        t = threading.Thread(target=self._recv_loop, name="SessionRecvLoop", daemon=True)
+        self.recv_message_thread = t
+        t.start()
+
+    def _recv_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.receive_message()
+            except SessionTimeoutError:
+                continue
+            except SessionDisconnectedError:
+                break
+            except SessionError:
+                continue
+
+
+def _hold_connections(listener: socket.socket, clients: int, done) -> None:
+    accepted = [listener.accept()[0] for _ in range(clients)]
+    done.recv()
+    for sock in accepted:
+        sock.close()
+
+
+def _measure(session_cls: type, clients: int, seconds: float) -> float:
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(clients)
+    addr = listener.getsockname()
+    parent_end, child_end = multiprocessing.Pipe()
+    holder = multiprocessing.Process(target=_hold_connections, args=(listener, clients, child_end), daemon=True)
+    holder.start()
+    listener.close()
+    sessions = []
+    try:
+        for _ in range(clients):
+            session = session_cls(FramedSocket(socket.create_connection(addr)))
+            session.start_recv_loop()
+            sessions.append(session)
+        time.sleep(1.0)  # let every loop reach its idle wait
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        time.sleep(seconds)
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        return cpu / wall * 100
+    finally:
+        # Close the peers first so every loop sees EOF at once instead of joining them one by one
+        parent_end.send(None)
+        holder.join()
+        for session in sessions:
+            session.close()
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    print(f"{clients} idle sessions, {seconds:.0f} s each")
+    print(f"{'receive loop':<24} {'CPU % of one core':>18}")
+    for label, cls in (("polling (0.2 s)", _PollingSession), ("blocking + wakeup", Session)):
+        print(f"{label:<24} {_measure(cls, clients, seconds):>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
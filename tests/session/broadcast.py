@@ -0,0 +1,41 @@
+import socket
+
+from protocol.enums import Action, Feature
+from protocol.message import Message
+from protocol.payloads.events import RoomCreatedEventPayload
+from session.broadcast import SharedFrame, broadcast
+from session.outbound import OutboundQueue
+from session.queued_session import QueuedSession
+from session.session import Session
+from transport.framed_socket import FramedSocket
+
+FEATURES = [frozenset(), frozenset({Feature.ATTACHMENTS.value}), frozenset({Feature.BINARY.value, Feature.ATTACHMENTS.value})]
+
+pairs = []
+for i in range(9):
+    a, b = socket.socketpair()
+    server_side = QueuedSession(FramedSocket(a), OutboundQueue(16)) if i % 2 else Session(FramedSocket(a))
+    server_side.enable_features(FEATURES[i % 3])
+    pairs.append((server_side, Session(FramedSocket(b))))
+
+# a recipient that already went away does not stop the others
+gone_a, gone_b = socket.socketpair()
+gone = Session(FramedSocket(gone_a))
+gone_a.close()
+gone_b.close()
+
+msg = Message.event(Action.ROOM_CREATED, RoomCreatedEventPayload(room_id="r1", host_username="alice", game_name="snake", current_players=1, max_players=4, status="waiting"))
+shared = SharedFrame(msg)
+assert broadcast(shared, [gone] + [s for s, _ in pairs]) == len(pairs)
+assert shared.encodings == 3  # once per wire format, not once per recipient
+assert shared.frame(FEATURES[0]) is shared.frame(frozenset())
+
+for _, client in pairs:
+    received = client.receive_message()
+    assert received.action == Action.ROOM_CREATED and received.payload == msg.payload
+
+for s, client in pairs:
+    s.close()
+    client.close()
+
+print("session broadcast tests passed")
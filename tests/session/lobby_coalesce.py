@@ -0,0 +1,131 @@
+import socket
+import time
+
+from client.client import Client
+from protocol.enums import Action, Feature
+from protocol.message import Message
+from protocol.payloads.events import MyRoomUpdatedEventPayload, RoomCreatedEventPayload, RoomRemovedEventPayload, RoomUpdatedEventPayload
+from session.broadcast import broadcast
+from session.event_queue import EventQueue
+from session.outbound import OutboundQueue, SlowConsumerPolicy
+from session.queued_session import QueuedSession
+from session.session import Session
+from transport.framed_socket import FramedSocket
+
+
+def room_updated(room_id: str, players: int, version: int) -> Message:
+    return Message.event(Action.ROOM_UPDATED, RoomUpdatedEventPayload(room_id=room_id, host_username="h", game_name="g", current_players=players, max_players=4, status="waiting", version=version))
+
+
+def lobby_events() -> list[Message]:
+    """v3..v8 for rooms a, b, c, interleaved so that coalescing leaves version holes between frames."""
+    return [
+        room_updated("a", 2, 3),
+        room_updated("b", 2, 4),
+        room_updated("a", 3, 5),
+        room_updated("b", 3, 6),
+        Message.event(Action.ROOM_REMOVED, RoomRemovedEventPayload(room_id="a", version=7)),
+        Message.event(Action.ROOM_CREATED, RoomCreatedEventPayload(room_id="c", host_username="h", game_name="g", current_players=1, max_players=4, status="waiting", version=8)),
+    ]
+
+
+def apply_all(events: list[Message]) -> Client:
+    """Feed events to a client whose room list is at v2, the way ClientGUI._on_event does; a refetch fails the test."""
+    client = Client(("127.0.0.1", 0))
+    with client._lobby_version_lock:
+        client._set_lobby_version_locked(2)
+    for event in events:
+        in_order = client.advance_lobby_version(event.payload.version, getattr(event.payload, "coalesced_versions", ()))
+        assert in_order is not None, f"refetch requested for {event.action} v{event.payload.version}"
+    assert client._lobby_version == 8 and not client._lobby_ahead
+    return client
+
+
+def big(i: int) -> Message:
+    return Message.event(Action.ROOM_UPDATED, RoomUpdatedEventPayload(room_id=f"{i:05d}" + "x" * 65536, host_username="h", game_name="g", current_players=1, max_players=4, status="waiting"))
+
+
+# a coalescing server queue: the replacing frame carries the versions it absorbed, for both wire formats
+for features in (frozenset(), frozenset({Feature.BINARY.value, Feature.ATTACHMENTS.value})):
+    a, b = socket.socketpair()
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    server = QueuedSession(FramedSocket(a), OutboundQueue(64, SlowConsumerPolicy.COALESCE))
+    client_side = Session(FramedSocket(b))
+    server.enable_features(features)
+    client_side.enable_features(features)
+    for i in range(4):
+        server.send_message(big(i))  # fills the socket so the lobby events wait in the queue
+    time.sleep(0.05)
+    for i, event in enumerate(lobby_events()):
+        if i % 2:
+            broadcast(event, [server])
+        else:
+            server.send_message(event)
+    assert server.outbound.coalesced == 2 and server.outbound.cancelled == 1
+    received = [client_side.receive_message() for _ in range(4 + 3)][4:]
+    assert [(m.action, m.payload.version, m.payload.coalesced_versions if m.action != Action.ROOM_CREATED else None) for m in received] == [
+        (Action.ROOM_REMOVED, 7, [3, 5]),
+        (Action.ROOM_UPDATED, 6, [4]),
+        (Action.ROOM_CREATED, 8, None),
+    ]
+    apply_all(received)
+    server.close()
+    client_side.close()
+
+# the client-side EventQueue merges the same way
+events = EventQueue()
+for event in lobby_events():
+    events.put(event)
+assert events.coalesced == 2 and events.cancelled == 1
+apply_all(events.drain())
+
+# duplicates and stale events are ignored, a real hole still asks for a refetch
+client = apply_all(lobby_events())
+assert client.advance_lobby_version(8) is False and client.advance_lobby_version(7, [5]) is False
+assert client.advance_lobby_version(10, [9]) is True and client._lobby_version == 10
+assert client.advance_lobby_version(12) is None
+
+# versions of the client's own room changes come from responses / MY_ROOM_UPDATED instead of lobby events
+client.skip_lobby_version(11)
+assert client.advance_lobby_version(12) is True and client._lobby_version == 12
+client.skip_lobby_version(14)
+assert client.advance_lobby_version(13) is True and client._lobby_version == 14
+
+# MY_ROOM_UPDATED coalesces too: the newest one carries the lobby_version of the ones it replaced
+def my_room_updated(players: list[str], lobby_version: int) -> Message:
+    return Message.event(Action.MY_ROOM_UPDATED, MyRoomUpdatedEventPayload(host_username="h", game_name="g", players=players, max_players=4, status="waiting", lobby_version=lobby_version))
+
+
+for queue_events in ("server", "client"):
+    if queue_events == "server":
+        a, b = socket.socketpair()
+        a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        server = QueuedSession(FramedSocket(a), OutboundQueue(64, SlowConsumerPolicy.COALESCE))
+        client_side = Session(FramedSocket(b))
+        for i in range(4):
+            server.send_message(big(i))
+        time.sleep(0.05)
+        server.send_message(my_room_updated(["h", "x"], 5))
+        server.send_message(my_room_updated(["h", "x", "y"], 6))
+        assert server.outbound.coalesced == 1
+        received = [client_side.receive_message() for _ in range(4 + 1)][4:]
+        server.close()
+        client_side.close()
+    else:
+        events = EventQueue()
+        events.put(my_room_updated(["h", "x"], 5))
+        events.put(my_room_updated(["h", "x", "y"], 6))
+        received = events.drain()
+    assert [(m.payload.players, m.payload.lobby_version, m.payload.coalesced_versions) for m in received] == [(["h", "x", "y"], 6, [5])]
+    mine = Client(("127.0.0.1", 0))
+    with mine._lobby_version_lock:
+        mine._set_lobby_version_locked(4)
+    for version in (received[0].payload.lobby_version, *received[0].payload.coalesced_versions):  # as ClientGUI._on_event does
+        mine.skip_lobby_version(version)
+    assert mine._lobby_version == 6 and mine.advance_lobby_version(7) is True
+
+# a fetched delta is applied only if no event has moved past it in the meantime
+assert client.adopt_lobby_version(14) is False and client.adopt_lobby_version(13) is False
+assert client.adopt_lobby_version(16) is True and client._lobby_version == 16
+
+print("session lobby_coalesce tests passed")
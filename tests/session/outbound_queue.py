@@ -0,0 +1,95 @@
+import socket
+import time
+
+from protocol.enums import Action
+from protocol.message import Message
+from protocol.payloads.common import EmptyPayload
+from protocol.payloads.events import RoomRemovedEventPayload, RoomUpdatedEventPayload
+from session.errors import SessionDisconnectedError
+from session.event_queue import EventQueue
+from session.outbound import OutboundQueue, OutboundStats, SlowConsumerPolicy, coalesce_key, cancelled_key
+from session.queued_session import QueuedSession
+from session.session import Session
+from transport.framed_socket import FramedSocket
+
+
+def room_updated(room_id: str, players: int) -> Message:
+    return Message.event(Action.ROOM_UPDATED, RoomUpdatedEventPayload(room_id=room_id, host_username="h", game_name="g", current_players=players, max_players=4, status="waiting"))
+
+
+def big(i: int) -> Message:
+    return room_updated(f"{i:05d}" + "x" * 65536, 1)  # distinct rooms, so nothing coalesces
+
+
+# DROP: events past the limit are discarded, responses still ask for a disconnect
+q = OutboundQueue(2, SlowConsumerPolicy.DROP)
+assert q.put([b"1"]) and q.put([b"2"], droppable=True)
+assert q.put([b"3"], droppable=True) and q.dropped == 1
+assert q.put([b"4"]) is False
+assert [q.get_nowait(), q.get_nowait(), q.get_nowait()] == [[b"1"], [b"2"], None]
+
+# COALESCE: a newer update replaces the pending one with the same key, in place, even below the limit;
+# ROOM_REMOVED cancels the room's pending update
+stats = OutboundStats()
+q = OutboundQueue(3, SlowConsumerPolicy.COALESCE, stats=stats)
+m1, m2, m3 = room_updated("r1", 1), room_updated("r2", 1), room_updated("r1", 3)
+removed = Message.event(Action.ROOM_REMOVED, RoomRemovedEventPayload(room_id="r2"))
+assert coalesce_key(m1) == coalesce_key(m3) != coalesce_key(m2)
+for parts, msg in (([b"r1:1"], m1), ([b"r2:1"], m2), ([b"r1:3"], m3), ([b"r2:gone"], removed)):
+    assert q.put(parts, droppable=True, key=coalesce_key(msg), cancels=cancelled_key(msg))
+assert q.coalesced == 1 and q.cancelled == 1 and q.dropped == 0 and len(q) == 2
+assert q.put([b"a"], droppable=True) and q.put([b"b"], droppable=True) and q.dropped == 1
+assert stats.snapshot() == {"dropped": 1, "coalesced": 1, "cancelled": 1}
+assert [q.get_nowait(), q.get_nowait(), q.get_nowait(), q.get_nowait()] == [[b"r1:3"], [b"r2:gone"], [b"a"], None]
+
+# the client-side EventQueue applies the same rules to received events
+events = EventQueue()
+assert events.put(m1) is True and events.put(m2) is False
+events.put(m3)
+events.put(removed)
+assert events.drain() == [m3, removed] and events.coalesced == 1 and events.cancelled == 1
+assert events.get_nowait() is None and events.put(m1) is True
+
+# DISCONNECT: any overflow disconnects; a closed queue refuses new frames and wakes get()
+q = OutboundQueue(1, SlowConsumerPolicy.DISCONNECT)
+assert q.put([b"1"], droppable=True) and q.put([b"2"], droppable=True) is False
+q.close()
+assert q.get(timeout=1.0) is None
+try:
+    q.put([b"3"])
+except SessionDisconnectedError:
+    pass
+else:
+    raise AssertionError("put on a closed queue")
+
+# QueuedSession: send_message returns immediately while the peer is not reading
+a, b = socket.socketpair()
+a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+server = QueuedSession(FramedSocket(a), OutboundQueue(8, SlowConsumerPolicy.COALESCE))
+client = Session(FramedSocket(b))
+start = time.monotonic()
+for i in range(200):
+    server.send_message(big(i) if i < 4 else room_updated("r1", i))
+assert time.monotonic() - start < 1.0
+assert not server.outbound.closed
+received = [client.receive_message() for _ in range(4)]
+assert [m.payload.room_id[:5] for m in received] == ["00000", "00001", "00002", "00003"]
+while received[-1].payload.current_players != 199:
+    received.append(client.receive_message())
+assert len(received) <= 4 + 2  # pending r1 updates were merged into one
+
+# ...and a response that does not fit disconnects the slow consumer
+for i in range(64):
+    server.send_message(big(i))
+try:
+    for _ in range(64):
+        server.send_message(Message.response(Action.FETCH_ROOM_LIST, EmptyPayload(), msg_id="m"))
+except SessionDisconnectedError:
+    pass
+else:
+    raise AssertionError("response overflow did not disconnect")
+assert server.outbound.closed
+server.send_message(room_updated("r1", 0))  # events to a closed session are dropped quietly
+client.close()
+
+print("session outbound_queue tests passed")
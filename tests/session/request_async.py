@@ -0,0 +1,70 @@
+import socket
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from protocol.enums import Action
+from protocol.message import Message
+from protocol.payloads.game import FetchGameCoverPayload, FetchGameCoverResponsePayload
+from session.errors import SessionDisconnectedError, SessionTimeoutError
+from session.session import Session
+from transport.framed_socket import FramedSocket
+
+a, b = socket.socketpair()
+client = Session(FramedSocket(a))
+server = Session(FramedSocket(b))
+client.start_recv_loop()
+
+N = 50
+futures = [client.request_async(Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload(f"g{i}")), timeout=5.0) for i in range(N)]
+
+# Answer in reverse order; each future gets its own response
+reqs = [server.receive_message() for _ in range(N)]
+for req in reversed(reqs):
+    server.send_message(Message.response(req.action, FetchGameCoverResponsePayload(req.payload.game_name, b"img"), msg_id=req.msg_id))
+for i, fut in enumerate(futures):
+    resp = fut.result(timeout=2.0)
+    assert resp.payload.game_name == f"g{i}" and resp.payload.cover_data == b"img"
+
+# Deadlines fail the future; a late response is dropped
+fut = client.request_async(Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload("slow")), timeout=0.3)
+late = server.receive_message()
+try:
+    fut.result(timeout=2.0)
+except SessionTimeoutError:
+    pass
+else:
+    raise AssertionError("request did not time out")
+server.send_message(Message.response(late.action, FetchGameCoverResponsePayload("slow", b""), msg_id=late.msg_id))
+
+# Cancelled requests are forgotten
+fut = client.request_async(Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload("cancel")))
+assert fut.cancel()
+req = server.receive_message()
+server.send_message(Message.response(req.action, FetchGameCoverResponsePayload("cancel", b""), msg_id=req.msg_id))
+try:
+    fut.result(timeout=0)
+except CancelledError:
+    pass
+time.sleep(0.3)
+assert not client._pending
+
+# request_response still works on top of the futures
+t = threading.Thread(target=lambda: (lambda r: server.send_message(Message.response(r.action, FetchGameCoverResponsePayload("sync", b""), msg_id=r.msg_id)))(server.receive_message()))
+t.start()
+assert client.request_response(Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload("sync"))).payload.game_name == "sync"
+t.join()
+
+# Disconnect fails everything still in flight
+fut = client.request_async(Message.request(Action.FETCH_GAME_COVER, FetchGameCoverPayload("lost")))
+server.receive_message()
+server.close()
+try:
+    fut.result(timeout=2.0)
+except SessionDisconnectedError:
+    pass
+else:
+    raise AssertionError("pending request survived disconnect")
+client.close()
+
+print("session request_async tests passed")
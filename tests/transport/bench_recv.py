@@ -0,0 +1,77 @@
+"""Microbenchmark: legacy `buf += chunk` receive vs. recv_into receive paths.
+
+Run from the repository root:
+    python -m tests.transport.bench_recv
+"""
+import socket
+import struct
+import threading
+import time
+
+from transport.framed_socket import FramedSocket
+
+SIZES = [
+    ("1 KB", 1024),
+    ("64 KB", 64 * 1024),
+    ("1 MB", 1024 * 1024),
+    ("16 MB", 16 * 1024 * 1024),
+]
+TOTAL_BYTES_PER_CASE = 256 * 1024 * 1024
+
+
+class _LegacyFramedSocket(FramedSocket):
+    """The receive path FramedSocket used before recv_into (grows with `buf += chunk`)."""
+    def receive(self) -> bytes:
+        length = struct.unpack('!I', self._legacy_recv_exact(4))[0]
+        return self._legacy_recv_exact(length)
+
+    def _legacy_recv_exact(self, num_bytes: int) -> bytes:
+        buf = b''
+        while len(buf) < num_bytes:
+            with self._recv_lock:
+                chunk = self._sock.recv(num_bytes - len(buf))
+            if not chunk:
+                raise ConnectionError("disconnected")
+            buf += chunk
+        return buf
+
+
+def _sender(sock: socket.socket, frame: bytes, count: int):
+    for _ in range(count):
+        sock.sendall(frame)
+
+
+def _run(mode: str, size: int) -> float:
+    count = max(4, TOTAL_BYTES_PER_CASE // size)
+    a, b = socket.socketpair()
+    try:
+        frame = struct.pack('!I', size) + b'x' * size
+        t = threading.Thread(target=_sender, args=(a, frame, count), daemon=True)
+        if mode == "legacy":
+            fsock = _LegacyFramedSocket(b)
+        else:
+            fsock = FramedSocket(b)
+        receive = fsock.receive
+        start = time.perf_counter()
+        t.start()
+        for _ in range(count):
+            data = receive()
+            assert len(data) == size
+        elapsed = time.perf_counter() - start
+        t.join()
+        return (size * count) / elapsed / (1024 * 1024)
+    finally:
+        a.close()
+        b.close()
+
+
+def main():
+    print(f"{'frame':>8} {'legacy MB/s':>12} {'recv_into MB/s':>15}")
+    for label, size in SIZES:
+        legacy = _run("legacy", size)
+        fresh = _run("fresh", size)
+        print(f"{label:>8} {legacy:>12.1f} {fresh:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
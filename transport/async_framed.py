@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Callable, Optional, Sequence
+from .errors import DataTransmissionError, DisconnectedError
+from .frame_decoder import FrameDecoder
+from .framed_socket import frame_prefix
+
+logger = logging.getLogger(__name__)
+
+
+class FrameProtocol(asyncio.Protocol):
+    """
+    asyncio protocol doing 4-byte length-prefixed messages (same wire format as FramedSocket)
+
+    data_received() 以 FrameDecoder 逐步解析，完整的 frame 交給 on_frame；
+    寫入以 writelines 送出前綴與 body，不會先合併；pause_writing/resume_writing 透過 drain() 提供背壓。
+    """
+    def __init__(self,
+                 on_frame: Callable[[bytearray], None],
+                 on_connected: Optional[Callable[[], None]] = None,
+                 on_disconnected: Optional[Callable[[Exception | None], None]] = None,
+                 on_resume_writing: Optional[Callable[[], None]] = None):
+        self._on_frame = on_frame
+        self._on_resume_writing = on_resume_writing
+        self._on_connected = on_connected
+        self._on_disconnected = on_disconnected
+        self._decoder = FrameDecoder()
+        self._transport: Optional[asyncio.Transport] = None
+        self._write_paused = False
+        self._drain_waiters: list[asyncio.Future] = []
+        self._lost = False
+
+    @property
+    def peer_address(self) -> tuple[str, int] | None:
+        if self._transport is None:
+            return None
+        return self._transport.get_extra_info("peername")
+
+    @property
+    def write_paused(self) -> bool:
+        """True while the transport's write buffer is above its high-water mark."""
+        return self._write_paused
+
+    @property
+    def is_closing(self) -> bool:
+        return self._lost or self._transport is None or self._transport.is_closing()
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        assert isinstance(transport, asyncio.Transport)
+        self._transport = transport
+        if self._on_connected:
+            self._on_connected()
+
+    def data_received(self, data: bytes):
+        try:
+            frames = self._decoder.feed(data)
+        except DataTransmissionError as e:
+            logger.warning("Invalid frame from %s: %s", self.peer_address, e)
+            self.close()
+            return
+        for frame in frames:
+            self._on_frame(frame)
+
+    def eof_received(self) -> bool | None:
+        # let the transport close itself; connection_lost follows
+        return None
+
+    def connection_lost(self, exc: Exception | None):
+        self._lost = True
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_exception(DisconnectedError("Connection lost"))
+        self._drain_waiters.clear()
+        if self._on_disconnected:
+            self._on_disconnected(exc)
+
+    def pause_writing(self):
+        self._write_paused = True
+
+    def resume_writing(self):
+        self._write_paused = False
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._drain_waiters.clear()
+        if self._on_resume_writing:
+            self._on_resume_writing()
+
+    def write_frame(self, buffers: Sequence[bytes | bytearray | memoryview]):
+        """Write one frame whose body is the concatenation of `buffers`. Must run on the loop thread."""
+        self.write_prefixed([frame_prefix(buffers), *buffers])
+
+    def write_prefixed(self, buffers: Sequence[bytes | bytearray | memoryview]):
+        """Write buffers that already form complete frames, length prefix included. Must run on the loop thread."""
+        if self.is_closing:
+            raise DisconnectedError("Transport is closed")
+        assert self._transport is not None
+        self._transport.writelines(buffers)
+
+    async def drain(self):
+        """Wait until the transport's write buffer is below its high-water mark."""
+        if self._lost:
+            raise DisconnectedError("Connection lost")
+        if not self._write_paused:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._drain_waiters.append(waiter)
+        await waiter
+
+    def pause_reading(self):
+        if self._transport is not None and not self._transport.is_closing():
+            self._transport.pause_reading()
+
+    def resume_reading(self):
+        if self._transport is not None and not self._transport.is_closing():
+            self._transport.resume_reading()
+
+    def close(self):
+        if self._transport is not None and not self._transport.is_closing():
+            self._transport.close()
@@ -0,0 +1,87 @@
+import struct
+from .errors import DataTransmissionError
+from .framed_socket import MAX_MESSAGE_SIZE
+
+READ_SIZE = 64 * 1024
+
+
+class FrameDecoder:
+    """
+    incremental parser for 4-byte length-prefixed frames read from a non-blocking stream
+
+    使用方式與 asyncio.BufferedProtocol 相同：先用 get_buffer() 取得可寫入的 memoryview 交給 recv_into，
+    再以 buffer_updated(n) 回報寫入的位元組數，取得已完整的 frame。
+    小 frame 先讀進共用的 scratch 緩衝區；大於 scratch 的 frame 會配置剛好大小的 bytearray 並直接讀入，不再複製。
+    """
+    def __init__(self, read_size: int = READ_SIZE, max_message_size: int = MAX_MESSAGE_SIZE):
+        self._scratch = bytearray(read_size)
+        self._start = 0
+        self._end = 0
+        self._max_message_size = max_message_size
+        # state for a frame that is read directly into its own buffer
+        self._body: bytearray | None = None
+        self._body_got = 0
+
+    def get_buffer(self) -> memoryview:
+        if self._body is not None:
+            return memoryview(self._body)[self._body_got:]
+        if self._end == len(self._scratch):
+            self._compact()
+        return memoryview(self._scratch)[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> list[bytearray]:
+        if self._body is not None:
+            self._body_got += nbytes
+            if self._body_got < len(self._body):
+                return []
+            frame = self._body
+            self._body = None
+            self._body_got = 0
+            return [frame]
+        self._end += nbytes
+        return self._parse_scratch()
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[bytearray]:
+        """Push already-received bytes (e.g. from asyncio.Protocol.data_received)."""
+        frames: list[bytearray] = []
+        view = memoryview(data).cast('B')
+        while view:
+            target = self.get_buffer()
+            n = min(len(target), len(view))
+            target[:n] = view[:n]
+            view = view[n:]
+            frames.extend(self.buffer_updated(n))
+        return frames
+
+    def _parse_scratch(self) -> list[bytearray]:
+        frames: list[bytearray] = []
+        scratch = self._scratch
+        while self._end - self._start >= 4:
+            length = struct.unpack_from('!I', scratch, self._start)[0]
+            if length == 0:
+                raise DataTransmissionError("Received empty frame")
+            if length > self._max_message_size:
+                raise DataTransmissionError(f"Frame size {length} exceeds maximum of {self._max_message_size} bytes")
+            body_start = self._start + 4
+            available = self._end - body_start
+            if available >= length:
+                frames.append(scratch[body_start:body_start + length])
+                self._start = body_start + length
+                continue
+            if length > len(scratch) - 4:
+                # too large for scratch: move what we have into a dedicated buffer
+                self._body = bytearray(length)
+                self._body[:available] = scratch[body_start:self._end]
+                self._body_got = available
+                self._start = self._end = 0
+                return frames
+            break
+        if self._start == self._end:
+            self._start = self._end = 0
+        return frames
+
+    def _compact(self):
+        remaining = self._end - self._start
+        self._scratch[:remaining] = self._scratch[self._start:self._end]
+        self._start = 0
+        self._end = remaining
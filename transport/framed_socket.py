@@ -3,11 +3,28 @@ import struct
 import logging
 import threading
 import select
+import time
+from typing import Sequence
 from .errors import InteractionTimeoutError, FramedSocketError, DataTransmissionError, DisconnectedError
 
 logger = logging.getLogger(__name__)
 
 MAX_MESSAGE_SIZE = 100 * 1024 * 1024  # 100 MB
+SENDMSG_MAX_BUFFERS = 64  # stay well below IOV_MAX per sendmsg call
+SMALL_FRAME_JOIN_SIZE = 64 * 1024  # without sendmsg, small frames are joined so they leave in one write
+
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+_HAS_POLL = hasattr(select, "poll")  # poll has no FD_SETSIZE limit; Windows falls back to select
+
+def frame_prefix(buffers: Sequence[bytes | bytearray | memoryview]) -> bytes:
+    """4-byte length prefix for a frame whose body is the concatenation of `buffers`."""
+    total = 0
+    for b in buffers:
+        total += len(b)
+    if total > MAX_MESSAGE_SIZE:
+        raise DataTransmissionError(f"Message size {total} exceeds maximum of {MAX_MESSAGE_SIZE} bytes")
+    return struct.pack('!I', total)
+
 
 class FramedSocket:
     """
@@ -19,6 +36,8 @@ class FramedSocket:
         self._recv_lock = threading.Lock()
         self._send_timeout: float | None = None
         self._recv_timeout: float | None = None
+        self._prefix_buf = bytearray(4)
+        self._prefix_view = memoryview(self._prefix_buf)
 
     @property
     def peer_address(self) -> tuple[str, int] | None:
@@ -27,22 +46,30 @@ class FramedSocket:
         except Exception:
             return None
 
-    def send(self, data: bytes):
+    def send(self, data: bytes | bytearray | memoryview):
+        self.send_buffers((data,))
+
+    def send_buffers(self, buffers: Sequence[bytes | bytearray | memoryview]):
+        """Send one frame whose body is the concatenation of `buffers`.
+
+        長度前綴與各段 body 以 sendmsg 一次送出（scatter/gather），不會為了加上 4 bytes 而複製整個 payload；
+        部分寫入時只對 memoryview 做切片，不複製資料。
+        """
+        self.send_prefixed([frame_prefix(buffers), *buffers])
+
+    def send_prefixed(self, buffers: Sequence[bytes | bytearray | memoryview]):
+        """Send buffers that already form complete frames, length prefix included (see frame_prefix).
+
+        廣播時同一個已編碼的 frame 會原封不動地寫給每個連線。
+        """
         try:
-            if len(data) > MAX_MESSAGE_SIZE:
-                raise DataTransmissionError(f"Message size {len(data)} exceeds maximum of {MAX_MESSAGE_SIZE} bytes")
-            length_prefix = struct.pack('!I', len(data))
-            if self._send_timeout is not None:
-                _, wlist, _ = select.select([], [self._sock], [], self._send_timeout)
-                if not wlist:
-                    peer = None
-                    try:
-                        peer = self._sock.getpeername()
-                    except Exception:
-                        peer = '<unknown>'
-                    raise InteractionTimeoutError(f"Send timed out to {peer}")
             with self._send_lock:
-                self._sock.sendall(length_prefix + data)
+                if _HAS_SENDMSG:
+                    self._sendmsg_all(buffers)
+                else:
+                    self._sendall_fallback(buffers)
+        except FramedSocketError:
+            raise
         except socket.timeout as e:
             peer = None
             try:
@@ -63,9 +90,68 @@ class FramedSocket:
             logger.debug("Unexpected error during send: %s", e)
             raise FramedSocketError("Unexpected error in send()") from e
 
-    def receive(self) -> bytes:
+    def _sendmsg_all(self, buffers: Sequence[bytes | bytearray | memoryview]):
+        """Write every buffer with sendmsg, advancing memoryviews on partial writes.
+
+        設定 send timeout 時以 MSG_DONTWAIT 直接嘗試寫入，只有在 socket 緩衝區已滿時才用 select 等待，
+        且 timeout 針對整個 frame 計算。
+        """
+        views = [memoryview(b).cast('B') for b in buffers if len(b)]
+        deadline = None if self._send_timeout is None else time.monotonic() + self._send_timeout
+        i = 0
+        while i < len(views):
+            batch = views[i:i + SENDMSG_MAX_BUFFERS]
+            if deadline is None:
+                sent = self._sock.sendmsg(batch)
+            else:
+                try:
+                    sent = self._sock.sendmsg(batch, [], socket.MSG_DONTWAIT)
+                except BlockingIOError:
+                    self._wait_writable(deadline)
+                    continue
+            while sent:
+                n = len(views[i])
+                if sent >= n:
+                    sent -= n
+                    i += 1
+                else:
+                    views[i] = views[i][sent:]
+                    sent = 0
+
+    def _sendall_fallback(self, buffers: Sequence[bytes | bytearray | memoryview]):
+        """Platforms without sendmsg (e.g. Windows): sendall per buffer, joining only small frames."""
+        if self._send_timeout is not None:
+            self._wait_writable(time.monotonic() + self._send_timeout)
+        total = 0
+        for b in buffers:
+            total += len(b)
+        if len(buffers) == 1 or total <= SMALL_FRAME_JOIN_SIZE:
+            self._sock.sendall(b''.join(buffers) if len(buffers) > 1 else buffers[0])
+            return
+        for b in buffers:
+            self._sock.sendall(b)
+
+    def _wait_writable(self, deadline: float):
+        remaining = deadline - time.monotonic()
+        wlist = []
+        if remaining > 0:
+            _, wlist, _ = select.select([], [self._sock], [], remaining)
+        if not wlist:
+            peer = None
+            try:
+                peer = self._sock.getpeername()
+            except Exception:
+                peer = '<unknown>'
+            raise InteractionTimeoutError(f"Send timed out to {peer}")
+
+    def receive(self) -> bytearray:
+        """Receive one frame without copying it after the socket read.
+
+        每個 frame 配置自己的 bytearray：lazy payload 與 binary/attachment 欄位的 memoryview 直接指向它，
+        所以不能重複使用同一塊緩衝區。
+        """
         try:
-            length_prefix = self._recv_exact(4)
+            self._recv_exact_into(self._prefix_view)
         except DisconnectedError:
             raise
         except FramedSocketError:
@@ -73,12 +159,16 @@ class FramedSocket:
         except Exception as e:
             raise FramedSocketError("Unexpected error while receiving length prefix") from e
 
-        if not length_prefix:
-            raise DisconnectedError("Socket disconnected while reading length prefix")
-        
-        message_length = struct.unpack('!I', length_prefix)[0]
+        message_length = struct.unpack_from('!I', self._prefix_buf)[0]
+        if message_length == 0:
+            raise DisconnectedError("Socket disconnected while reading message data")
+        if message_length > MAX_MESSAGE_SIZE:
+            raise DataTransmissionError(f"Requested receive size {message_length} exceeds maximum of {MAX_MESSAGE_SIZE} bytes")
+
+        buf = bytearray(message_length)
+        view = memoryview(buf)
         try:
-            message = self._recv_exact(message_length)
+            self._recv_exact_into(view)
         except DisconnectedError:
             raise
         except FramedSocketError:
@@ -86,20 +176,16 @@ class FramedSocket:
         except Exception as e:
             raise FramedSocketError("Unexpected error while receiving message body") from e
 
-        if not message:
-            raise DisconnectedError("Socket disconnected while reading message data")
-        return message
-    
-    def _recv_exact(self, num_bytes: int) -> bytes:
-        if num_bytes > MAX_MESSAGE_SIZE:
-            raise DataTransmissionError(f"Requested receive size {num_bytes} exceeds maximum of {MAX_MESSAGE_SIZE} bytes")
-        buf = b''
+        return buf
+
+    def _recv_exact_into(self, view: memoryview) -> None:
+        """Fill `view` completely with recv_into; no intermediate chunks are allocated."""
+        num_bytes = len(view)
+        got = 0
         try:
-            while len(buf) < num_bytes:
+            while got < num_bytes:
                 # 若設定了接收超時，先用 select 等待可讀；避免影響 send 的一般 timeout
                 if self._recv_timeout is not None:
-                    # if self._sock.fileno() == -1: # socket closed
-                    #     raise DisconnectedError("Socket is closed")
                     rlist, _, _ = select.select([self._sock], [], [], self._recv_timeout)
                     if not rlist:
                         peer = None
@@ -107,15 +193,13 @@ class FramedSocket:
                             peer = self._sock.getpeername()
                         except Exception:
                             peer = '<unknown>'
-                        # logger.debug("Receive timed out waiting for data from %s", peer)
                         raise InteractionTimeoutError(f"Receive timed out from {peer}")
                 with self._recv_lock:
-                    chunk = self._sock.recv(num_bytes - len(buf))
-                if not chunk:
-                    logger.debug("Socket disconnected during receive (needed %d bytes, got %d)", num_bytes, len(buf))
+                    n = self._sock.recv_into(view[got:], num_bytes - got)
+                if not n:
+                    logger.debug("Socket disconnected during receive (needed %d bytes, got %d)", num_bytes, got)
                     raise DisconnectedError("Socket disconnected during receive")
-                buf += chunk
-            return buf
+                got += n
         except socket.timeout as e:
             peer = None
             try:
@@ -126,6 +210,8 @@ class FramedSocket:
         except DisconnectedError:
             # 允許往上層識別為正常斷線
             raise
+        except InteractionTimeoutError:
+            raise
         except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
             # 這些錯誤代表連線已斷開，應轉為 DisconnectedError
             logger.debug("Connection reset/aborted during receive")
@@ -148,8 +234,30 @@ class FramedSocket:
             # 若 select 因為 socket 已關閉 (fileno=-1) 而拋出 ValueError，也視為斷線
             if isinstance(e, ValueError) and self._sock.fileno() == -1:
                 raise DisconnectedError("Socket closed (fileno is -1)") from e
-            raise FramedSocketError("Unexpected error in _recv_exact") from e
+            raise FramedSocketError("Unexpected error in _recv_exact_into") from e
         
+    def wait_readable(self, timeout: float | None = None, wakeup: socket.socket | None = None) -> bool:
+        """Block until the socket has data (or EOF/error) to read.
+
+        回傳 False 代表逾時或 `wakeup` socket 變成可讀（由其他執行緒喚醒）；等待期間不消耗 CPU。
+        """
+        fd = self._sock.fileno()
+        if fd < 0:
+            raise DisconnectedError("Socket is closed")
+        try:
+            if _HAS_POLL:
+                poller = select.poll()
+                poller.register(fd, select.POLLIN)
+                if wakeup is not None:
+                    poller.register(wakeup.fileno(), select.POLLIN)
+                events = poller.poll(None if timeout is None else max(0, int(timeout * 1000 + 0.999)))
+                return any(efd == fd for efd, _ in events)
+            rlist = [self._sock] if wakeup is None else [self._sock, wakeup]
+            ready, _, _ = select.select(rlist, [], [], timeout)
+            return self._sock in ready
+        except (OSError, ValueError) as e:
+            raise DisconnectedError(f"Socket unusable while waiting for data: {e}") from e
+
     def close(self):
         try:
             self._sock.shutdown(socket.SHUT_RDWR)